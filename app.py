@@ -1,5 +1,6 @@
 
-from flask import Flask, render_template, jsonify, request, g
+from flask import Flask, Response, render_template, jsonify, request, g
+from flask.json.provider import DefaultJSONProvider
 import os
 import sqlite3
 import re
@@ -8,19 +9,52 @@ from datetime import datetime, timedelta
 import redis
 import hashlib
 import json
+import time
 from dotenv import load_dotenv
 
 import jwt
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from src.cache import LRUCache, TieredCache, RedisCircuitBreaker
 from src.chakra import Chakra
 from src.bandha import Bandha
-from src.search import search_with_bandha_patterns, search_all_pattern_variants
+from src.path import Path
+from src.encoding import encode_matches, serialize, wants_msgpack, wants_gzip
+from src.search import (
+    search_with_bandha_patterns,
+    search_all_pattern_variants,
+    search_bandha_pattern_batch,
+    expand_param_grid,
+    search_formula_family,
+    FORMULA_FAMILIES,
+    iter_search_grid,
+    iter_all_pattern_variants,
+    search_grid_page,
+    make_continuation_token,
+    parse_continuation_token,
+    search_move_paths,
+    check_max_distance,
+    SearchBudgetError,
+)
+from src.formula import FormulaError
+from src.multi_search import SOURCES as TARGET_SOURCES, search_targets
+from src.jobs import JobQueue, JobStore, JobError
+from src.parallel import PatternSearchExecutor
 
 # Load environment variables
 load_dotenv()
 
+class PathJSONProvider(DefaultJSONProvider):
+    """Serialises Path objects as [[row, col], ...] in API responses."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Path):
+            return o.to_list()
+        return DefaultJSONProvider.default(o)
+
 app = Flask(__name__)
+app.json = PathJSONProvider(app)
 
 # Initialize Chakra
 # Ensure path is correct relative to execution
@@ -29,67 +63,79 @@ EXCEL_PATH = os.path.join(BASE_DIR, 'Adhyaya_One_Chakras.xlsx')
 chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
 
 # Initialize Redis connection for caching
+# All Redis access goes through a circuit breaker, so an outage after startup
+# falls back to the in-process cache instead of waiting on socket timeouts.
+redis_client = redis.Redis(
+    host=os.environ.get('REDIS_HOST', 'localhost'),
+    port=int(os.environ.get('REDIS_PORT', 6379)),
+    db=int(os.environ.get('REDIS_DB', 0)),
+    decode_responses=True,
+    socket_connect_timeout=5,
+    socket_timeout=5,
+    retry_on_timeout=True
+)
 try:
-    redis_client = redis.Redis(
-        host=os.environ.get('REDIS_HOST', 'localhost'),
-        port=int(os.environ.get('REDIS_PORT', 6379)),
-        db=int(os.environ.get('REDIS_DB', 0)),
-        decode_responses=True,
-        socket_connect_timeout=5,
-        socket_timeout=5,
-        retry_on_timeout=True
-    )
     # Test connection
     redis_client.ping()
     REDIS_AVAILABLE = True
     print("✅ Redis connected successfully")
 except Exception as e:
     print(f"⚠️  Redis connection failed: {e}")
-    print("⚠️  Application will run without caching")
-    redis_client = None
+    print("⚠️  Application will run with in-process caching only")
     REDIS_AVAILABLE = False
 
+# Starts open (probing in the background) if Redis was down at startup
+redis_breaker = RedisCircuitBreaker(
+    redis_client,
+    failure_threshold=int(os.environ.get('REDIS_BREAKER_FAILURES', 3)),
+    probe_interval=float(os.environ.get('REDIS_BREAKER_PROBE_SECONDS', 5)),
+    start_open=not REDIS_AVAILABLE,
+)
+
+# Two-tier pattern cache: in-process LRU first, Redis (when reachable) second
+CACHE_TTL = int(os.environ.get('CACHE_TTL', 3600))
+pattern_cache = TieredCache(
+    local=LRUCache(maxsize=int(os.environ.get('CACHE_LOCAL_SIZE', 4096)), ttl=CACHE_TTL),
+    remote=redis_breaker,
+    ttl=CACHE_TTL,
+    remote_min_compute_seconds=float(os.environ.get('CACHE_REMOTE_MIN_COMPUTE_MS', 1.0)) / 1000,
+)
+
+# Process pool for exhaustive pattern searches, shared by requests and background
+# jobs (MAX_WORKERS=0 searches in the calling process instead)
+search_executor = PatternSearchExecutor(max_workers=int(os.environ.get('MAX_WORKERS', os.cpu_count() or 1)))
+
 # Caching decorator for pattern generation
-def cache_pattern(ttl: int = 3600):
-    """Decorator to cache pattern generation results."""
+def cache_pattern(ttl: int = None):
+    """Decorator to cache pattern generation results in the two-tier pattern cache.
+
+    The cached path is also set on the wrapped Bandha, so a following
+    traverse() sees the same path on a hit as on a miss.
+    """
     def decorator(func):
         @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Skip caching if Redis is not available
-            if not REDIS_AVAILABLE or redis_client is None:
-                return func(*args, **kwargs)
-            
-            # Generate cache key from function arguments
-            if func.__name__ == 'shreni_bandha':
-                key_data = f"shreni_bandha:{args[0]}:{args[1]}:{args[2]}:{args[3]}"
-            elif func.__name__ == 'horizontal_zigzag':
-                key_data = f"horizontal_zigzag:{args[0]}:{args[1]}:{args[2]}"
-            elif func.__name__ == 'vertical_zigzag':
-                key_data = f"vertical_zigzag:{args[0]}:{args[1]}:{args[2]}"
-            elif func.__name__ == 'chess_knight_moves':
-                key_data = f"chess_knight:{args[0]}:{args[1]}:{args[2]}:{hash(str(args[3]))}"
-            else:
-                return func(*args, **kwargs)
-            
-            # Create consistent cache key
+        def wrapper(self, *args, **kwargs):
+            if func.__name__ == 'chess_knight_moves':
+                constraints = args[3] if len(args) > 3 else kwargs.get('constraints')
+                if not constraints or 'random_seed' not in constraints:
+                    # Unseeded knight paths are random; caching would freeze them
+                    return func(self, *args, **kwargs)
+
+            # Generate cache key from function arguments (excluding self).
+            # Values are flat cell indices; the "path:" prefix keeps them apart
+            # from entries written in the old [[row, col], ...] format.
+            key_data = f"path:{func.__name__}:{json.dumps([args, kwargs], sort_keys=True, default=str)}"
             cache_key = f"bandha:{hashlib.md5(key_data.encode()).hexdigest()}"
-            
-            # Try to get from cache
-            try:
-                cached = redis_client.get(cache_key)
-                if cached is not None:
-                    return json.loads(cached)
-            except Exception as e:
-                print(f"Redis error, falling back to direct generation: {e}")
-            
-            # Generate and cache result
-            result = func(*args, **kwargs)
-            try:
-                redis_client.setex(cache_key, ttl, json.dumps(result))
-            except Exception as e:
-                print(f"Redis cache error, continuing without cache: {e}")
-            
-            return result
+
+            result = pattern_cache.get_or_compute(
+                cache_key,
+                lambda: tuple(Path.from_points(func(self, *args, **kwargs)).flat()),
+                kind=func.__name__,
+                ttl=ttl,
+            )
+            points = Path.from_flat(result)
+            self.original.set_path(points)
+            return points
         
         return wrapper
     return decorator
@@ -101,22 +147,22 @@ class CachedBandha:
     def __init__(self):
         self.original = Bandha()
     
-    @cache_pattern(ttl=3600)
+    @cache_pattern()
     def horizontal_zigzag(self, start_row: int, start_col: int, length: int):
         """Cached horizontal zigzag pattern generation."""
         return self.original.horizontal_zigzag(start_row, start_col, length)
     
-    @cache_pattern(ttl=3600)
+    @cache_pattern()
     def vertical_zigzag(self, start_row: int, start_col: int, length: int):
         """Cached vertical zigzag pattern generation."""
         return self.original.vertical_zigzag(start_row, start_col, length)
     
-    @cache_pattern(ttl=3600)
+    @cache_pattern()
     def chess_knight_moves(self, start_row: int, start_col: int, num_jumps: int, constraints=None):
         """Cached chess knight pattern generation."""
         return self.original.chess_knight_moves(start_row, start_col, num_jumps, constraints)
     
-    @cache_pattern(ttl=3600)
+    @cache_pattern()
     def shreni_bandha(self, start_row: int, start_col: int, num_steps: int, direction: str = 'up'):
         """Cached Shreni Bandha pattern generation."""
         return self.original.shreni_bandha(start_row, start_col, num_steps, direction)
@@ -129,9 +175,9 @@ class CachedBandha:
         """Pass-through for set_path method (no caching needed)."""
         return self.original.set_path(points)
 
-    def generate_from_function(self, formula):
-        """Pass-through for generate_from_function method (no caching needed)."""
-        return self.original.generate_from_function(formula)
+    def generate_from_function(self, formula, params=None):
+        """Pass-through for generate_from_function method (compiled formulas are cached in src.formula)."""
+        return self.original.generate_from_function(formula, params)
 
     def add_point(self, row, col):
         """Pass-through for add_point method (no caching needed)."""
@@ -506,6 +552,7 @@ def traverse_path():
     data = request.json
     points = data.get('points')
     formula = data.get('formula')
+    formula_params = data.get('formula_params')
     script = data.get('script')
     # print(f"Request data: {data}")
     bandha = CachedBandha()
@@ -513,7 +560,7 @@ def traverse_path():
     generated_points = []
     
     if formula:
-        generated_points = bandha.generate_from_function(formula)
+        generated_points = bandha.generate_from_function(formula, formula_params)
     elif points:
         bandha.set_path(points)
         generated_points = points
@@ -526,12 +573,41 @@ def traverse_path():
         'points': generated_points # Return points so UI can draw them if generated
     })
 
+def search_response(results, **extra):
+    """
+    Returns search matches as {'matches': [...], **extra}, or in the compact
+    format of src.encoding when the client opts in with "format": "compact"
+    in the request body, ?format=compact, or an Accept header naming
+    application/x-msgpack. Compact bodies are gzipped if the client accepts it.
+    """
+    data = request.get_json(silent=True) or {}
+    use_msgpack = wants_msgpack(request.headers.get('Accept'))
+    if not (use_msgpack or data.get('format') == 'compact' or request.args.get('format') == 'compact'):
+        return jsonify({'matches': results, **extra})
+
+    body, mimetype, content_encoding = serialize(
+        encode_matches(results, **extra), use_msgpack, wants_gzip(request.headers.get('Accept-Encoding'))
+    )
+    response = app.response_class(body, mimetype=mimetype)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
+# Largest page /api/search returns when 'limit' is given
+MAX_SEARCH_LIMIT = 1000
+
 @app.route('/api/search', methods=['POST'])
 @auth_required
 def search_grid_endpoint():
     """
     Accepts a JSON object with 'target', 'measure', 'max_distance', 'script', and 'use_sandhi'.
     Returns the mapped paths matching the target.
+
+    With 'limit' (and optionally 'offset', or the 'next' token of a previous
+    page as 'continuation'), returns only that page of the best matches,
+    plus 'next' (a token for the following page, or null) and 'total' (the
+    number of matches, or null if the search stopped early).
     """
     data = request.json
     target = data.get('target', '')
@@ -543,12 +619,31 @@ def search_grid_endpoint():
     script = data.get('script', 'kannada')
     use_sandhi = data.get('use_sandhi', False)
     
-    from src.search import search_grid
-    results = search_grid(chakra, target, measure, max_distance, script, use_sandhi)
-    
-    return jsonify({
-        'matches': results
-    })
+    if data.get('limit') is None and data.get('continuation') is None:
+        from src.search import search_grid
+        results = search_grid(chakra, target, measure, max_distance, script, use_sandhi)
+        return search_response(results)
+
+    try:
+        limit = int(data.get('limit') or 50)
+        offset = int(data.get('offset', 0))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if not 0 < limit <= MAX_SEARCH_LIMIT or offset < 0:
+        return jsonify({'error': f'limit must be 1-{MAX_SEARCH_LIMIT} and offset non-negative'}), 400
+
+    query = {'target': target, 'measure': measure, 'max_distance': max_distance,
+             'script': script, 'use_sandhi': bool(use_sandhi)}
+    if data.get('continuation'):
+        try:
+            offset = parse_continuation_token(data['continuation'], query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    results, total = search_grid_page(chakra, target, measure, max_distance, script, use_sandhi, limit, offset)
+    more = len(results) == limit and (total is None or offset + limit < total)
+    next_token = make_continuation_token(query, offset + limit) if more else None
+    return search_response(results, offset=offset, limit=limit, total=total, next=next_token)
 
 @app.route('/api/bandha/horizontal_zigzag', methods=['POST'])
 def horizontal_zigzag_endpoint():
@@ -668,16 +763,191 @@ def search_bandha_pattern_endpoint():
         measure, max_distance, script, use_sandhi
     )
     
-    return jsonify({
-        'matches': results
-    })
+    return search_response(results)
+
+@app.route('/api/search/move_paths', methods=['POST'])
+@auth_required
+def search_move_paths_endpoint():
+    """
+    Accepts JSON with 'target', 'moves' (a step set name such as 'king' or
+    'knight', or a list of [dr, dc] steps), 'fold', 'measure', 'max_distance',
+    'script' and 'limit'. Returns the best matching self-avoiding paths of
+    that move graph over the whole grid, with 'truncated': true (and a
+    'warning') if the search gave up and the matches are incomplete.
+    """
+    data = request.json
+    target = data.get('target', '')
+    measure = data.get('measure', 'exact')
+    try:
+        max_distance = int(data.get('max_distance', 0))
+    except (ValueError, TypeError):
+        max_distance = 0
+    script = data.get('script', 'kannada')
+    if data.get('use_sandhi'):
+        return jsonify({'error': 'use_sandhi is not supported for move path search'}), 400
+    try:
+        limit = int(data.get('limit') or MAX_SEARCH_LIMIT)
+    except (ValueError, TypeError):
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if not 0 < limit <= MAX_SEARCH_LIMIT:
+        return jsonify({'error': f'limit must be 1-{MAX_SEARCH_LIMIT}'}), 400
+
+    try:
+        results = search_move_paths(chakra, target, data.get('moves', 'king'), bool(data.get('fold', False)),
+                                    measure, max_distance, script, limit=limit)
+    except SearchBudgetError as e:
+        # The search gave up; its matches so far are returned, flagged as incomplete
+        return search_response(e.matches, truncated=True, warning=str(e))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return search_response(results, truncated=False)
+
+# Upper bound on words in one multi-target search
+MAX_BATCH_TARGETS = 100000
+
+@app.route('/api/search/targets', methods=['POST'])
+@auth_required
+def search_targets_endpoint():
+    """
+    Exact search for many targets in one pass. Accepts JSON with 'targets'
+    (a list of words; TargetStrings.txt if omitted), 'sources' (any of
+    'rays', 'horizontal_zigzag', 'vertical_zigzag', 'shreni_bandha'; all by
+    default), 'unit' ('codes' or 'devanagari') and 'script'.
+
+    Returns the matches of every target, each with a 'target' field, plus
+    'targets_searched', 'unmatched' (targets without a match) and 'invalid'
+    (targets that cannot be spelled with grid aksharas).
+    """
+    data = request.get_json(silent=True) or {}
+    targets = data.get('targets')
+    if targets is None:
+        try:
+            targets = load_target_strings()
+        except FileNotFoundError:
+            return jsonify({'error': 'TargetStrings.txt file not found'}), 404
+    if not isinstance(targets, list) or not all(isinstance(t, str) for t in targets):
+        return jsonify({'error': 'targets must be a list of strings'}), 400
+    targets = [t.strip() for t in targets if t.strip()]
+    if len(targets) > MAX_BATCH_TARGETS:
+        return jsonify({'error': f'At most {MAX_BATCH_TARGETS} targets per request'}), 400
+
+    try:
+        results, invalid = search_targets(chakra, targets, data.get('sources', TARGET_SOURCES),
+                                          data.get('unit', 'codes'), data.get('script', 'kannada'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    targets = list(dict.fromkeys(targets))
+    matched = {match['target'] for match in results}
+    unmatched = [t for t in targets if t not in matched and t not in invalid]
+    return search_response(results, targets_searched=len(targets), unmatched=unmatched, invalid=invalid)
+
+# Upper bound on variants evaluated by one batch request (27 x 27 starts x 2 directions is 1458)
+MAX_BATCH_VARIANTS = 5000
+
+@app.route('/api/search/bandha_pattern/batch', methods=['POST'])
+@auth_required
+def search_bandha_pattern_batch_endpoint():
+    """
+    Accepts JSON with 'target', 'pattern_type', 'measure', 'max_distance', 'script', 'use_sandhi'
+    and either 'pattern_params_list' (list of pattern_params objects) or 'param_grid'
+    (object mapping each parameter to a value or a list of values to combine).
+    Returns the combined matches of all variants in one response.
+    """
+    data = request.json
+    target = data.get('target', '')
+    pattern_type = data.get('pattern_type', '')
+    measure = data.get('measure', 'exact')
+    try:
+        max_distance = int(data.get('max_distance', 0))
+    except (ValueError, TypeError):
+        max_distance = 0
+    script = data.get('script', 'kannada')
+    use_sandhi = data.get('use_sandhi', False)
+
+    if 'param_grid' in data:
+        param_grid = data['param_grid']
+        if not isinstance(param_grid, dict):
+            return jsonify({'error': 'param_grid must be an object'}), 400
+        # Check the size before expanding so a large grid is never materialised
+        variant_count = 1
+        for value in param_grid.values():
+            if isinstance(value, list):
+                variant_count *= len(value)
+        if variant_count > MAX_BATCH_VARIANTS:
+            return jsonify({'error': f'Too many variants (max {MAX_BATCH_VARIANTS})'}), 400
+        pattern_params_list = expand_param_grid(param_grid)
+    else:
+        pattern_params_list = data.get('pattern_params_list', [])
+        if not isinstance(pattern_params_list, list):
+            return jsonify({'error': 'pattern_params_list must be a list'}), 400
+
+    if len(pattern_params_list) > MAX_BATCH_VARIANTS:
+        return jsonify({'error': f'Too many variants (max {MAX_BATCH_VARIANTS})'}), 400
+
+    results = search_bandha_pattern_batch(
+        chakra, target, pattern_type, pattern_params_list,
+        measure, max_distance, script, use_sandhi, executor=search_executor
+    )
+
+    return search_response(results, variants_searched=len(pattern_params_list))
+
+# Formula families are evaluated vectorised, so they can be much larger than pattern batches
+MAX_FORMULA_VARIANTS = 50000
+
+@app.route('/api/search/formula_family', methods=['POST'])
+@auth_required
+def search_formula_family_endpoint():
+    """
+    Accepts JSON with 'target', 'measure', 'max_distance', 'script', 'use_sandhi' and either
+    'family' (one of FORMULA_FAMILIES) or 'formula' (e.g. "(a*x + b) % 27"), plus optional
+    'param_ranges' (object mapping each parameter to a value or a list of values).
+    Returns the paths of all family members that spell the target.
+    """
+    data = request.json
+    target = data.get('target', '')
+    measure = data.get('measure', 'exact')
+    try:
+        max_distance = int(data.get('max_distance', 0))
+    except (ValueError, TypeError):
+        max_distance = 0
+    script = data.get('script', 'kannada')
+    use_sandhi = data.get('use_sandhi', False)
+    family = data.get('family')
+    formula = data.get('formula')
+    param_ranges = data.get('param_ranges') or {}
+
+    if family is None and not formula:
+        return jsonify({'error': f"Provide 'formula' or one of the families: {', '.join(FORMULA_FAMILIES)}"}), 400
+    if not isinstance(param_ranges, dict):
+        return jsonify({'error': 'param_ranges must be an object'}), 400
+
+    ranges = dict(FORMULA_FAMILIES[family][1], **param_ranges) if family in FORMULA_FAMILIES else param_ranges
+    variant_count = 1
+    for value in ranges.values():
+        if isinstance(value, (list, range)):
+            variant_count *= len(value)
+    if variant_count > MAX_FORMULA_VARIANTS:
+        return jsonify({'error': f'Too many variants (max {MAX_FORMULA_VARIANTS})'}), 400
+
+    try:
+        results = search_formula_family(
+            chakra, target, formula, param_ranges, family,
+            measure, max_distance, script, use_sandhi
+        )
+    except FormulaError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return search_response(results, variants_searched=variant_count)
 
 @app.route('/api/search/all_pattern_variants', methods=['POST'])
 @auth_required
 def search_all_pattern_variants_endpoint():
     """
     Accepts JSON with 'target', 'pattern_type', 'measure', 'max_distance', 'script', 'use_sandhi'.
-    Returns matches trying all starting positions for the pattern type.
+    Returns matches trying all starting positions for the pattern type, with
+    'truncated' as for /api/search/move_paths.
     """
     data = request.json
     target = data.get('target', '')
@@ -690,14 +960,190 @@ def search_all_pattern_variants_endpoint():
     script = data.get('script', 'kannada')
     use_sandhi = data.get('use_sandhi', False)
     
-    results = search_all_pattern_variants(
-        chakra, target, pattern_type,
-        measure, max_distance, script, use_sandhi
-    )
+    try:
+        # Without Sandhi, chess_knight is an exhaustive move-path search
+        results = search_all_pattern_variants(
+            chakra, target, pattern_type,
+            measure, max_distance, script, use_sandhi, executor=search_executor
+        )
+    except SearchBudgetError as e:
+        # The knight search gave up; its matches so far are returned, flagged as incomplete
+        return search_response(e.matches, truncated=True, warning=str(e))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify({
-        'matches': results
-    })
+    return search_response(results, truncated=False)
+
+# Streams send a heartbeat after this many seconds without a match, so a
+# disconnected client is noticed (and its search stopped) while nothing is found
+STREAM_HEARTBEAT_SECONDS = 1.0
+
+def wants_event_stream():
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+def format_stream_event(event, use_sse):
+    """Formats one stream event as a Server-Sent Event or an NDJSON line."""
+    body = app.json.dumps(event)
+    return f"event: {event['type']}\ndata: {body}\n\n" if use_sse else body + "\n"
+
+@app.route('/api/search/stream', methods=['POST'])
+@auth_required
+def search_stream_endpoint():
+    """
+    Accepts the same JSON as /api/search, plus 'mode': 'grid' (default) or
+    'pattern_variants' (with 'pattern_type', as for /api/search/all_pattern_variants).
+    Streams matches as they are found, unsorted: as Server-Sent Events when the
+    Accept header names text/event-stream, otherwise as NDJSON. Each event is
+    {"type": "match", "match": {...}}, {"type": "heartbeat"} or, last,
+    {"type": "done", "count": n}, or {"type": "error", "error": "...",
+    "truncated": true, "count": n} if the search was abandoned after n
+    matches. The search stops when the client disconnects.
+    """
+    data = request.json
+    target = data.get('target', '')
+    measure = data.get('measure', 'exact')
+    try:
+        max_distance = int(data.get('max_distance', 0))
+    except (ValueError, TypeError):
+        max_distance = 0
+    script = data.get('script', 'kannada')
+    use_sandhi = data.get('use_sandhi', False)
+    mode = data.get('mode', 'grid')
+
+    if mode == 'grid':
+        matches = iter_search_grid(chakra, target, measure, max_distance, script, use_sandhi, progress=True)
+    elif mode == 'pattern_variants':
+        pattern_type = data.get('pattern_type', '')
+        if pattern_type == 'chess_knight' and not use_sandhi:
+            try:
+                check_max_distance(target, measure, max_distance, script)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        matches = iter_all_pattern_variants(chakra, target, pattern_type,
+                                            measure, max_distance, script, use_sandhi, progress=True)
+    else:
+        return jsonify({'error': "mode must be 'grid' or 'pattern_variants'"}), 400
+
+    use_sse = wants_event_stream()
+
+    def format_event(event):
+        return format_stream_event(event, use_sse)
+
+    def generate():
+        count = 0
+        last_sent = time.monotonic()
+        try:
+            for match in matches:
+                now = time.monotonic()
+                if match is not None:
+                    count += 1
+                    last_sent = now
+                    yield format_event({'type': 'match', 'match': match})
+                elif now - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                    last_sent = now
+                    yield format_event({'type': 'heartbeat'})
+            yield format_event({'type': 'done', 'count': count})
+        except SearchBudgetError as e:
+            # An exhaustive knight search gave up; the matches sent so far are incomplete
+            yield format_event({'type': 'error', 'error': str(e), 'truncated': True, 'count': count})
+        finally:
+            # Runs when the server closes the response, including after a
+            # client disconnect, so an abandoned search stops here
+            matches.close()
+
+    return Response(generate(), mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Background search jobs ---
+# Exhaustive searches run in the background on search_executor's processes;
+# their status and results live in SQLite next to the auth DB, so every web
+# worker can serve polls.
+JOBS_DB_PATH = os.path.join(BASE_DIR, "search_jobs.db")
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', 24 * 3600))
+job_queue = JobQueue(JobStore(JOBS_DB_PATH), search_executor, max_jobs=int(os.environ.get('MAX_CONCURRENT_JOBS', 2)))
+
+# How often a job stream checks the job's progress
+JOB_STREAM_POLL_SECONDS = 0.5
+# A job stream holds a sync worker, so it ends well within gunicorn's
+# --timeout and the client reconnects to follow the job further
+JOB_STREAM_MAX_SECONDS = int(os.environ.get('JOB_STREAM_MAX_SECONDS', 25))
+
+@app.route('/api/jobs', methods=['POST'])
+@auth_required
+def submit_job_endpoint():
+    """
+    Accepts JSON with 'kind' (default 'all_pattern_variants'), 'target', 'measure',
+    'max_distance', 'script', 'use_sandhi' and optional 'pattern_types' (default: all).
+    Queues the search and returns {'job': {...}, 'deduplicated': bool} with status 202;
+    an identical search already queued or running is returned instead of a new job.
+    """
+    data = request.json or {}
+    job_queue.store.purge(JOB_RETENTION_SECONDS)
+    try:
+        job, created = job_queue.submit(data.get('kind', 'all_pattern_variants'), data, chakra)
+    except JobError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'job': job, 'deduplicated': not created}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@auth_required
+def job_status_endpoint(job_id):
+    """Returns the job's status: 'queued', 'running', 'done' or 'failed', with progress from 0 to 1."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'job': job})
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+@auth_required
+def job_results_endpoint(job_id):
+    """Returns a finished job's matches like the search endpoints (compact format supported), or 409 if it is not done."""
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Job is {job['status']}", 'job': job}), 409
+    return search_response(job_queue.store.result(job_id), job_id=job_id)
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+@auth_required
+def job_stream_endpoint(job_id):
+    """
+    Streams the job's progress as SSE or NDJSON (see /api/search/stream):
+    {"type": "progress", "job": {...}} whenever it changes, heartbeats in
+    between, and finally {"type": "done" or "failed", "job": {...}}. A job
+    still in flight after JOB_STREAM_MAX_SECONDS ends the stream with
+    {"type": "reconnect", "job": {...}}; the client opens it again to resume.
+    """
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    use_sse = wants_event_stream()
+
+    def generate():
+        last_state = None
+        last_sent = started = time.monotonic()
+        current = job
+        while current is not None:
+            if current['status'] in ('done', 'failed'):
+                yield format_stream_event({'type': current['status'], 'job': current}, use_sse)
+                return
+            state = (current['status'], current['progress'])
+            now = time.monotonic()
+            if now - started >= JOB_STREAM_MAX_SECONDS:
+                yield format_stream_event({'type': 'reconnect', 'job': current}, use_sse)
+                return
+            if state != last_state:
+                last_state, last_sent = state, now
+                yield format_stream_event({'type': 'progress', 'job': current}, use_sse)
+            elif now - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                last_sent = now
+                yield format_stream_event({'type': 'heartbeat'}, use_sse)
+            time.sleep(JOB_STREAM_POLL_SECONDS)
+            current = job_queue.store.get(job_id)
+
+    return Response(generate(), mimetype='text/event-stream' if use_sse else 'application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
@@ -789,13 +1235,17 @@ def load_path(name):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def load_target_strings():
+    """Returns the non-empty lines of TargetStrings.txt. Raises FileNotFoundError if it is missing."""
+    target_file_path = os.path.join(BASE_DIR, 'TargetStrings.txt')
+    with open(target_file_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f.readlines() if line.strip()]
+
 @app.route('/api/target_strings', methods=['GET'])
 def get_target_strings():
     """Return list of target strings from TargetStrings.txt file."""
-    target_file_path = os.path.join(BASE_DIR, 'TargetStrings.txt')
     try:
-        with open(target_file_path, 'r', encoding='utf-8') as f:
-            strings = [line.strip() for line in f.readlines() if line.strip()]
+        strings = load_target_strings()
         return jsonify({'strings': strings})
     except FileNotFoundError:
         return jsonify({'error': 'TargetStrings.txt file not found'}), 404
@@ -806,41 +1256,44 @@ def get_target_strings():
 @app.route('/health')
 def health_check():
     """Health check endpoint for monitoring."""
-    if REDIS_AVAILABLE and redis_client:
+    if redis_breaker.available:
         try:
-            redis_status = "connected" if redis_client.ping() else "disconnected"
-        except:
+            redis_status = "connected" if redis_breaker.ping() else "disconnected"
+        except Exception:
             redis_status = "error"
     else:
-        redis_status = "disabled"
+        redis_status = "circuit_open"
     
     return jsonify({
         'status': 'healthy',
         'redis': redis_status,
-        'cache_enabled': REDIS_AVAILABLE,
+        'cache_enabled': redis_breaker.available,
+        'circuit_breaker': redis_breaker.stats(),
         'timestamp': str(datetime.utcnow())
     })
 
 @app.route('/cache/stats')
 def cache_stats():
-    """Redis cache statistics."""
-    if not REDIS_AVAILABLE or redis_client is None:
-        return jsonify({
-            'error': 'Redis not available',
-            'cache_enabled': False,
-            'message': 'Caching is disabled'
-        }), 504
+    """Pattern cache statistics: hit/miss counters per tier, plus Redis server info."""
+    stats = {
+        'cache_enabled': True,
+        'tiers': pattern_cache.stats(),
+        'circuit_breaker': redis_breaker.stats(),
+    }
+    if not redis_breaker.available:
+        stats['message'] = 'Redis not available, using in-process cache only'
+        return jsonify(stats)
     
     try:
-        info = redis_client.info()
-        return jsonify({
+        info = redis_breaker.info()
+        stats.update({
             'redis_memory': info.get('used_memory_human', 'N/A'),
             'keyspace_hits': info.get('keyspace_hits', 0),
             'keyspace_misses': info.get('keyspace_misses', 0),
             'connected_clients': info.get('connected_clients', 0),
             'uptime': info.get('uptime_in_seconds', 0),
-            'cache_enabled': True
         })
+        return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -887,15 +1340,20 @@ def warm_cache():
 @app.route('/cache/clear', methods=['POST'])
 @auth_required
 def clear_cache():
-    """Clear all Bandha pattern caches."""
+    """Clear all Bandha pattern caches (in-process and Redis)."""
     try:
+        cleared_local = pattern_cache.local.clear()
+
         # Delete all keys with 'bandha:' prefix
-        keys = redis_client.keys('bandha:*')
-        if keys:
-            redis_client.delete(*keys)
+        keys = []
+        if redis_breaker.available:
+            keys = redis_breaker.keys('bandha:*')
+            if keys:
+                redis_breaker.delete(*keys)
         
         return jsonify({
             'cleared_keys': len(keys),
+            'cleared_local': cleared_local,
             'status': 'cache_cleared'
         })
     
@@ -1,5 +1,5 @@
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 import os
 
@@ -7,39 +7,41 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from sandhi_simple import Sandhi
 from transliterate import transliterate_text
+# Imported through the package so FormulaError, the formula cache and Path
+# instances are the ones src.search and app use
+from src.formula import compile_formula, FormulaError
+from src.path import Path
 
 class Bandha:
     def __init__(self, name="Custom Bandha"):
         self.name = name
-        self.path_points: List[Tuple[int, int]] = [] # List of (row, col) tuples
+        self.path_points: Path = Path() # Cells in traversal order; iterates as (row, col) tuples
 
     def set_path(self, points: List[Tuple[int, int]]):
         """
         Sets the path directly from a list of coordinates.
-        Coordinates are 0-indexed (row, col).
+        Coordinates are 0-indexed (row, col). Points outside the grid are
+        dropped, as traverse would ignore them anyway.
         """
-        self.path_points = points
+        if isinstance(points, Path):
+            self.path_points = points
+        else:
+            self.path_points = Path.from_points((r, c) for r, c in points if 0 <= r < 27 and 0 <= c < 27)
 
     def add_point(self, row, col):
-        self.path_points.append((row, col))
+        if 0 <= row < 27 and 0 <= col < 27:
+            self.path_points = self.path_points + [(row, col)]
 
     def traverse(self, chakra, script='kannada') -> Tuple[str, str]:
         """
         Traverses the given Chakra object following the path and returns extracted text.
         Returns a tuple: (text_without_sandhi, text_with_sandhi)
         """
+        # Paths only hold cells inside the grid, decoded here in one gather
         result_text = ""
-        for r, c in self.path_points:
-            # Check bounds
-            if 0 <= r < 27 and 0 <= c < 27:
-                akshara = chakra.get_akshara_at(r, c, script)
-                if akshara:
-                    if script == 'kannada': result_text += akshara[0]
-                    else: result_text += akshara[1]
-            else:
-                 # What to do on out of bounds? Ignore or mark?
-                 # Ignoring for now.
-                 pass
+        if len(self.path_points) and chakra.grid is not None:
+            numbers = chakra.grid.ravel()[self.path_points.flat()]
+            result_text = chakra.decode_numbers(numbers, 'kannada' if script == 'kannada' else 'devanagari')
         
         # Apply Sandhi conversion to get Sandhi version
         try:
@@ -60,45 +62,23 @@ class Bandha:
         
     def get_coordinates(self):
         return self.path_points
-    def generate_from_function(self, formula_str: str):
+    def generate_from_function(self, formula_str: str, params: Optional[Dict[str, float]] = None):
         """
         Generates path points based on y = f(x).
         x iterates from 0 to 26 (representing columns).
         y is calculated, rounded, and checked for bounds (representing rows).
+        Names other than x and the math module's are formula parameters,
+        e.g. "a*x + b" with params={'a': 2, 'b': 1}.
+        Values of x for which the formula has no real value (log(0),
+        division by zero, ...) are skipped, as are invalid formulas.
         """
-        import math
-        
-        # Prepare safe context
-        allowed_names = {k: v for k, v in math.__dict__.items() if not k.startswith("__")}
-        
-        # Sanitize and prepare formula
-        # Replace ^ with ** for power
-        expression = formula_str.replace('^', '**')
-        
-        points = []
-        for x in range(27):
-            try:
-                # Add x to context
-                context = allowed_names.copy()
-                context['x'] = x
-                
-                # Evaluate
-                y_val = eval(expression, {"__builtins__": None}, context)
-                
-                # Round to nearest integer
-                y = round(y_val)
-                
-                # Check bounds (0-26)
-                if 0 <= y < 27:
-                    # In our grid implementation:
-                    # traverse uses (r, c).
-                    # We mapped x -> col, y -> row.
-                    # So point is (y, x)
-                    points.append((int(y), int(x)))
-            except Exception:
-                # Ignore errors for specific x (e.g. log(0), div by zero)
-                continue
-                
+        try:
+            # Parsed, validated and compiled once per formula, then
+            # evaluated for all 27 columns at once
+            points = Path.from_points(compile_formula(formula_str).path(params))
+        except FormulaError:
+            points = Path()
+
         self.path_points = points
         return points
     
@@ -113,7 +93,7 @@ class Bandha:
             length (int): Number of cells to include in the path
         
         Returns:
-            List[Tuple[int, int]]: List of (row, col) coordinates
+            Path: Cells visited, iterating as (row, col) coordinates
         """
         points = []
         current_row, current_col = start_row, start_col
@@ -135,8 +115,8 @@ class Bandha:
                     current_row += 1
                 direction_up = not direction_up
         
-        self.path_points = points
-        return points
+        self.path_points = Path.from_points(points)
+        return self.path_points
     
     def vertical_zigzag(self, start_row, start_col, length):
         """
@@ -149,7 +129,7 @@ class Bandha:
             length (int): Number of cells to include in the path
         
         Returns:
-            List[Tuple[int, int]]: List of (row, col) coordinates
+            Path: Cells visited, iterating as (row, col) coordinates
         """
         points = []
         current_row, current_col = start_row, start_col
@@ -171,8 +151,8 @@ class Bandha:
                     current_col -= 1
                 direction_right = not direction_right
         
-        self.path_points = points
-        return points
+        self.path_points = Path.from_points(points)
+        return self.path_points
     
     def chess_knight_moves(self, start_row, start_col, num_jumps, constraints=None):
         """
@@ -188,7 +168,7 @@ class Bandha:
                 - 'random_seed': Integer for reproducible random paths
         
         Returns:
-            List[Tuple[int, int]]: List of (row, col) coordinates
+            Path: Cells visited, iterating as (row, col) coordinates
         """
         import random
         
@@ -267,8 +247,8 @@ class Bandha:
             
             current_row, current_col = next_row, next_col
         
-        self.path_points = points
-        return points
+        self.path_points = Path.from_points(points)
+        return self.path_points
     
     def shreni_bandha(self, start_row, start_col, num_steps, direction='up'):
         """
@@ -285,7 +265,7 @@ class Bandha:
             direction (str): 'up' for diagonal up-right, 'down' for diagonal down-left
         
         Returns:
-            List[Tuple[int, int]]: List of (row, col) coordinates
+            Path: Cells visited, iterating as (row, col) coordinates
         """
         points = []
         current_row, current_col = start_row, start_col
@@ -348,5 +328,5 @@ class Bandha:
             current_row = next_row
             current_col = next_col
         
-        self.path_points = points
-        return points
+        self.path_points = Path.from_points(points)
+        return self.path_points
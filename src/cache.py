@@ -0,0 +1,245 @@
+"""
+Two-tier cache for generated Bandha paths.
+
+A bounded in-process LRU answers repeat requests without any network round
+trip. Redis, when available, is the shared second tier between workers. The
+remote tier is skipped for values that are cheaper to recompute than to fetch,
+and while a circuit breaker reports Redis as down.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by LRUCache.get when a key is absent or expired
+MISSING = object()
+
+
+class LRUCache:
+    """Bounded in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Returns the cached value for `key`, or MISSING."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key, value, ttl=None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries and returns how many there were."""
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            return count
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
+
+
+class TieredCache:
+    """
+    In-process LRU (first tier) in front of an optional Redis client (second tier).
+
+    Values must be JSON-serialisable to be stored remotely. The average compute
+    time of each kind of value is tracked; kinds that compute faster than
+    `remote_min_compute_seconds` bypass Redis entirely, since a round trip
+    would cost more than recomputing them.
+    """
+
+    def __init__(self, local, remote=None, ttl=3600, remote_min_compute_seconds=0.001):
+        self.local = local
+        self.remote = remote
+        self.ttl = ttl
+        self.remote_min_compute_seconds = remote_min_compute_seconds
+        self._compute_seconds = {}  # kind -> moving average of compute time
+        self.remote_hits = 0
+        self.remote_misses = 0
+        self.remote_skipped = 0
+        self.remote_errors = 0
+
+    def use_remote(self, kind='default'):
+        """Whether values of this kind are worth fetching from / storing in Redis."""
+        if self.remote is None or not getattr(self.remote, 'available', True):
+            return False
+        average = self._compute_seconds.get(kind)
+        return average is None or average >= self.remote_min_compute_seconds
+
+    def get_or_compute(self, key, compute, kind='default', ttl=None):
+        """Returns the value for `key`, calling `compute()` on a miss in both tiers."""
+        ttl = ttl if ttl is not None else self.ttl
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+
+        use_remote = self.use_remote(kind)
+        if use_remote:
+            try:
+                cached = self.remote.get(key)
+                if cached is not None:
+                    self.remote_hits += 1
+                    value = json.loads(cached)
+                    self.local.set(key, value, ttl)
+                    return value
+                self.remote_misses += 1
+            except Exception as e:
+                self.remote_errors += 1
+                print(f"Redis error, falling back to direct generation: {e}")
+        elif self.remote is not None:
+            self.remote_skipped += 1
+
+        start = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start
+        previous = self._compute_seconds.get(kind)
+        self._compute_seconds[kind] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+
+        self.local.set(key, value, ttl)
+        # The get above may have tripped the circuit breaker
+        if use_remote and getattr(self.remote, 'available', True):
+            try:
+                self.remote.setex(key, ttl, json.dumps(value))
+            except Exception as e:
+                self.remote_errors += 1
+                print(f"Redis cache error, continuing without cache: {e}")
+        return value
+
+    def stats(self):
+        return {
+            'local': self.local.stats(),
+            'remote': {
+                'enabled': self.remote is not None,
+                'hits': self.remote_hits,
+                'misses': self.remote_misses,
+                'skipped': self.remote_skipped,
+                'errors': self.remote_errors,
+                'min_compute_ms': self.remote_min_compute_seconds * 1000,
+            },
+            'compute_ms': {kind: round(seconds * 1000, 4) for kind, seconds in self._compute_seconds.items()},
+        }
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Redis while the circuit breaker is open."""
+
+
+class RedisCircuitBreaker:
+    """
+    Wraps a redis client so that an outage costs a few failed calls, not a
+    socket timeout on every request.
+
+    Calls go straight through while the breaker is closed. After
+    `failure_threshold` consecutive failures it opens: every call raises
+    CircuitOpenError immediately and a background thread pings Redis every
+    `probe_interval` seconds. The first successful ping closes it again.
+    Any client method can be called on the breaker, e.g. breaker.get(key).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+
+    def __init__(self, client, failure_threshold=3, probe_interval=5.0, start_open=False):
+        self.client = client
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._probe_thread = None
+        if start_open:
+            self._open()
+
+    @property
+    def available(self):
+        return self.state == self.CLOSED
+
+    def call(self, method_name, *args, **kwargs):
+        if self.state == self.OPEN:
+            self.rejected_calls += 1
+            raise CircuitOpenError('Redis circuit breaker is open')
+        try:
+            result = getattr(self.client, method_name)(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self.consecutive_failures = 0
+        return result
+
+    def __getattr__(self, name):
+        # Proxy client methods (get, setex, keys, ...) through call()
+        client = self.__dict__.get('client')
+        if name.startswith('_') or not callable(getattr(client, name, None)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.last_error = str(error)
+            self.consecutive_failures += 1
+            if self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        """Opens the breaker and starts the background probe. Caller holds the lock, or is __init__."""
+        self.state = self.OPEN
+        self.times_opened += 1
+        print(f"⚠️  Redis circuit breaker opened: {self.last_error}")
+        if self._probe_thread is None or not self._probe_thread.is_alive():
+            self._probe_thread = threading.Thread(target=self._probe, name='redis-breaker-probe', daemon=True)
+            self._probe_thread.start()
+
+    def _probe(self):
+        while self.state == self.OPEN:
+            time.sleep(self.probe_interval)
+            try:
+                self.client.ping()
+            except Exception as e:
+                self.last_error = str(e)
+                continue
+            with self._lock:
+                self.state = self.CLOSED
+                self.consecutive_failures = 0
+            print("✅ Redis reachable again, circuit breaker closed")
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'failure_threshold': self.failure_threshold,
+            'times_opened': self.times_opened,
+            'rejected_calls': self.rejected_calls,
+            'last_error': self.last_error,
+        }
@@ -1,15 +1,40 @@
 
+import numpy as np
 import pandas as pd
 import os
-from src.transliterate import AKSHARA_MAP, transliterate_text
+from src.transliterate import AKSHARA_MAP, INDIAN_LANGUAGES, transliterate_text
+from src.ray_index import RayIndex, SandhiRayIndex
 
 class Chakra:
     def __init__(self, file_path, sheet_name='Sheet1'):
         self.file_path = file_path
         self.sheet_name = sheet_name
         self.grid = None # 27x27 grid of integers
+        self.ray_index = None # Straight-line text index, built once the grid is loaded
+        self.akshara_tables = {} # script -> 65-entry list of aksharas indexed by grid number
+        self.akshara_matrix = {} # script -> 27x27 list of aksharas ("?" for invalid cells)
+        self.akshara_lookup = {} # script -> 65-entry object array for decoding number arrays ("?" at 0)
+        self._sandhi_index = None # Built on first use, see sandhi_index
         self.load_data()
 
+    @classmethod
+    def from_grid(cls, grid, file_path=None, sheet_name=None):
+        """
+        Builds a Chakra around an already loaded 27x27 grid, e.g. one shared
+        with a worker process, without reading the Excel file.
+        """
+        chakra = cls.__new__(cls)
+        chakra.file_path = file_path
+        chakra.sheet_name = sheet_name
+        chakra.grid = grid
+        chakra.ray_index = RayIndex(grid)
+        chakra.akshara_tables = {}
+        chakra.akshara_matrix = {}
+        chakra.akshara_lookup = {}
+        chakra._sandhi_index = None
+        chakra.build_akshara_tables()
+        return chakra
+
     def load_data(self):
         """
         Loads the 27x27 grid from the Excel file.
@@ -46,10 +71,60 @@ class Chakra:
             
             if self.grid.shape != (27, 27):
                 raise ValueError(f"Extracted grid has incorrect shape: {self.grid.shape}. Expected (27, 27).")
+
+            self.ray_index = RayIndex(self.grid)
+            self._sandhi_index = None
+            self.build_akshara_tables()
                 
         except Exception as e:
             print(f"Error loading Chakra data: {e}")
             self.grid = None
+            self.ray_index = None
+            self.akshara_tables = {}
+            self.akshara_matrix = {}
+            self.akshara_lookup = {}
+
+    @property
+    def sandhi_index(self):
+        """
+        Sandhi-normalized lines of the grid (see src.ray_index.SandhiRayIndex),
+        built on the first Sandhi search rather than at load time.
+        """
+        if self._sandhi_index is None and self.ray_index is not None:
+            self._sandhi_index = SandhiRayIndex(self.ray_index)
+        return self._sandhi_index
+
+    def build_akshara_tables(self):
+        """
+        Precomputes the Akshara for every grid number in each of INDIAN_LANGUAGES,
+        and the resulting 27x27 Akshara matrix per script, so that cell lookups
+        need no transliteration at request time.
+        """
+        self.akshara_tables = {
+            script: [''] + [transliterate_text(AKSHARA_MAP[number], script) for number in range(1, 65)]
+            for script in INDIAN_LANGUAGES
+        }
+        self.akshara_matrix = {
+            script: [[table[number] if 1 <= number <= 64 else "?" for number in row]
+                     for row in self.grid.tolist()]
+            for script, table in self.akshara_tables.items()
+        }
+        self.akshara_lookup = {
+            script: np.array(["?"] + table[1:], dtype=object)
+            for script, table in self.akshara_tables.items()
+        }
+
+    def decode_numbers(self, numbers, script="kannada"):
+        """
+        Returns the text spelled by an array of grid numbers in one gather,
+        with "?" for numbers outside 1-64.
+        """
+        numbers = np.asarray(numbers)
+        numbers = np.where((numbers >= 1) & (numbers <= 64), numbers, 0)
+        lookup = self.akshara_lookup.get(script)
+        if lookup is None:
+            return ''.join(transliterate_text(AKSHARA_MAP[n], script) if n else "?" for n in numbers.tolist())
+        return ''.join(lookup[numbers])
 
     def get_akshara_at(self, row, col, script="kannada"):
         """
@@ -68,6 +143,9 @@ class Chakra:
         if 1 <= number <= 64:
              # AKSHARA_MAP is in Devanagari
              devanagari = AKSHARA_MAP[number]
+             table = self.akshara_tables.get(script)
+             if table is not None:
+                 return table[number], devanagari
              return transliterate_text(devanagari, script), devanagari
         return "?"
 
@@ -0,0 +1,100 @@
+"""
+Compact wire format for search responses.
+
+The regular format repeats every field in every match and sends paths as
+[[row, col], ...]. The compact format:
+
+- hoists fields with the same value in every match into a shared header,
+- sends the remaining fields as one array per match, in the order given
+  by 'fields',
+- encodes paths with Path.to_wire: a straight line as [start_cell,
+  direction, length] and any other path as {"c": [cell, ...]}, where cells
+  are flat indices row * 27 + col and direction indexes src.path.DIRECTIONS.
+
+It can be serialised as UTF-8 JSON (no \\u escapes) or, if msgpack is
+installed, as msgpack, and optionally gzip-compressed.
+"""
+import gzip
+import json
+
+from src.path import Path
+
+try:
+    import msgpack
+except ImportError:  # msgpack responses are optional
+    msgpack = None
+
+COMPACT_FORMAT = 'compact-v1'
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+# Bodies smaller than this are not worth gzipping
+GZIP_MIN_BYTES = 1024
+
+
+def _plain(value):
+    return value.to_list() if isinstance(value, Path) else value
+
+
+def encode_matches(matches, **extra):
+    """
+    Builds the compact representation of a list of match dictionaries.
+    Extra keyword arguments (e.g. variants_searched) are added to the body.
+    """
+    fields = []
+    for match in matches:
+        for key in match:
+            if key not in fields:
+                fields.append(key)
+
+    header = {}
+    if matches:
+        for key in list(fields):
+            if key == 'path':
+                continue
+            first = matches[0].get(key)
+            if all(key in match and match[key] == first for match in matches):
+                header[key] = _plain(first)
+                fields.remove(key)
+
+    rows = [[Path.from_points(match[key]).to_wire() if key == 'path' else _plain(match.get(key)) for key in fields]
+            for match in matches]
+    body = {'format': COMPACT_FORMAT, 'count': len(matches), 'header': header, 'fields': fields, 'matches': rows}
+    body.update(extra)
+    return body
+
+
+def decode_matches(body):
+    """Expands a compact body back into a list of match dictionaries."""
+    fields = body['fields']
+    matches = []
+    for row in body['matches']:
+        match = dict(body['header'])
+        for key, value in zip(fields, row):
+            match[key] = Path.from_wire(value) if key == 'path' else value
+        matches.append(match)
+    return matches
+
+
+def wants_msgpack(accept_header):
+    return msgpack is not None and MSGPACK_MIMETYPE in (accept_header or '')
+
+
+def wants_gzip(accept_encoding_header):
+    return 'gzip' in (accept_encoding_header or '')
+
+
+def serialize(body, use_msgpack=False, use_gzip=False):
+    """
+    Serialises a response body. Returns (bytes, mimetype, content_encoding),
+    where content_encoding is 'gzip' or None.
+    """
+    if use_msgpack and msgpack is not None:
+        data = msgpack.packb(body, default=_plain, use_bin_type=True)
+        mimetype = MSGPACK_MIMETYPE
+    else:
+        data = json.dumps(body, ensure_ascii=False, separators=(',', ':'), default=_plain).encode('utf-8')
+        mimetype = JSON_MIMETYPE
+    if use_gzip and len(data) >= GZIP_MIN_BYTES:
+        return gzip.compress(data, compresslevel=5), mimetype, 'gzip'
+    return data, mimetype, None
@@ -0,0 +1,267 @@
+"""
+Compiled y = f(x) formulas for functional Bandhas.
+
+A formula is parsed once into a validated AST and compiled into a numpy
+evaluator that computes all 27 x values in one call. Names other than x and
+the math module's are parameters, so a family such as a*x+b can be evaluated
+over a whole grid of (a, b) values in a single vectorised pass.
+"""
+import ast
+import inspect
+import itertools
+import math
+from functools import lru_cache
+
+import numpy as np
+
+GRID_SIZE = 27
+X_VALUES = np.arange(GRID_SIZE, dtype=np.float64)
+X_VALUES.flags.writeable = False
+
+# Names available to formulas, as in the original eval-based implementation
+MATH_NAMES = {k: v for k, v in math.__dict__.items() if not k.startswith("__")}
+
+# math functions with an equivalent numpy ufunc
+NUMPY_FUNCTIONS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan, 'atan2': np.arctan2,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'asinh': np.arcsinh, 'acosh': np.arccosh, 'atanh': np.arctanh,
+    'exp': np.exp, 'expm1': np.expm1, 'log10': np.log10, 'log2': np.log2, 'log1p': np.log1p,
+    'sqrt': np.sqrt, 'fabs': np.fabs, 'floor': np.floor, 'ceil': np.ceil, 'trunc': np.trunc,
+    'pow': np.power, 'hypot': np.hypot, 'degrees': np.degrees, 'radians': np.radians,
+    'copysign': np.copysign, 'fmod': np.fmod,
+}
+
+_BINARY_OPS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide, ast.Mod: np.remainder, ast.Pow: np.power,
+}
+_UNARY_OPS = {ast.USub: np.negative, ast.UAdd: np.positive}
+
+# Allowed in formulas, but only evaluated one x at a time
+_SCALAR_ONLY_NODES = (
+    ast.Compare, ast.BoolOp, ast.IfExp, ast.Not, ast.And, ast.Or,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    # Bitwise operators need Python integers, as the original eval gave them
+    ast.Invert, ast.BitAnd, ast.BitOr, ast.BitXor, ast.LShift, ast.RShift,
+)
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Constant, ast.Name, ast.Load, ast.Call,
+) + tuple(_BINARY_OPS) + tuple(_UNARY_OPS) + _SCALAR_ONLY_NODES
+
+# Beyond this, float64 no longer holds every integer exactly, so results are
+# recomputed with Python's exact integer arithmetic
+_EXACT_LIMIT = 2.0 ** 53
+
+
+class FormulaError(ValueError):
+    """Raised for formulas that cannot be parsed, use disallowed syntax or lack parameter values."""
+
+
+def _check_arguments(name, count):
+    """Raises FormulaError unless math function `name` accepts `count` positional arguments."""
+    if name == 'log':
+        accepted = count in (1, 2)
+    elif name == 'hypot':
+        accepted = True  # any number of coordinates
+    else:
+        try:
+            inspect.signature(MATH_NAMES[name]).bind(*range(count))
+            accepted = True
+        except TypeError:
+            accepted = False
+    if not accepted:
+        raise FormulaError(f"Wrong number of arguments to {name}(): {count}")
+
+
+def normalize_formula(formula_str):
+    """Applies the '^' -> '**' power shorthand and collapses whitespace."""
+    return ' '.join(formula_str.replace('^', '**').split())
+
+
+class CompiledFormula:
+    """
+    A validated, compiled y = f(x) formula.
+
+    Attributes:
+        text: Normalized formula text
+        params: Sorted names of the formula's free parameters
+        vectorized: Whether the numpy evaluator covers the whole formula;
+            otherwise every x is evaluated with Python's eval
+    """
+
+    def __init__(self, text):
+        self.text = text
+        try:
+            self._tree = ast.parse(text, mode='eval')
+        except SyntaxError as e:
+            raise FormulaError(f"Invalid formula '{text}': {e.msg}") from None
+
+        params = set()
+        self.vectorized = True
+        for node in ast.walk(self._tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise FormulaError(f"Unsupported syntax in formula: {type(node).__name__}")
+            if isinstance(node, _SCALAR_ONLY_NODES):
+                self.vectorized = False
+            elif isinstance(node, ast.Constant):
+                if isinstance(node.value, complex) or not isinstance(node.value, (int, float)):
+                    raise FormulaError(f"Unsupported constant in formula: {node.value!r}")
+            elif isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or not callable(MATH_NAMES.get(node.func.id)) or node.keywords:
+                    raise FormulaError("Formulas may only call math functions by name")
+                _check_arguments(node.func.id, len(node.args))
+                # Only calls with the ufunc's own arity are vectorised; extra
+                # arguments to a ufunc would be taken as its output buffers
+                ufunc = NUMPY_FUNCTIONS.get(node.func.id)
+                if node.func.id != 'log' and (ufunc is None or len(node.args) != ufunc.nin):
+                    self.vectorized = False
+            elif isinstance(node, ast.Name) and node.id != 'x' and node.id not in MATH_NAMES:
+                params.add(node.id)
+        self.params = sorted(params)
+        self._code = compile(self._tree, '<formula>', 'eval')
+
+    def evaluate_scalar(self, x, params=None):
+        """Evaluates the formula for one x with Python semantics. Returns None on any error."""
+        context = dict(MATH_NAMES)
+        if params:
+            context.update(params)
+        context['x'] = x
+        try:
+            return eval(self._code, {"__builtins__": None}, context)
+        except Exception:
+            return None
+
+    def evaluate(self, params=None):
+        """
+        Evaluates y for x = 0..26.
+
+        Args:
+            params: Dict of parameter name -> value, or -> 1-D array of values
+                (all of the same length P) to evaluate P family members at once
+
+        Returns:
+            float64 array of shape (27,), or (P, 27) when parameter arrays are
+            given, with NaN wherever the formula has no real value
+        """
+        params = params or {}
+        missing = [name for name in self.params if name not in params]
+        if missing:
+            raise FormulaError(f"Missing values for parameters: {', '.join(missing)}")
+
+        originals = {name: np.asarray(params[name]) for name in self.params}
+        columns = {name: values.astype(np.float64) for name, values in originals.items()}
+        batched = any(values.ndim > 0 for values in columns.values())
+        count = max((values.size for values in columns.values() if values.ndim > 0), default=1)
+        env = {name: (values.reshape(-1, 1) if values.ndim > 0 else values) for name, values in columns.items()}
+        env['x'] = X_VALUES
+        shape = (count, GRID_SIZE)
+
+        if self.vectorized:
+            try:
+                with np.errstate(all='ignore'):
+                    values, inexact = self._evaluate_node(self._tree.body, env)
+            except (TypeError, ValueError) as e:
+                raise FormulaError(f"Cannot evaluate formula '{self.text}': {e}") from None
+            values = np.broadcast_to(values, shape).astype(np.float64)
+            inexact = np.broadcast_to(inexact, shape)
+        else:
+            values = np.full(shape, np.nan)
+            inexact = np.ones(shape, dtype=bool)
+
+        # Recompute with Python's exact semantics wherever float64 could differ
+        for p, i in zip(*np.nonzero(inexact)):
+            member = {name: (col.flat[p] if col.ndim > 0 else col).item() for name, col in originals.items()}
+            values[p, i] = self._to_real(self.evaluate_scalar(int(i), member))
+
+        return values if batched else values[0]
+
+    def evaluate_grid(self, param_ranges):
+        """
+        Evaluates every combination of parameter values in one pass.
+
+        Args:
+            param_ranges: Dict of parameter name -> iterable of values
+
+        Returns:
+            (combinations, values): list of parameter dicts, and a float64
+            array of shape (len(combinations), 27)
+        """
+        names = self.params
+        missing = [name for name in names if name not in param_ranges]
+        if missing:
+            raise FormulaError(f"Missing ranges for parameters: {', '.join(missing)}")
+        combinations = [dict(zip(names, combo)) for combo in itertools.product(*(list(param_ranges[n]) for n in names))]
+        if not names:
+            return combinations, self.evaluate().reshape(1, -1)
+        columns = {name: np.array([combo[name] for combo in combinations]) for name in names}
+        return combinations, self.evaluate(columns)
+
+    def path(self, params=None):
+        """Returns the (row, col) points of y = f(x) that fall inside the grid."""
+        return rows_to_path(values_to_rows(self.evaluate(params)))
+
+    @staticmethod
+    def _to_real(value):
+        # None (an error) and complex results have no grid row
+        if not isinstance(value, (int, float)):
+            return np.nan
+        try:
+            return float(value)
+        except OverflowError:
+            return np.nan
+
+    def _evaluate_node(self, node, env):
+        """Returns (values, inexact) for a vectorisable node."""
+        if isinstance(node, ast.Constant):
+            value = np.float64(node.value) if abs(node.value) <= 1e308 else np.float64(np.inf)
+            return value, abs(node.value) > _EXACT_LIMIT
+        if isinstance(node, ast.Name):
+            if node.id in env:
+                return env[node.id], False
+            return np.float64(MATH_NAMES[node.id]), False
+        if isinstance(node, ast.UnaryOp):
+            operand, inexact = self._evaluate_node(node.operand, env)
+            return _UNARY_OPS[type(node.op)](operand), inexact
+        if isinstance(node, ast.BinOp):
+            left, left_inexact = self._evaluate_node(node.left, env)
+            right, right_inexact = self._evaluate_node(node.right, env)
+            result = _BINARY_OPS[type(node.op)](left, right)
+            return result, left_inexact | right_inexact | ~(np.abs(result) <= _EXACT_LIMIT)
+        if isinstance(node, ast.Call):
+            args = [self._evaluate_node(arg, env) for arg in node.args]
+            inexact = False
+            for _, arg_inexact in args:
+                inexact = inexact | arg_inexact
+            values = [value for value, _ in args]
+            if node.func.id == 'log':
+                result = np.log(values[0]) if len(values) == 1 else np.log(values[0]) / np.log(values[1])
+            else:
+                result = NUMPY_FUNCTIONS[node.func.id](*values)
+            # Domain errors (NaN/inf) are re-checked with math, which raises instead
+            return result, inexact | ~np.isfinite(result)
+        raise FormulaError(f"Cannot vectorise {type(node).__name__}")
+
+
+def values_to_rows(values):
+    """Rounds y values half-to-even like round(); cells outside 0..26 (or NaN) become -1."""
+    with np.errstate(invalid='ignore'):
+        rows = np.rint(values)
+        valid = np.isfinite(rows) & (rows >= 0) & (rows < GRID_SIZE)
+    return np.where(valid, rows, -1).astype(np.int16)
+
+
+def rows_to_path(rows):
+    """Converts one row of values_to_rows output to a list of (row, col) points."""
+    return [(int(y), int(x)) for x, y in enumerate(rows.tolist()) if y >= 0]
+
+
+@lru_cache(maxsize=512)
+def _compile_normalized(text):
+    return CompiledFormula(text)
+
+
+def compile_formula(formula_str):
+    """Returns the CompiledFormula for `formula_str`, cached by its normalized text."""
+    return _compile_normalized(normalize_formula(formula_str))
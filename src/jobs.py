@@ -0,0 +1,325 @@
+"""
+Background jobs for long-running searches.
+
+Exhaustive searches (every variant of every pattern type) take far longer
+than an interactive request should hold one of the few web workers. A
+JobQueue runs them in the background instead: a job's thread only
+coordinates, while every search it makes, the knight-move search included,
+runs in the worker processes of a src.parallel.PatternSearchExecutor. Each
+job (status, progress, result) is recorded in SQLite, so any web worker
+can answer polls for it. Submitting a search identical to one that is still
+queued or running returns the existing job instead of starting another.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from src.move_search import check_max_distance
+from src.path import Path
+
+PATTERN_TYPES = ['horizontal_zigzag', 'vertical_zigzag', 'chess_knight', 'shreni_bandha']
+MEASURES = ['exact', 'hamming', 'levenshtein']
+IN_FLIGHT_STATUSES = ('queued', 'running')
+INTERRUPTED_ERROR = 'Interrupted: the server process running the job stopped'
+
+# Workers write progress to the database at most this often
+PROGRESS_INTERVAL_SECONDS = 0.5
+
+
+class JobError(ValueError):
+    """Raised for job submissions with an unknown kind or invalid parameters."""
+
+
+def _json_default(value):
+    if isinstance(value, Path):
+        return value.to_list()
+    if hasattr(value, 'item'):  # numpy scalars
+        return value.item()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """SQLite table of search jobs, shared by the web workers and the job processes."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def init_db(self):
+        """Create the jobs table if it does not exist."""
+        conn = self.connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    params_key TEXT NOT NULL,
+                    status TEXT NOT NULL CHECK(status IN ('queued', 'running', 'done', 'failed')),
+                    progress REAL NOT NULL DEFAULT 0,
+                    result TEXT,
+                    result_count INTEGER,
+                    error TEXT,
+                    owner_pid INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS search_jobs_params_key ON search_jobs (params_key, status)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def create_or_get(self, kind, params, params_key, owner_pid):
+        """
+        Returns (job_id, created). An in-flight job with the same params_key is
+        returned instead of creating a new one, unless the process running it
+        has died, in which case that job is marked failed.
+        """
+        conn = self.connect()
+        try:
+            # Take the write lock before looking, so two web workers cannot both create the job
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            rows = conn.execute(
+                "SELECT id, owner_pid FROM search_jobs WHERE params_key = ? AND status IN (?, ?) ORDER BY created_at",
+                (params_key,) + IN_FLIGHT_STATUSES,
+            ).fetchall()
+            for row in rows:
+                if _process_alive(row['owner_pid']):
+                    conn.commit()
+                    return row['id'], False
+                conn.execute(
+                    "UPDATE search_jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                    (INTERRUPTED_ERROR, now, row['id']),
+                )
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO search_jobs (id, kind, params, params_key, status, owner_pid, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), params_key, owner_pid, now, now),
+            )
+            conn.commit()
+            return job_id, True
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        """Returns the job's status as a dict (without its result), or None."""
+        conn = self.connect()
+        try:
+            row = conn.execute(
+                "SELECT id, kind, params, status, progress, result_count, error, owner_pid, created_at, updated_at "
+                "FROM search_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        if job['status'] in IN_FLIGHT_STATUSES and not _process_alive(job.pop('owner_pid')):
+            self.fail(job_id, INTERRUPTED_ERROR)
+            return self.get(job_id)
+        job.pop('owner_pid', None)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def result(self, job_id):
+        """Returns the matches of a finished job, or None."""
+        conn = self.connect()
+        try:
+            row = conn.execute("SELECT result FROM search_jobs WHERE id = ? AND status = 'done'", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return None if row is None else json.loads(row['result'])
+
+    def _update(self, job_id, assignments, values):
+        conn = self.connect()
+        try:
+            conn.execute(f"UPDATE search_jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                         (*values, time.time(), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def mark_running(self, job_id):
+        self._update(job_id, "status = 'running'", ())
+
+    def set_progress(self, job_id, progress):
+        self._update(job_id, "progress = ?", (progress,))
+
+    def finish(self, job_id, results):
+        encoded = json.dumps(results, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+        self._update(job_id, "status = 'done', progress = 1, result = ?, result_count = ?", (encoded, len(results)))
+
+    def fail(self, job_id, error):
+        self._update(job_id, "status = 'failed', error = ?", (error,))
+
+    def purge(self, older_than_seconds):
+        """Deletes finished jobs last updated more than `older_than_seconds` ago. Returns how many."""
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "DELETE FROM search_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than_seconds,),
+            )
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
+def normalize_job_params(kind, data):
+    """Returns the parameters of a job of `kind` from request JSON. Raises JobError if they are invalid."""
+    if kind not in JOB_KINDS:
+        raise JobError(f"kind must be one of: {', '.join(JOB_KINDS)}")
+    target = data.get('target', '')
+    if not isinstance(target, str) or not target:
+        raise JobError("target is required")
+    measure = data.get('measure', 'exact')
+    if measure not in MEASURES:
+        raise JobError(f"measure must be one of: {', '.join(MEASURES)}")
+    try:
+        max_distance = int(data.get('max_distance', 0))
+    except (ValueError, TypeError):
+        max_distance = 0
+    pattern_types = data.get('pattern_types') or PATTERN_TYPES
+    if not isinstance(pattern_types, list) or any(t not in PATTERN_TYPES for t in pattern_types):
+        raise JobError(f"pattern_types must be a list of: {', '.join(PATTERN_TYPES)}")
+    script = data.get('script', 'kannada')
+    use_sandhi = bool(data.get('use_sandhi', False))
+    if 'chess_knight' in pattern_types and not use_sandhi:
+        # Knight paths are searched exhaustively, which a large max_distance makes explode
+        try:
+            check_max_distance(target, measure, max_distance, script)
+        except ValueError as e:
+            raise JobError(f"chess_knight: {e}") from None
+    return {
+        'target': target,
+        'pattern_types': pattern_types,
+        'measure': measure,
+        'max_distance': max_distance,
+        'script': script,
+        'use_sandhi': use_sandhi,
+    }
+
+
+def job_key(kind, params, chakra):
+    """Fingerprint under which identical in-flight jobs on the same grid are deduplicated."""
+    encoded = json.dumps([kind, params], sort_keys=True, ensure_ascii=False).encode('utf-8')
+    grid = np.ascontiguousarray(chakra.grid)
+    return hashlib.sha256(encoded + grid.tobytes()).hexdigest()
+
+
+def _run_all_pattern_variants(chakra, params, executor, report):
+    """Every variant of each pattern type, sorted as the UI's "try all patterns" expects."""
+    from src.search import PatternSearchPlan
+
+    plan = PatternSearchPlan(chakra, params['target'], params['measure'], params['max_distance'],
+                             params['script'], params['use_sandhi'])
+    variant_lists = [(pattern_type, list(plan.variants(pattern_type))) for pattern_type in params['pattern_types']]
+    total = sum(len(variants) for _, variants in variant_lists) or 1
+    done = 0
+    results = []
+    for pattern_type, variants in variant_lists:
+        if pattern_type == 'chess_knight' and not params['use_sandhi']:
+            # Exhaustive and faster than the sampled variants
+            results.extend(executor.search_knight_paths(chakra, params['target'], params['measure'],
+                                                        params['max_distance'], params['script']))
+            done += len(variants)
+            report(done / total)
+            continue
+        results.extend(executor.search_variants(
+            chakra, params['target'], pattern_type, variants, params['measure'], params['max_distance'],
+            params['script'], params['use_sandhi'],
+            progress=lambda fraction: report((done + fraction * len(variants)) / total),
+        ))
+        done += len(variants)
+    results.sort(key=lambda x: (x['distance'], len(x['path']),
+                                x['pattern_params']['start_row'],
+                                x['pattern_params']['start_col']))
+    return results
+
+
+# kind -> function(chakra, params, executor, report) returning the list of matches
+JOB_KINDS = {
+    'all_pattern_variants': _run_all_pattern_variants,
+}
+
+
+class JobQueue:
+    """
+    Runs submitted jobs, up to `max_jobs` at a time. A job's thread only
+    coordinates: the searching itself is sharded across the worker processes
+    of `executor` (a src.parallel.PatternSearchExecutor), so it does not
+    compete with request handling for the web process's interpreter.
+
+    Jobs left in flight by a web process that has since died are marked
+    failed when they are next looked up or resubmitted.
+    """
+
+    def __init__(self, store, executor, max_jobs=2):
+        self.store = store
+        self.executor = executor
+        self._threads = ThreadPoolExecutor(max_jobs, thread_name_prefix='search-job')
+        store.init_db()
+
+    def submit(self, kind, data, chakra):
+        """
+        Queues a job of `kind` with parameters from request JSON `data`.
+        Returns (job, created), where job is the status dict of the new job or of
+        an identical one already in flight. Raises JobError for invalid input.
+        """
+        params = normalize_job_params(kind, data)
+        if chakra.grid is None:
+            raise JobError("No chakra grid is loaded")
+        job_id, created = self.store.create_or_get(kind, params, job_key(kind, params, chakra), os.getpid())
+        if created:
+            self._threads.submit(self._run, job_id, kind, params, chakra)
+        return self.store.get(job_id), created
+
+    def _run(self, job_id, kind, params, chakra):
+        """Runs one job, recording progress and the outcome in the store."""
+        self.store.mark_running(job_id)
+        last_report = time.monotonic()
+
+        def report(progress):
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                last_report = now
+                self.store.set_progress(job_id, progress)
+
+        try:
+            results = JOB_KINDS[kind](chakra, params, self.executor, report)
+        except Exception as e:
+            self.store.fail(job_id, f"{type(e).__name__}: {e}")
+            return
+        self.store.finish(job_id, results)
+
+    def shutdown(self, wait=True):
+        self._threads.shutdown(wait=wait, cancel_futures=True)
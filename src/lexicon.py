@@ -0,0 +1,260 @@
+"""
+Offline dictionary matching over every ray and bandha output of a Chakra.
+
+All words of a lexicon file (one word per line; anything after a tab is
+ignored) are compiled into one src.multi_search automaton, and every
+straight ray and every horizontal_zigzag, vertical_zigzag and shreni_bandha
+output is streamed through it once. The work is split into shards (one ray
+direction, or one start row of a bandha) that run on all cores, and the hits
+of each shard are written to an SQLite hit table in the same transaction
+that marks the shard done, so an interrupted run resumes where it stopped:
+
+    python -m src.lexicon words.txt --out hits.db --sheet Chakra1-1-1
+
+The hit table has one row per (word, pattern, params, cells); a path found
+by several bandhas is listed under each of them.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from src.multi_search import SOURCES, UNITS, MultiTargetSearch, target_symbols
+from src.search import pattern_params_key
+
+_worker_state = {}  # in each worker process: 'chakra' and 'searcher'
+
+
+class LexiconError(ValueError):
+    """Raised when a hit table belongs to a different lexicon, grid or unit."""
+
+
+def read_lexicon(path):
+    """Returns the distinct words of a lexicon file, in file order."""
+    words = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word = line.split('\t', 1)[0].strip()
+            if word:
+                words.append(word)
+    return list(dict.fromkeys(words))
+
+
+def lexicon_shards(sources=SOURCES):
+    """The (source, part) pieces a run is split into: ray directions and bandha start rows."""
+    shards = []
+    for source in sources:
+        parts = range(8) if source == 'rays' else range(27)
+        shards.extend((source, part) for part in parts)
+    return shards
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class HitTable:
+    """
+    The SQLite file a lexicon run writes to: its hits, the shards already
+    done, and the lexicon, grid and unit the run was started with.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS shards (
+                source TEXT NOT NULL,
+                part INTEGER NOT NULL,
+                hits INTEGER NOT NULL,
+                PRIMARY KEY (source, part)
+            );
+            CREATE TABLE IF NOT EXISTS hits (
+                word TEXT NOT NULL,
+                pattern TEXT NOT NULL,
+                params TEXT NOT NULL,
+                cells TEXT NOT NULL,
+                PRIMARY KEY (word, pattern, params, cells)
+            );
+            """
+        )
+
+    def start(self, run, fresh=False):
+        """
+        Records the run's description, or checks it against the one stored.
+        With fresh=True, earlier hits are discarded instead.
+        """
+        with self.conn:
+            stored = dict(self.conn.execute("SELECT key, value FROM meta"))
+            if fresh or not stored:
+                self.conn.execute("DELETE FROM meta")
+                self.conn.execute("DELETE FROM shards")
+                self.conn.execute("DELETE FROM hits")
+                self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", run.items())
+            elif stored != run:
+                changed = ', '.join(sorted(key for key in run if stored.get(key) != run[key]))
+                raise LexiconError(f"{self.db_path} holds a run with a different {changed}; use --fresh to start over")
+
+    def done_shards(self):
+        return {(source, part) for source, part in self.conn.execute("SELECT source, part FROM shards")}
+
+    def record(self, shard, rows):
+        """Stores a shard's hits and marks it done, atomically."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO hits (word, pattern, params, cells) VALUES (?, ?, ?, ?)", rows
+            )
+            self.conn.execute("INSERT OR REPLACE INTO shards (source, part, hits) VALUES (?, ?, ?)",
+                              (shard[0], shard[1], len(rows)))
+
+    def hit_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM hits").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def _init_worker(words, grid, unit):
+    from src.chakra import Chakra
+
+    _worker_state['chakra'] = Chakra.from_grid(np.asarray(grid))
+    _worker_state['searcher'] = MultiTargetSearch(words, unit)
+
+
+def _match_shard(source, part):
+    """Returns the hit rows of one shard, searched with the worker's automaton."""
+    chakra = _worker_state['chakra']
+    searcher = _worker_state['searcher']
+    rows = []
+    for target_id, path, params in searcher.iter_source(chakra, source, part):
+        if params is None:
+            start_row, start_col, direction_index, _ = path.ray()
+            params = {'start_row': start_row, 'start_col': start_col, 'direction': direction_index}
+        rows.append((searcher.targets[target_id], source, pattern_params_key(params),
+                     json.dumps(path.to_list())))
+    return rows
+
+
+def match_lexicon(lexicon_path, chakra, db_path, sources=SOURCES, unit='codes', workers=None, fresh=False,
+                  progress=None):
+    """
+    Matches every word of the lexicon file against the Chakra and writes the
+    hits to the SQLite file at db_path, skipping shards an earlier run with
+    the same lexicon, grid and unit already finished.
+
+    Args:
+        workers: Worker processes (default: one per core); 0 runs every
+            shard in the calling process
+        fresh: Discard the hits of an earlier run instead of resuming it
+        progress: Optional callback, called with (shards done, shard count)
+
+    Returns:
+        Summary dict with the word, invalid word, shard and hit counts
+    """
+    unknown = [source for source in sources if source not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown sources: {', '.join(unknown)}; expected {', '.join(SOURCES)}")
+    if unit not in UNITS:
+        raise ValueError(f"unit must be one of {', '.join(UNITS)}")
+    if chakra.grid is None:
+        raise ValueError("The Chakra has no grid loaded")
+
+    words = read_lexicon(lexicon_path)
+    grid = np.ascontiguousarray(chakra.grid)
+    run = {
+        'lexicon': _file_digest(lexicon_path),
+        'grid': hashlib.sha256(grid.tobytes()).hexdigest(),
+        'unit': unit,
+    }
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    table = HitTable(db_path)
+    try:
+        table.start(run, fresh)
+        shards = lexicon_shards(sources)
+        done = table.done_shards()
+        pending = [shard for shard in shards if shard not in done]
+        finished = len(shards) - len(pending)
+        if progress:
+            progress(finished, len(shards))
+
+        if workers == 0:
+            _init_worker(words, grid, unit)
+            try:
+                for shard in pending:
+                    table.record(shard, _match_shard(*shard))
+                    finished += 1
+                    if progress:
+                        progress(finished, len(shards))
+            finally:
+                _worker_state.clear()
+        elif pending:
+            with ProcessPoolExecutor(min(workers, len(pending)), mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(words, grid, unit)) as pool:
+                try:
+                    futures = {pool.submit(_match_shard, *shard): shard for shard in pending}
+                    for future in as_completed(futures):
+                        table.record(futures[future], future.result())
+                        finished += 1
+                        if progress:
+                            progress(finished, len(shards))
+                except BaseException:
+                    # e.g. Ctrl-C: keep the finished shards, drop the queued ones
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    raise
+
+        invalid = sum(1 for word in words if not target_symbols(word, unit))
+        return {'words': len(words), 'invalid_words': invalid, 'shards': len(shards),
+                'resumed_shards': len(done & set(shards)), 'hits': table.hit_count()}
+    finally:
+        table.close()
+
+
+def main(argv=None):
+    from src.chakra import Chakra
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('lexicon', help="Word file, one word per line (Kannada or Devanagari)")
+    parser.add_argument('--out', required=True, help="SQLite hit table to write (resumed if it exists)")
+    parser.add_argument('--excel', default=os.path.join(base_dir, 'Adhyaya_One_Chakras.xlsx'))
+    parser.add_argument('--sheet', default='Chakra1-1-1')
+    parser.add_argument('--sources', nargs='+', default=list(SOURCES), choices=SOURCES)
+    parser.add_argument('--unit', default='codes', choices=UNITS)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument('--fresh', action='store_true', help="Discard an earlier run in --out")
+    args = parser.parse_args(argv)
+
+    chakra = Chakra(args.excel, sheet_name=args.sheet)
+    started = time.time()
+
+    def report(done, total):
+        print(f"{done}/{total} shards ({time.time() - started:.1f}s)", flush=True)
+
+    try:
+        summary = match_lexicon(args.lexicon, chakra, args.out, args.sources, args.unit, args.workers,
+                                args.fresh, report)
+    except LexiconError as e:
+        parser.error(str(e))
+    print(f"{summary['hits']} hits for {summary['words']} words "
+          f"({summary['invalid_words']} not spelled with grid aksharas) in {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""
+Exhaustive searches along move graphs of the 27x27 grid.
+
+A move graph joins every cell to the cells one step away under a step set:
+knight or king moves, any list of (dr, dc) steps, optionally folding over
+the edges as Shreni Bandha does. Bandha.chess_knight_moves picks each jump
+at random, so sampling one path per start cell may never find a knight path
+that spells the target; here every simple path (no cell visited twice) of
+the move graph is searched depth-first from every start cell, with the
+visited cells held in an int bitmask.
+
+The search is driven by a dynamic program over (cell, target index): a
+table of the fewest edits any walk starting at that cell can still need to
+spell the rest of the target. Only moves onto cells whose entry fits in the
+edits left are taken, so the search follows the frontier of partial matches
+instead of enumerating paths:
+
+- exact and hamming: the table counts mismatches of equal-length texts;
+- levenshtein: one DP row is carried per path and extended character by
+  character, and a move is taken only if some split of the target between
+  the row and the table stays within max_distance.
+
+Results are generated in a fixed order (start cell, then move order), so
+the search is deterministic. The work still grows steeply with max_distance,
+so max_distance is capped relative to the target's length (check_max_distance)
+and a search that visits more than max_nodes partial paths is abandoned with
+SearchBudgetError, which carries the matches found until then.
+"""
+import heapq
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.path import Path
+from src.transliterate import AKSHARA_MAP, transliterate_text
+
+GRID_SIZE = 27
+CELL_COUNT = GRID_SIZE * GRID_SIZE
+
+# Same order as Bandha.chess_knight_moves
+KNIGHT_MOVES = [
+    (-2, -1), (-2, 1), (-1, -2), (-1, 2),
+    (1, -2), (1, 2), (2, -1), (2, 1)
+]
+
+KING_MOVES = [
+    (-1, -1), (-1, 0), (-1, 1), (0, -1),
+    (0, 1), (1, -1), (1, 0), (1, 1)
+]
+
+# Named step sets accepted wherever moves are given
+STEP_SETS = {
+    'knight': KNIGHT_MOVES,
+    'king': KING_MOVES,
+    'orthogonal': [(-1, 0), (0, -1), (0, 1), (1, 0)],
+    'diagonal': [(-1, -1), (-1, 1), (1, -1), (1, 1)],
+    # Shreni Bandha's diagonals; use with fold=True
+    'shreni': [(-1, 1), (1, -1)],
+}
+
+_INF = float('inf')
+
+# Largest max_distance accepted for any target; each step multiplies the work
+MAX_MOVE_DISTANCE = 3
+
+# Partial paths a search may extend before it is abandoned (several seconds of work)
+MAX_SEARCH_NODES = 300_000
+
+
+class SearchBudgetError(ValueError):
+    """
+    Raised when a move-path search extends more partial paths than its
+    budget allows. search_move_paths sets `matches` to what it found before
+    stopping, ranked as its results would be; they are not all the matches.
+    """
+
+    def __init__(self, message, matches=()):
+        super().__init__(message)
+        self.matches = list(matches)
+
+
+def max_move_distance(target, script='kannada'):
+    """The largest max_distance accepted for `target`: half its Devanagari length, at most MAX_MOVE_DISTANCE."""
+    target_devanagari = transliterate_text(target, 'devanagari') if script == 'kannada' else target
+    return min(MAX_MOVE_DISTANCE, len(target_devanagari) // 2)
+
+
+def check_max_distance(target, measure, max_distance, script='kannada'):
+    """Raises ValueError if max_distance is too large for a move-path search of `target`."""
+    if measure == 'exact' or not target:
+        return
+    cap = max_move_distance(target, script)
+    if max_distance > cap:
+        raise ValueError(f"max_distance must be at most {cap} for this target "
+                         f"(half its length, at most {MAX_MOVE_DISTANCE})")
+
+
+class _NodeBudget:
+    """Counts the partial paths a search extends."""
+    __slots__ = ('remaining',)
+
+    def __init__(self, max_nodes):
+        self.remaining = max_nodes
+
+    def spend(self):
+        self.remaining -= 1
+        if self.remaining < 0:
+            raise SearchBudgetError("Search abandoned: too many candidate paths; "
+                                    "use a longer target or a smaller max_distance")
+
+
+def resolve_moves(moves) -> Tuple[Tuple[int, int], ...]:
+    """
+    Returns a step set as a tuple of (dr, dc) pairs. `moves` is a name from
+    STEP_SETS or a list of [dr, dc] pairs. Raises ValueError otherwise.
+    """
+    if isinstance(moves, str):
+        if moves not in STEP_SETS:
+            raise ValueError(f"Unknown step set '{moves}'; expected one of {', '.join(STEP_SETS)}")
+        moves = STEP_SETS[moves]
+    try:
+        steps = tuple((int(dr), int(dc)) for dr, dc in moves)
+    except (TypeError, ValueError):
+        raise ValueError("moves must be a step set name or a list of [dr, dc] pairs") from None
+    if not steps or any(step == (0, 0) or max(abs(step[0]), abs(step[1])) >= GRID_SIZE for step in steps):
+        raise ValueError(f"moves must be non-empty, non-zero steps smaller than the grid ({GRID_SIZE})")
+    return steps
+
+
+def move_neighbors(moves: Sequence[Tuple[int, int]], fold: bool = False) -> List[Tuple[int, ...]]:
+    """
+    For every flat cell index, the flat indices reachable in one move, in
+    move order. With fold=True a step off one edge re-enters at the opposite
+    edge (the folding of Bandha.shreni_bandha); otherwise it is dropped.
+    """
+    neighbors = []
+    for cell in range(CELL_COUNT):
+        r, c = divmod(cell, GRID_SIZE)
+        reachable = []
+        for dr, dc in moves:
+            nr, nc = r + dr, c + dc
+            if fold:
+                nr, nc = nr % GRID_SIZE, nc % GRID_SIZE
+            elif not (0 <= nr < GRID_SIZE and 0 <= nc < GRID_SIZE):
+                continue
+            nb = nr * GRID_SIZE + nc
+            if nb != cell and nb not in reachable:
+                reachable.append(nb)
+        neighbors.append(tuple(reachable))
+    return neighbors
+
+
+_neighbor_tables: Dict[Tuple[Tuple[Tuple[int, int], ...], bool], List[Tuple[int, ...]]] = {}
+
+
+def _neighbors_for(moves, fold=False):
+    key = (tuple(tuple(move) for move in moves), bool(fold))
+    if key not in _neighbor_tables:
+        _neighbor_tables[key] = move_neighbors(*key)
+    return _neighbor_tables[key]
+
+
+def _cell_texts(chakra):
+    """Devanagari akshara of every flat cell, or None for cells without one."""
+    return [AKSHARA_MAP[n] if 1 <= n <= 64 else None for n in chakra.grid.ravel().tolist()]
+
+
+def _mismatch_bounds(texts, neighbors, target, max_distance):
+    """
+    bounds[i][cell]: the fewest character mismatches with target[i:] of any
+    walk starting at `cell` whose text has exactly the length of target[i:],
+    ignoring repeated cells (so it never overestimates), or _INF.
+    """
+    n = len(target)
+    bounds = [[_INF] * CELL_COUNT for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        row = bounds[i]
+        for cell, text in enumerate(texts):
+            if text is None or i + len(text) > n:
+                continue
+            mismatches = sum(a != b for a, b in zip(text, target[i:i + len(text)]))
+            if mismatches > max_distance:
+                continue
+            end = i + len(text)
+            if end == n:
+                row[cell] = mismatches
+            else:
+                following = bounds[end]
+                rest = min((following[nb] for nb in neighbors[cell]), default=_INF)
+                if mismatches + rest <= max_distance:
+                    row[cell] = mismatches + rest
+    return bounds
+
+
+def _neighbor_array(neighbors):
+    """neighbors as an int array, padded with CELL_COUNT (an extra column holding the cap)."""
+    width = max(1, max(len(cell_neighbors) for cell_neighbors in neighbors))
+    return np.array([cell_neighbors + (CELL_COUNT,) * (width - len(cell_neighbors)) for cell_neighbors in neighbors])
+
+
+def _edit_bounds(texts, neighbors, target, max_distance):
+    """
+    Returns, for every cell, a tuple whose entry j is a lower bound on the
+    edit distance between target[j:] and the text of any walk starting at
+    that cell, ignoring repeated cells, capped at max_distance + 1.
+    """
+    n = len(target)
+    cap = max_distance + 1
+    valid = np.array([text is not None for text in texts])
+    lengths = np.array([len(text) if text is not None else 0 for text in texts])
+    neighbor_array = _neighbor_array(neighbors)
+    distinct = sorted(set(text for text in texts if text is not None))
+    text_index = np.array([distinct.index(text) if text is not None else 0 for text in texts])
+
+    # Padded with a column of `cap` for the missing neighbors of edge cells
+    bounds = np.full((n + 1, CELL_COUNT + 1), cap)
+    # following[end][cell]: the best continuation after a cell that consumed target[:end]
+    following = np.full((n + 1, CELL_COUNT), cap)
+    for j in range(n, -1, -1):
+        # distances[m][k]: edit distance between distinct[k] and target[j:j + m]
+        distances = []
+        for text in distinct:
+            row = list(range(n - j + 1))
+            for ch in text:
+                new_row = [row[0] + 1]
+                for m in range(1, n - j + 1):
+                    new_row.append(min(new_row[m - 1] + 1, row[m] + 1, row[m - 1] + (target[j + m - 1] != ch)))
+                row = new_row
+            distances.append(row)
+        distances = np.array(distances).T[:, text_index]
+
+        # The cell consumes target[j:j + m], then the walk stops (deleting the rest) or moves on
+        best = distances[0] + (n - j)
+        for m in range(1, n - j + 1):
+            best = np.minimum(best, distances[m] + np.minimum(n - j - m, following[j + m]))
+        layer = np.where(valid, np.minimum(best, cap), cap)
+        # A cell may also consume none of the target, leaving target[j:] to the next cell
+        while True:
+            bounds[j, :CELL_COUNT] = layer
+            chained = np.where(valid, np.minimum(layer, lengths + bounds[j][neighbor_array].min(axis=1)), cap)
+            if np.array_equal(chained, layer):
+                break
+            layer = chained
+        following[j] = np.minimum(n - j, bounds[j][neighbor_array].min(axis=1))
+    return [tuple(column) for column in bounds[:, :CELL_COUNT].T.tolist()]
+
+
+def _equal_length_paths(start, texts, neighbors, target, max_distance, bounds, budget):
+    """Yields (cells, mismatches) for every simple path from `start` whose text has target's length."""
+    n = len(target)
+    if bounds[0][start] > max_distance:
+        return
+    cells = [start]
+
+    def extend(cell, i, visited, mismatches):
+        budget.spend()
+        text = texts[cell]
+        end = i + len(text)
+        mismatches += sum(a != b for a, b in zip(text, target[i:end]))
+        if end == n:
+            yield list(cells), mismatches
+            return
+        following = bounds[end]
+        for nb in neighbors[cell]:
+            if not (visited >> nb) & 1 and mismatches + following[nb] <= max_distance:
+                cells.append(nb)
+                yield from extend(nb, end, visited | (1 << nb), mismatches)
+                cells.pop()
+
+    yield from extend(start, 0, 1 << start, 0)
+
+
+def _levenshtein_paths(start, texts, neighbors, target, max_distance, bounds, budget):
+    """Yields (cells, distance) for every simple path from `start` within max_distance of the target."""
+    n = len(target)
+    max_chars = n + max_distance
+    cells = [start]
+    if bounds[start][0] > max_distance:
+        return
+
+    def extend(cell, row, chars, visited):
+        budget.spend()
+        # Extend the DP row by each character of the cell's akshara
+        for ch in texts[cell]:
+            new_row = [row[0] + 1]
+            for j in range(1, n + 1):
+                new_row.append(min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + (target[j - 1] != ch)))
+            row = new_row
+        chars += len(texts[cell])
+        if min(row) > max_distance:
+            return
+        if row[n] <= max_distance:
+            yield list(cells), row[n]
+        for nb in neighbors[cell]:
+            if texts[nb] is None or (visited >> nb) & 1 or chars + len(texts[nb]) > max_chars:
+                continue
+            # The best split of the target between this path and a walk from nb
+            if min(map(int.__add__, row, bounds[nb])) <= max_distance:
+                cells.append(nb)
+                yield from extend(nb, row, chars, visited | (1 << nb))
+                cells.pop()
+
+    if texts[start] is not None and len(texts[start]) <= max_chars:
+        yield from extend(start, list(range(n + 1)), 0, 1 << start)
+
+
+def iter_move_paths(chakra, target, moves=KNIGHT_MOVES, measure='exact', max_distance=0, script='kannada',
+                    pattern_type='chess_knight', progress=False, fold=False, max_nodes=MAX_SEARCH_NODES):
+    """
+    Yields a match for every simple path of the move graph given by `moves`
+    (and `fold`, see move_neighbors) whose text is within `max_distance` of
+    the target, start cell by start cell (row-major). With progress=True,
+    None is also yielded after each start cell (see src.search.iter_search_grid).
+
+    exact and hamming compare texts of the target's length; levenshtein
+    accepts any path length. Matches have the same fields as pattern search
+    results, with pattern_params {'start_row', 'start_col', 'num_jumps'}.
+
+    Raises ValueError if max_distance is above check_max_distance's cap, and
+    SearchBudgetError once more than max_nodes partial paths were extended.
+    """
+    if not target or chakra.grid is None:
+        return
+    target_devanagari = transliterate_text(target, 'devanagari') if script == 'kannada' else target
+    if measure not in ('exact', 'hamming', 'levenshtein'):
+        return
+    if measure == 'exact':
+        max_distance = 0
+    check_max_distance(target, measure, max_distance, script)
+
+    texts = _cell_texts(chakra)
+    display = chakra.akshara_tables.get('kannada' if script == 'kannada' else 'devanagari')
+    numbers = chakra.grid.ravel().tolist()
+    neighbors = _neighbors_for(moves, fold)
+    if measure == 'levenshtein':
+        bounds = _edit_bounds(texts, neighbors, target_devanagari, max_distance)
+    else:
+        bounds = _mismatch_bounds(texts, neighbors, target_devanagari, max_distance)
+
+    budget = _NodeBudget(max_nodes)
+    for start in range(CELL_COUNT):
+        if measure == 'levenshtein':
+            found = _levenshtein_paths(start, texts, neighbors, target_devanagari, max_distance, bounds, budget)
+        else:
+            found = _equal_length_paths(start, texts, neighbors, target_devanagari, max_distance, bounds, budget)
+        start_row, start_col = divmod(start, GRID_SIZE)
+        for cells, distance in found:
+            yield {
+                'path': Path.from_flat(cells),
+                'extracted_text': ''.join(display[numbers[cell]] if display else texts[cell] for cell in cells),
+                'sandhi_converted_text': None,
+                'distance': distance,
+                'measure': measure,
+                'pattern_type': pattern_type,
+                'pattern_params': {'start_row': start_row, 'start_col': start_col, 'num_jumps': len(cells) - 1},
+            }
+        if progress:
+            yield None
+
+
+def _rank(match):
+    return (match['distance'], len(match['path']),
+            match['pattern_params']['start_row'], match['pattern_params']['start_col'])
+
+
+def search_move_paths(chakra, target, moves='king', fold=False, measure='exact', max_distance=0, script='kannada',
+                      limit=None, pattern_type='move_path', max_nodes=MAX_SEARCH_NODES):
+    """
+    Returns every simple path of the move graph that spells the target
+    within max_distance, sorted by distance, path length and start position.
+
+    Args:
+        moves: A name from STEP_SETS or a list of (dr, dc) steps
+        fold: Whether steps off an edge re-enter at the opposite edge
+        limit: If given, only the best `limit` matches are kept (short
+            targets with a large max_distance match a great many paths)
+        max_nodes: Partial paths the search may extend; see iter_move_paths
+
+    Raises ValueError for bad moves or a max_distance above the cap, and
+    SearchBudgetError (a ValueError) when max_nodes is exceeded, with the
+    matches found so far, ranked and limited the same way, in its `matches`.
+    """
+    steps = resolve_moves(moves)
+    matches = iter_move_paths(chakra, target, steps, measure, max_distance, script, pattern_type, fold=fold,
+                              max_nodes=max_nodes)
+
+    def ranked(found):
+        if limit is not None:
+            # nsmallest is stable, so equal ranks keep scan order as sorted() does
+            return heapq.nsmallest(limit, found, key=_rank)
+        return sorted(found, key=_rank)
+
+    found = []
+    try:
+        for match in matches:
+            found.append(match)
+            # Matches found later only tie with kept ones after them
+            if limit is not None and len(found) >= 2 * limit:
+                found = ranked(found)
+    except SearchBudgetError as e:
+        e.matches = ranked(found)
+        raise
+    return ranked(found)
+
+
+def search_knight_paths(chakra, target, measure='exact', max_distance=0, script='kannada'):
+    """
+    Returns every simple knight path that spells the target within
+    max_distance, sorted by distance, path length and start position.
+    """
+    return search_move_paths(chakra, target, KNIGHT_MOVES, False, measure, max_distance, script,
+                             pattern_type='chess_knight')
@@ -0,0 +1,244 @@
+"""
+Exact search for many targets at once.
+
+The targets are compiled into one Aho-Corasick automaton, either over grid
+codes (each target split into its aksharas' numbers 1-64, as the exact ray
+search does) or over Devanagari characters. Every ray of the Chakra's ray
+index is then scanned once, reporting each occurrence of every target, and
+every bandha output (the longest path of each pattern variant) is walked
+once along the automaton's trie, reporting every target that is a prefix
+of it, as search_all_pattern_variants does for one target. The cost is one
+pass over the grid's rays and bandhas however many targets are given.
+"""
+from collections import deque
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.path import Path
+from src.search import pattern_path
+from src.transliterate import AKSHARA_MAP, tokenize_to_codes, transliterate_text
+
+UNITS = ('codes', 'devanagari')
+
+# Sources a multi-target search can scan: straight rays and bandha outputs
+SOURCES = ('rays', 'horizontal_zigzag', 'vertical_zigzag', 'shreni_bandha')
+
+# Longest output of each bandha per start: zigzags run until they leave the
+# grid (two cells per column), Shreni Bandha as far as the pattern search tries
+BANDHA_OUTPUT_PARAMS = {
+    'horizontal_zigzag': [{'length': 54}],
+    'vertical_zigzag': [{'length': 54}],
+    'shreni_bandha': [{'num_steps': 27, 'direction': 'up'}, {'num_steps': 27, 'direction': 'down'}],
+}
+
+
+class TargetAutomaton:
+    """
+    An Aho-Corasick automaton over sequences of symbols (characters or grid
+    codes). Pattern i is patterns[i]; empty patterns never match.
+    """
+
+    def __init__(self, patterns: Sequence[Sequence[Hashable]]):
+        self.lengths = [len(pattern) for pattern in patterns]
+        self.goto: List[Dict[Hashable, int]] = [{}]
+        # Patterns ending at each node, found by the trie alone (own) or
+        # through failure links (matches, which includes own)
+        own: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for symbol in pattern:
+                following = self.goto[node].get(symbol)
+                if following is None:
+                    following = len(self.goto)
+                    self.goto[node][symbol] = following
+                    self.goto.append({})
+                    own.append([])
+                node = following
+            own[node].append(pattern_id)
+
+        # Failure links in breadth-first order, so a node's link is set first
+        self.fail = [0] * len(self.goto)
+        self.own = own
+        self.matches = [list(ids) for ids in own]
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, following in self.goto[node].items():
+                queue.append(following)
+                link = self.fail[node]
+                while link and symbol not in self.goto[link]:
+                    link = self.fail[link]
+                self.fail[following] = self.goto[link].get(symbol, 0)
+                self.matches[following] = self.matches[following] + self.matches[self.fail[following]]
+
+    def scan(self, symbols: Iterable[Hashable]) -> Iterator[Tuple[int, int]]:
+        """Yields (end, pattern_id) for every occurrence in `symbols`; the occurrence is symbols[end - length:end]."""
+        goto, fail, matches = self.goto, self.fail, self.matches
+        node = 0
+        for position, symbol in enumerate(symbols, 1):
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            for pattern_id in matches[node]:
+                yield position, pattern_id
+
+    def prefixes(self, symbols: Iterable[Hashable]) -> Iterator[Tuple[int, int]]:
+        """Yields (length, pattern_id) for every pattern that is a prefix of `symbols`."""
+        goto, own = self.goto, self.own
+        node = 0
+        for position, symbol in enumerate(symbols, 1):
+            node = goto[node].get(symbol)
+            if node is None:
+                return
+            for pattern_id in own[node]:
+                yield position, pattern_id
+
+
+def target_symbols(target: str, unit: str = 'codes', script: str = 'kannada') -> Optional[Sequence[Hashable]]:
+    """
+    Returns the symbols a target is matched as: its grid codes, or its
+    Devanagari text. None if the target cannot be spelled with grid aksharas.
+    """
+    if unit == 'codes':
+        return tokenize_to_codes(target)
+    text = transliterate_text(target, 'devanagari') if script == 'kannada' else target
+    return text or None
+
+
+class MultiTargetSearch:
+    """
+    Targets compiled once for exact search in any number of Chakras.
+
+    Targets that cannot be spelled with grid aksharas are listed in
+    `invalid` and never match.
+    """
+
+    def __init__(self, targets: Sequence[str], unit: str = 'codes', script: str = 'kannada'):
+        if unit not in UNITS:
+            raise ValueError(f"unit must be one of {', '.join(UNITS)}")
+        self.targets = list(dict.fromkeys(targets))
+        self.unit = unit
+        self.script = script
+        symbols = [target_symbols(target, unit, script) for target in self.targets]
+        self.invalid = [target for target, sequence in zip(self.targets, symbols) if not sequence]
+        self.automaton = TargetAutomaton([sequence or () for sequence in symbols])
+
+    def _cell_symbols(self, chakra, cells):
+        """Symbols along `cells` and the number of cells each starts at, stopping at the first invalid cell."""
+        # The cells' grid numbers in one gather
+        numbers = np.asarray(chakra.grid).ravel()[Path.from_points(cells).flat()].tolist()
+        symbols, starts = [], []
+        for number in numbers:
+            if not 1 <= number <= 64:
+                break
+            starts.append(len(symbols))
+            if self.unit == 'codes':
+                symbols.append(number)
+            else:
+                symbols.extend(AKSHARA_MAP[number])
+        return symbols, starts
+
+    def _match(self, chakra, target_id, path, pattern_type=None, pattern_params=None):
+        display = chakra.akshara_tables.get('kannada' if self.script == 'kannada' else 'devanagari', AKSHARA_MAP)
+        match = {
+            'target': self.targets[target_id],
+            'path': path,
+            'extracted_text': ''.join(display[int(chakra.grid[r][c])] for r, c in path),
+            'sandhi_converted_text': None,
+            'distance': 0,
+            'measure': 'exact',
+        }
+        if pattern_type is not None:
+            match['pattern_type'] = pattern_type
+            match['pattern_params'] = pattern_params
+        return match
+
+    def _iter_ray_matches(self, chakra, direction_index=None):
+        automaton = self.automaton
+        ray_index = chakra.ray_index
+        for ray_id, ray in enumerate(ray_index.rays):
+            if direction_index is not None and ray.direction_index != direction_index:
+                continue
+            if self.unit == 'codes':
+                # Invalid cells are 0, which no target contains
+                for end, target_id in automaton.scan(ray_index.codes[ray_id, :len(ray.cells)].tolist()):
+                    yield target_id, ray.cells[end - automaton.lengths[target_id]:end], None
+            else:
+                # Occurrences must start and end on akshara boundaries
+                cell_at = {offset: i for i, offset in enumerate(ray.offsets)}
+                for end, target_id in automaton.scan(ray.text):
+                    first, last = cell_at.get(end - automaton.lengths[target_id]), cell_at.get(end)
+                    if first is not None and last is not None:
+                        yield target_id, ray.cells[first:last], None
+
+    def _iter_bandha_matches(self, chakra, pattern_type, start_row=None):
+        automaton = self.automaton
+        rows = range(27) if start_row is None else [start_row]
+        for extra in BANDHA_OUTPUT_PARAMS[pattern_type]:
+            for start_row in rows:
+                for start_col in range(27):
+                    params = {'start_row': start_row, 'start_col': start_col, **extra}
+                    path = pattern_path(pattern_type, params)
+                    if not path:
+                        continue
+                    symbols, starts = self._cell_symbols(chakra, path)
+                    cell_count = {start: i for i, start in enumerate(starts)}
+                    cell_count[len(symbols)] = len(starts)
+                    for length, target_id in automaton.prefixes(symbols):
+                        cells = cell_count.get(length)
+                        if cells is not None:
+                            yield target_id, path[:cells], params
+
+    def iter_source(self, chakra, source, part=None):
+        """
+        Yields (target_id, path, pattern_params) for every match in one
+        source; pattern_params is None for rays. `part` restricts the scan to
+        one direction index for rays, or one start row for bandhas, so a
+        source can be split into independent pieces.
+        """
+        if source == 'rays':
+            return self._iter_ray_matches(chakra, part)
+        if source in BANDHA_OUTPUT_PARAMS:
+            return self._iter_bandha_matches(chakra, source, part)
+        raise ValueError(f"Unknown source '{source}'; expected one of {', '.join(SOURCES)}")
+
+    def search(self, chakra, sources: Sequence[str] = SOURCES) -> List[dict]:
+        """
+        Returns every exact match of every target, each with a 'target'
+        field: straight-line matches first, in ray order, then bandha
+        matches by pattern type and start position. A path matched by
+        several sources for the same target is reported once.
+        """
+        unknown = [source for source in sources if source not in SOURCES]
+        if unknown:
+            raise ValueError(f"Unknown sources: {', '.join(unknown)}; expected {', '.join(SOURCES)}")
+        if chakra.grid is None:
+            return []
+
+        results = []
+        seen = set()
+
+        for source in SOURCES:
+            if source not in sources:
+                continue
+            pattern_type = None if source == 'rays' else source
+            for target_id, path, params in self.iter_source(chakra, source):
+                key = (target_id, path)
+                if key not in seen:
+                    seen.add(key)
+                    results.append(self._match(chakra, target_id, path, pattern_type, params))
+        return results
+
+
+def search_targets(chakra, targets, sources=SOURCES, unit='codes', script='kannada'):
+    """
+    Exact search for every target in one pass over the grid's rays and
+    bandha outputs. Returns (matches, invalid): matches as from
+    MultiTargetSearch.search, and the targets that cannot be spelled with
+    grid aksharas.
+    """
+    searcher = MultiTargetSearch(targets, unit, script)
+    return searcher.search(chakra, sources), searcher.invalid
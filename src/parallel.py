@@ -0,0 +1,189 @@
+"""
+Process-pool execution of pattern-variant searches.
+
+Every variant of a pattern type (27 x 27 start positions, times directions
+or jump counts) is searched independently, so the variants are split into
+contiguous shards and searched in a pool of worker processes. The grid is
+placed in shared memory once per pool; each worker attaches to it read-only
+and builds its Chakra (ray index and akshara tables) once, so a task carries
+only its variant parameters. Shard results are concatenated in shard order,
+which reproduces the serial result order exactly. The exhaustive knight-move
+search runs in the same pool, as a single task.
+"""
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory, util
+
+import numpy as np
+
+# Each worker gets several shards, so uneven shards still balance out
+SHARDS_PER_WORKER = 4
+
+# Below this many variants, starting tasks costs more than it saves
+MIN_PARALLEL_VARIANTS = 64
+
+_worker_state = {}  # in each worker process: 'shm' and 'chakra'
+
+
+def _init_worker(shm_name, shape, dtype):
+    from src.chakra import Chakra
+
+    # Spawned workers share the parent's resource tracker, so attaching here
+    # does not make the segment's lifetime depend on the worker
+    shm = shared_memory.SharedMemory(name=shm_name)
+    grid = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    grid.flags.writeable = False
+    _worker_state['shm'] = shm
+    _worker_state['chakra'] = Chakra.from_grid(grid)
+
+
+def _search_shard(target, pattern_type, pattern_params_list, measure, max_distance, script, use_sandhi):
+    from src.search import PatternSearchPlan
+
+    plan = PatternSearchPlan(_worker_state['chakra'], target, measure, max_distance, script, use_sandhi)
+    return plan.search_variants(pattern_type, pattern_params_list)
+
+
+def _search_knight(target, measure, max_distance, script):
+    from src.search import search_knight_paths
+
+    return search_knight_paths(_worker_state['chakra'], target, measure, max_distance, script)
+
+
+def split_shards(items, count):
+    """Splits `items` into at most `count` contiguous, nearly equal slices."""
+    count = max(1, min(count, len(items)))
+    size, extra = divmod(len(items), count)
+    shards, start = [], 0
+    for i in range(count):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+
+class PatternSearchExecutor:
+    """
+    Searches lists of pattern variants in a process pool of `max_workers`
+    processes. With max_workers 0 everything runs in the calling process.
+
+    The pool and its shared-memory grid are created on first use and
+    replaced when a search is made against a different grid (e.g. after an
+    upload).
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self._pool = None
+        self._shm = None
+        self._grid_key = None
+        self._lock = threading.Lock()
+        # A finalizer rather than atexit: it also runs when the executor lives
+        # in a pool process (e.g. a job), before that process joins its children
+        util.Finalize(self, PatternSearchExecutor.shutdown, args=(self,), exitpriority=10)
+
+    @property
+    def parallel(self):
+        return self.max_workers > 0
+
+    def _pool_for(self, grid, replace=False):
+        grid = np.ascontiguousarray(grid)
+        grid_key = hashlib.sha256(grid.tobytes() + str(grid.shape).encode() + grid.dtype.str.encode()).hexdigest()
+        with self._lock:
+            if self._pool is not None and self._grid_key == grid_key and not replace:
+                return self._pool
+            if self._pool is not None:
+                self._retire(self._pool, self._shm)
+            self._shm = shared_memory.SharedMemory(create=True, size=grid.nbytes)
+            np.ndarray(grid.shape, dtype=grid.dtype, buffer=self._shm.buf)[:] = grid
+            # spawn, not fork: the web process has Redis and breaker threads
+            self._pool = ProcessPoolExecutor(
+                self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self._shm.name, grid.shape, grid.dtype.str),
+            )
+            self._grid_key = grid_key
+            return self._pool
+
+    def search_variants(self, chakra, target, pattern_type, pattern_params_list, measure='exact',
+                        max_distance=0, script='kannada', use_sandhi=False, progress=None):
+        """
+        Returns the combined matches of every variant, in the same order as
+        PatternSearchPlan.search_variants.
+
+        Args:
+            progress: Optional callback, called with the fraction of variants
+                searched so far as shards complete
+        """
+        from src.search import PatternSearchPlan
+
+        pattern_params_list = list(pattern_params_list)
+        if not self.parallel or chakra.grid is None or len(pattern_params_list) < MIN_PARALLEL_VARIANTS:
+            plan = PatternSearchPlan(chakra, target, measure, max_distance, script, use_sandhi)
+            results = plan.search_variants(pattern_type, pattern_params_list)
+            if progress:
+                progress(1.0)
+            return results
+
+        shards = split_shards(pattern_params_list, self.max_workers * SHARDS_PER_WORKER)
+        args = (target, pattern_type)
+        options = (measure, max_distance, script, use_sandhi)
+        futures = self._submit(chakra.grid, [(_search_shard, *args, shard, *options) for shard in shards])
+
+        if progress:
+            sizes = {future: len(shard) for future, shard in zip(futures, shards)}
+            done = 0
+            for future in as_completed(futures):
+                done += sizes[future]
+                progress(done / len(pattern_params_list))
+
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def search_knight_paths(self, chakra, target, measure='exact', max_distance=0, script='kannada'):
+        """
+        Returns src.move_search.search_knight_paths's matches, searched in a
+        worker process so that the caller's interpreter stays free.
+        """
+        if not self.parallel or chakra.grid is None:
+            from src.search import search_knight_paths
+            return search_knight_paths(chakra, target, measure, max_distance, script)
+        [future] = self._submit(chakra.grid, [(_search_knight, target, measure, max_distance, script)])
+        return future.result()
+
+    def _submit(self, grid, calls):
+        """Submits each (function, *args) of `calls` to the pool for `grid`; returns the futures."""
+        try:
+            pool = self._pool_for(grid)
+            return [pool.submit(*call) for call in calls]
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool
+            pool = self._pool_for(grid, replace=True)
+            return [pool.submit(*call) for call in calls]
+
+    @staticmethod
+    def _retire(pool, shm):
+        """Lets a replaced pool finish the searches it is running, then frees its grid."""
+        def release():
+            pool.shutdown(wait=True)
+            shm.close()
+            shm.unlink()
+        threading.Thread(target=release, daemon=True).start()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+            if self._shm is not None:
+                # Workers keep their mappings; this only removes the name
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+            self._grid_key = None
@@ -0,0 +1,167 @@
+"""
+Compact, immutable paths through the 27x27 grid.
+
+A Path stores flat cell indices (row * 27 + col) in an array('H') instead of
+a list of (row, col) pairs. Slices share the parent's buffer, hashes are
+computed once and cached, and points are only materialised as (row, col)
+tuples where a caller iterates or at the API boundary (to_list). Straight
+lines additionally have a start + direction + length wire encoding.
+"""
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+GRID_SIZE = 27
+CELL_COUNT = GRID_SIZE * GRID_SIZE
+
+# Search directions as (row_step, col_step), in the order search_grid scans them
+DIRECTIONS = [
+    (0, 1),   # Right
+    (1, 0),   # Down
+    (0, -1),  # Left
+    (-1, 0),  # Up
+    (1, 1),   # Down-Right
+    (1, -1),  # Down-Left
+    (-1, 1),  # Up-Right
+    (-1, -1)  # Up-Left
+]
+
+
+class Path:
+    """
+    An immutable sequence of grid cells. Iterating yields (row, col) tuples.
+
+    Paths compare equal to each other and to any sequence of (row, col)
+    pairs with the same cells, so existing code comparing against lists of
+    tuples or [[r, c], ...] keeps working.
+    """
+    __slots__ = ('_cells', '_start', '_stop', '_hash')
+
+    def __init__(self, cells=None, _start=0, _stop=None):
+        if cells is None:
+            cells = array('H')
+        elif not isinstance(cells, array):
+            cells = array('H', cells)
+        self._cells = cells
+        self._start = _start
+        self._stop = len(cells) if _stop is None else _stop
+        self._hash = None
+
+    @classmethod
+    def from_points(cls, points: Iterable) -> 'Path':
+        """Builds a Path from (row, col) pairs. Raises ValueError for cells outside the grid."""
+        if isinstance(points, Path):
+            return points
+        cells = array('H')
+        for r, c in points:
+            if not (0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE):
+                raise ValueError(f"Cell ({r}, {c}) is outside the grid")
+            cells.append(r * GRID_SIZE + c)
+        return cls(cells)
+
+    @classmethod
+    def from_flat(cls, flat_indices: Iterable[int]) -> 'Path':
+        return cls(array('H', flat_indices))
+
+    @classmethod
+    def from_ray(cls, row: int, col: int, direction_index: int, length: int) -> 'Path':
+        """Builds the straight path of `length` cells from (row, col) in DIRECTIONS[direction_index]."""
+        dr, dc = DIRECTIONS[direction_index]
+        return cls.from_points((row + i * dr, col + i * dc) for i in range(length))
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        for i in range(self._start, self._stop):
+            yield divmod(self._cells[i], GRID_SIZE)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return Path(array('H', self.flat()[index]))
+            # Slices share the buffer, so they cost O(1)
+            return Path(self._cells, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Path index out of range')
+        return divmod(self._cells[self._start + index], GRID_SIZE)
+
+    def __add__(self, other):
+        return Path(array('H', self.flat()) + array('H', Path.from_points(other).flat()))
+
+    def __eq__(self, other):
+        if isinstance(other, Path):
+            return len(self) == len(other) and self.flat() == other.flat()
+        try:
+            return len(self) == len(other) and all(
+                (r, c) == tuple(point) for (r, c), point in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __lt__(self, other):
+        # Flat indices order like (row, col) pairs, so paths sort as lists of points would
+        if isinstance(other, Path):
+            return self.flat() < other.flat()
+        return list(self) < [tuple(point) for point in other]
+
+    def __hash__(self):
+        # Hashed as the tuple of points it equals, so a Path and its tuple
+        # form are interchangeable as set members and dict keys
+        if self._hash is None:
+            self._hash = hash(tuple(self))
+        return self._hash
+
+    def __repr__(self):
+        return f"Path({self.to_list()!r})"
+
+    def flat(self) -> List[int]:
+        """Returns the flat cell indices (row * 27 + col)."""
+        return self._cells[self._start:self._stop].tolist()
+
+    def to_list(self) -> List[List[int]]:
+        """Returns [[row, col], ...], the form used in API responses."""
+        return [[r, c] for r, c in self]
+
+    def ray(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Returns (row, col, direction_index, length) if the path is a straight
+        line in one of DIRECTIONS, otherwise None. Single cells count as rays
+        in direction 0.
+        """
+        n = len(self)
+        if n == 0:
+            return None
+        row, col = self[0]
+        if n == 1:
+            return row, col, 0, 1
+        second_row, second_col = self[1]
+        step = (second_row - row, second_col - col)
+        if step not in DIRECTIONS:
+            return None
+        dr, dc = step
+        for i, (r, c) in enumerate(self):
+            if (r, c) != (row + i * dr, col + i * dc):
+                return None
+        return row, col, DIRECTIONS.index(step), n
+
+    def to_wire(self):
+        """
+        Compact JSON-ready encoding, as used by the compact search responses
+        of src.encoding: [start_cell, direction_index, length] for straight
+        lines, {'c': [flat indices]} otherwise.
+        """
+        ray = self.ray()
+        if ray is not None:
+            row, col, direction_index, length = ray
+            return [row * GRID_SIZE + col, direction_index, length]
+        return {'c': self.flat()}
+
+    @classmethod
+    def from_wire(cls, data) -> 'Path':
+        """Inverse of to_wire."""
+        if isinstance(data, dict):
+            return cls.from_flat(data['c'])
+        start_cell, direction_index, length = data
+        return cls.from_ray(*divmod(start_cell, GRID_SIZE), direction_index, length)
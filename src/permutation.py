@@ -0,0 +1,214 @@
+"""
+Bandhas as arrays of flat cell indices.
+
+A PermutationBandha stores the cells a bandha visits as an int16 array of
+flat indices (row * 27 + col). Decoding a whole traversal is then a single
+gather, grid.ravel()[perm], followed by one table lookup, instead of a
+method call per cell. Traversals that visit all 729 cells are permutations
+of the chakra and can be composed and inverted.
+
+The maximal paths of the shipped generators, from every start cell, are
+built once and cached on disk; shorter variants are prefixes of them, and
+the pattern searches read their zigzag and Shreni Bandha paths from here.
+"""
+import hashlib
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from src.bandha import Bandha
+from src.path import Path
+
+GRID_SIZE = 27
+CELL_COUNT = GRID_SIZE * GRID_SIZE
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'bandha_permutations.npz')
+BANDHA_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bandha.py')
+
+
+class PermutationBandha:
+    """
+    An injective sequence of cells stored as int16 flat indices.
+
+    Attributes:
+        name: Display name
+        perm: int16 array of flat cell indices in traversal order
+    """
+    __slots__ = ('name', 'perm')
+
+    def __init__(self, perm, name="Permutation Bandha"):
+        perm = np.asarray(perm, dtype=np.int16)
+        if perm.ndim != 1 or (perm.size and (perm.min() < 0 or perm.max() >= CELL_COUNT)):
+            raise ValueError("Permutation entries must be flat cell indices 0-728")
+        if np.unique(perm).size != perm.size:
+            raise ValueError("A permutation bandha cannot visit a cell twice")
+        self.name = name
+        self.perm = perm
+
+    @classmethod
+    def from_points(cls, points: List[Tuple[int, int]], name="Permutation Bandha"):
+        """Builds a PermutationBandha from a Path or a list of (row, col) points."""
+        if isinstance(points, Path):
+            return cls(points.flat(), name)
+        if not points:
+            return cls(np.empty(0, dtype=np.int16), name)
+        rows, cols = np.asarray(points, dtype=np.int16).T
+        return cls(rows * GRID_SIZE + cols, name)
+
+    @classmethod
+    def identity(cls, name="Row order"):
+        """Visits the chakra row by row, left to right."""
+        return cls(np.arange(CELL_COUNT), name)
+
+    @classmethod
+    def column_order(cls, name="Column order"):
+        """Visits the chakra column by column, top to bottom."""
+        return cls(np.arange(CELL_COUNT).reshape(GRID_SIZE, GRID_SIZE).T.ravel(), name)
+
+    def __len__(self):
+        return self.perm.size
+
+    def __eq__(self, other):
+        return isinstance(other, PermutationBandha) and np.array_equal(self.perm, other.perm)
+
+    def __hash__(self):
+        return hash(self.perm.tobytes())
+
+    @property
+    def is_complete(self):
+        """Whether the bandha visits all 729 cells, i.e. is a permutation of the chakra."""
+        return self.perm.size == CELL_COUNT
+
+    def compose(self, other):
+        """
+        Returns the bandha that visits this bandha's cells in the order given
+        by `other`: result.perm[i] == self.perm[other.perm[i]]. `other` indexes
+        positions along this bandha, so its entries must be below len(self).
+        """
+        if other.perm.size and other.perm.max() >= self.perm.size:
+            raise ValueError("Cannot compose with a bandha that indexes beyond this one")
+        return PermutationBandha(self.perm[other.perm], f"{self.name} ∘ {other.name}")
+
+    def inverse(self):
+        """Returns the permutation mapping each cell to its position in this traversal."""
+        if not self.is_complete:
+            raise ValueError("Only bandhas visiting all 729 cells can be inverted")
+        inverse = np.empty(CELL_COUNT, dtype=np.int16)
+        inverse[self.perm] = np.arange(CELL_COUNT, dtype=np.int16)
+        return PermutationBandha(inverse, f"{self.name}⁻¹")
+
+    def prefix(self, length):
+        return PermutationBandha(self.perm[:length], self.name)
+
+    def points(self) -> Path:
+        """Returns the cells as a Path, e.g. for Bandha.set_path or the API."""
+        return Path.from_flat(self.perm.tolist())
+
+    def numbers(self, grid):
+        """Returns the grid numbers along the bandha in one gather."""
+        return np.asarray(grid).ravel()[self.perm]
+
+    def decode(self, chakra, script='kannada'):
+        """Returns the text along the bandha, as Bandha.traverse does before Sandhi."""
+        if chakra.grid is None:
+            return ""
+        return chakra.decode_numbers(self.numbers(chakra.grid), 'kannada' if script == 'kannada' else 'devanagari')
+
+
+def _generator_paths() -> Dict[str, Path]:
+    """The maximal path of each shipped generator from every start cell, keyed by cache name."""
+    bandha = Bandha()
+    paths = {}
+    for r in range(GRID_SIZE):
+        for c in range(GRID_SIZE):
+            # Zigzags stop at the edge, so a long enough length reaches the end
+            paths[f'horizontal_zigzag:{r}:{c}'] = bandha.horizontal_zigzag(r, c, CELL_COUNT)
+            paths[f'vertical_zigzag:{r}:{c}'] = bandha.vertical_zigzag(r, c, CELL_COUNT)
+            for direction in ('up', 'down'):
+                paths[f'shreni_bandha:{direction}:{r}:{c}'] = bandha.shreni_bandha(r, c, CELL_COUNT, direction)
+    return paths
+
+
+def _source_hash():
+    """Fingerprint of the generator code, so a stale cache is rebuilt."""
+    with open(BANDHA_SOURCE, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+_shipped = {}  # cache path -> {name: PermutationBandha}
+
+
+def shipped_permutations(cache_path=DEFAULT_CACHE_PATH) -> Dict[str, PermutationBandha]:
+    """
+    Returns the precomputed PermutationBandhas: 'rows', 'columns' and the
+    maximal path of every shipped generator from every start cell, keyed as
+    'horizontal_zigzag:<row>:<col>', 'vertical_zigzag:<row>:<col>' and
+    'shreni_bandha:<direction>:<row>:<col>'.
+
+    Loaded from `cache_path` when it matches the current generator code,
+    otherwise built and written there. Kept in memory after the first call.
+    """
+    if cache_path in _shipped:
+        return _shipped[cache_path]
+
+    source_hash = _source_hash()
+    names = flat = lengths = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                if str(data['source_hash']) == source_hash:
+                    names, flat, lengths = data['names'].tolist(), data['flat'], data['lengths']
+        except Exception as e:
+            print(f"Ignoring unreadable permutation cache {cache_path}: {e}")
+
+    if names is None:
+        paths = _generator_paths()
+        names = list(paths)
+        lengths = np.array([len(paths[name]) for name in names], dtype=np.int32)
+        flat = np.concatenate([PermutationBandha.from_points(paths[name]).perm for name in names])
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                np.savez_compressed(cache_path, source_hash=source_hash, names=np.array(names),
+                                    flat=flat, lengths=lengths)
+            except OSError as e:
+                print(f"Could not write permutation cache {cache_path}: {e}")
+
+    permutations = {'rows': PermutationBandha.identity(), 'columns': PermutationBandha.column_order()}
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    for name, start, end in zip(names, offsets[:-1], offsets[1:]):
+        permutations[name] = PermutationBandha(flat[start:end], name)
+    _shipped[cache_path] = permutations
+    return permutations
+
+
+# Pattern type -> the parameter giving a variant's length
+SHIPPED_PATTERN_LENGTHS = {'horizontal_zigzag': 'length', 'vertical_zigzag': 'length', 'shreni_bandha': 'num_steps'}
+
+
+def shipped_prefix(pattern_type, pattern_params):
+    """
+    Returns the PermutationBandha of a zigzag or Shreni Bandha variant, as a
+    prefix of its shipped maximal path, or None for other pattern types and
+    for starts outside the grid, which are left to the generators.
+
+    A zigzag stops at the edge and a Shreni Bandha stops moving once its
+    next cell is taken, so a variant of n cells (steps) is the first n
+    cells of the maximal path.
+    """
+    length_param = SHIPPED_PATTERN_LENGTHS.get(pattern_type)
+    if length_param is None:
+        return None
+    r, c = pattern_params['start_row'], pattern_params['start_col']
+    length = pattern_params[length_param]
+    if not all(isinstance(v, int) for v in (r, c, length)) or not (0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE):
+        return None
+    if pattern_type == 'shreni_bandha':
+        # As in Bandha.shreni_bandha, any direction but 'up' runs down-left
+        direction = 'up' if pattern_params.get('direction', 'up') == 'up' else 'down'
+        name = f'shreni_bandha:{direction}:{r}:{c}'
+    else:
+        name = f'{pattern_type}:{r}:{c}'
+    return shipped_permutations()[name].prefix(max(length, 0))
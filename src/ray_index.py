@@ -0,0 +1,249 @@
+"""
+Precomputed ray index for straight-line searches over a Chakra grid.
+
+Every row, column and diagonal is stored once per direction as a single
+Devanagari string, together with the cell offsets of each akshara in that
+string, and as a row of grid numbers in an int8 matrix. Exact searches
+then reduce to one vectorised sliding-window comparison instead of walking
+729 start cells in 8 directions.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.path import DIRECTIONS, Path
+from src.sandhi_simple import sandhi_alignment
+from src.transliterate import AKSHARA_MAP, tokenize_to_codes
+
+GRID_SIZE = 27
+
+# Stands in for cells holding numbers outside 1-64 so no match can span them
+INVALID_CELL = '\x00'
+
+
+def match_code_windows(code_matrix, codes: List[int], max_distance: int = 0) -> List[Tuple[int, int, int]]:
+    """
+    Compares `codes` with every window of len(codes) consecutive entries in
+    each row of `code_matrix` (an int8 matrix of grid numbers where 0 marks
+    padding or an invalid cell) in one vectorised pass.
+
+    Returns (row, first column, distance) for every window that differs from
+    `codes` in at most `max_distance` positions and contains no 0.
+    """
+    n = len(codes)
+    if n == 0 or n > code_matrix.shape[1]:
+        return []
+    windows = sliding_window_view(code_matrix, n, axis=1)
+    mismatches = (windows != np.asarray(codes, dtype=np.int8)).sum(axis=2)
+    if max_distance > 0:
+        hits = (mismatches <= max_distance) & (windows != 0).all(axis=2)
+    else:
+        # Target codes are never 0, so an exact hit cannot cover padding
+        hits = mismatches == 0
+    return [(int(row), int(first), int(mismatches[row, first])) for row, first in zip(*np.nonzero(hits))]
+
+
+class Ray:
+    """
+    A maximal straight line through the grid in one direction.
+
+    Attributes:
+        direction_index: Index of the direction in DIRECTIONS
+        cells: Path of the ray's cells in traversal order; slices are O(1) views
+        text: Devanagari text of all cells concatenated
+        offsets: Character offset at which each cell starts, plus len(text)
+    """
+    __slots__ = ('direction_index', 'cells', 'text', 'offsets')
+
+    def __init__(self, direction_index: int, cells: List[Tuple[int, int]], aksharas: List[str]):
+        self.direction_index = direction_index
+        self.cells = Path.from_points(cells)
+        self.text = ''.join(aksharas)
+        self.offsets: List[int] = [0]
+        for akshara in aksharas:
+            self.offsets.append(self.offsets[-1] + len(akshara))
+
+
+class RayIndex:
+    """
+    Devanagari strings for every row, column and diagonal of a grid in all
+    8 directions. Built once per Chakra when the grid is loaded.
+
+    `codes` holds the grid numbers of ray i in row i, padded with 0 after the
+    end of the ray. Invalid cells are 0 as well, so no match can include them.
+    """
+
+    def __init__(self, grid):
+        self.rays: List[Ray] = []
+        # (row, col, direction_index) -> (ray, index of that cell in the ray)
+        self.starts: Dict[Tuple[int, int, int], Tuple[Ray, int]] = {}
+        for direction_index, (dr, dc) in enumerate(DIRECTIONS):
+            for r, c in self._line_starts(dr, dc):
+                cells = []
+                aksharas = []
+                while 0 <= r < GRID_SIZE and 0 <= c < GRID_SIZE:
+                    number = int(grid[r][c])
+                    cells.append((r, c))
+                    aksharas.append(AKSHARA_MAP[number] if 1 <= number <= 64 else INVALID_CELL)
+                    r += dr
+                    c += dc
+                ray = Ray(direction_index, cells, aksharas)
+                self.rays.append(ray)
+                for i, (cr, cc) in enumerate(cells):
+                    self.starts[(cr, cc, direction_index)] = (ray, i)
+
+        self.codes = np.zeros((len(self.rays), GRID_SIZE), dtype=np.int8)
+        for i, ray in enumerate(self.rays):
+            numbers = [int(grid[r][c]) for r, c in ray.cells]
+            self.codes[i, :len(numbers)] = [n if 1 <= n <= 64 else 0 for n in numbers]
+
+        # The rays' texts as code points, padded with 0 (as are invalid
+        # cells), and the index of the cell starting at each character
+        # offset (-1 inside an akshara), for character-level comparisons
+        width = max(len(ray.text) for ray in self.rays)
+        self.chars = np.zeros((len(self.rays), width), dtype=np.int32)
+        self.cell_at = np.full((len(self.rays), width + 1), -1, dtype=np.int16)
+        for i, ray in enumerate(self.rays):
+            self.chars[i, :len(ray.text)] = [ord(ch) for ch in ray.text]
+            self.cell_at[i, ray.offsets] = np.arange(len(ray.offsets))
+
+    @staticmethod
+    def _line_starts(dr: int, dc: int) -> List[Tuple[int, int]]:
+        """Returns the cells from which a maximal line in direction (dr, dc) begins."""
+        first_row = 0 if dr >= 0 else GRID_SIZE - 1
+        first_col = 0 if dc >= 0 else GRID_SIZE - 1
+        starts = set()
+        if dr != 0:
+            starts.update((first_row, c) for c in range(GRID_SIZE))
+        if dc != 0:
+            starts.update((r, first_col) for r in range(GRID_SIZE))
+        return sorted(starts)
+
+    def ray_from(self, row: int, col: int, direction_index: int) -> Tuple[Ray, int]:
+        """Returns the ray through (row, col) in the given direction and the cell's index in it."""
+        return self.starts[(row, col, direction_index)]
+
+    def find_codes(self, codes: List[int], max_distance: int = 0) -> List[Tuple[Tuple[int, int], int, Path, int]]:
+        """
+        Finds every straight-line path of len(codes) cells whose grid numbers
+        differ from `codes` in at most `max_distance` cells (Hamming distance).
+        All rays and offsets are compared in one vectorised pass.
+
+        Returns a list of (start_cell, direction_index, path, distance) tuples
+        ordered the way search_grid scans them: by start row, start column,
+        then direction.
+        """
+        n = len(codes)
+        matches = []
+        for ray_id, first, distance in match_code_windows(self.codes, codes, max_distance):
+            ray = self.rays[ray_id]
+            path = ray.cells[first:first + n]
+            matches.append((path[0], ray.direction_index, path, distance))
+        matches.sort(key=lambda m: (m[0], m[1]))
+        return matches
+
+    def find_hamming(self, text: str, max_distance: int) -> List[Tuple[Tuple[int, int], int, Path, int]]:
+        """
+        Finds every straight-line path whose Devanagari text has the length
+        of `text` and differs from it in at most `max_distance` characters.
+        All rays and offsets are compared in one vectorised pass.
+
+        Returns (start_cell, direction_index, path, distance) tuples in the
+        order of find_codes.
+        """
+        n = len(text)
+        width = self.chars.shape[1]
+        if n == 0 or n > width:
+            return []
+        windows = sliding_window_view(self.chars, n, axis=1)
+        mismatches = (windows != np.array([ord(ch) for ch in text], dtype=np.int32)).sum(axis=2)
+        # Windows must start and end on akshara boundaries and cover no invalid cell
+        first = self.cell_at[:, :width - n + 1]
+        end = self.cell_at[:, n:]
+        hits = (mismatches <= max_distance) & (first >= 0) & (end >= 0) & (windows != 0).all(axis=2)
+        matches = []
+        for ray_id, offset in zip(*np.nonzero(hits)):
+            ray = self.rays[ray_id]
+            path = ray.cells[first[ray_id, offset]:end[ray_id, offset]]
+            matches.append((path[0], ray.direction_index, path, int(mismatches[ray_id, offset])))
+        matches.sort(key=lambda m: (m[0], m[1]))
+        return matches
+
+    def find_exact(self, text: str) -> List[Tuple[Tuple[int, int], int, Path, int]]:
+        """
+        Finds every straight-line path whose text equals `text` (Devanagari or Kannada).
+        """
+        codes = tokenize_to_codes(text) if text else None
+        if not codes:
+            return []
+        return self.find_codes(codes)
+
+
+class SandhiRun:
+    """
+    The Sandhi-normalized text of the valid cells from one start cell to the
+    end of its ray (or the first invalid cell) in one direction.
+
+    Attributes:
+        path: The run's cells, from the start cell on
+        available: Cells from the start cell to the end of the ray, valid or not
+        text: Sandhi of the Devanagari text of all of path
+        cell_of: cell_of[m] is the index in path of the cell text[m] comes from
+        cuts: cuts[j] is (length, tail) such that text[:length] + tail is the
+            Sandhi of the first j cells
+    """
+    __slots__ = ('path', 'available', 'text', 'cell_of', 'cuts')
+
+    def __init__(self, ray: Ray, first: int):
+        end = first
+        while end < len(ray.cells) and ray.text[ray.offsets[end]] != INVALID_CELL:
+            end += 1
+        self.path = ray.cells[first:end]
+        self.available = len(ray.cells) - first
+        base = ray.offsets[first]
+        raw = ray.text[base:ray.offsets[end]]
+        self.text, sources, char_cuts = sandhi_alignment(raw)
+        cell_of_char = [i for i in range(end - first) for _ in range(ray.offsets[first + i + 1] - ray.offsets[first + i])]
+        self.cell_of = [cell_of_char[source] for source in sources]
+        self.cuts = [char_cuts[ray.offsets[first + j] - base] for j in range(end - first + 1)]
+
+    def prefix(self, cells: int) -> str:
+        """Sandhi of the text of the first `cells` cells (at most len(path))."""
+        length, tail = self.cuts[cells]
+        return self.text[:length] + tail
+
+    def prefix_length(self, cells: int) -> int:
+        """len(prefix(cells)) without building the prefix."""
+        length, tail = self.cuts[cells]
+        return length + len(tail)
+
+
+class SandhiRayIndex:
+    """
+    Sandhi-normalized straight lines, built once per grid so that Sandhi
+    searches convert no text at search time.
+
+    `runs` holds a SandhiRun for every (row, col, direction_index) in the scan
+    order of search_grid. Sandhi of a line depends on where it starts (a
+    vowel at the start is not joined to the cell before it), so each start
+    cell has its own run rather than a slice of one string per ray.
+
+    `exact` maps Sandhi text to the (row, col, direction_index, cells) starts
+    whose first `cells` cells read as that text, for the lengths an exact
+    search compares: as many cells as the text has characters, or all cells
+    to the edge of the grid when there are fewer.
+    """
+
+    def __init__(self, ray_index: RayIndex):
+        self.runs: Dict[Tuple[int, int, int], SandhiRun] = {}
+        self.exact: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        for r in range(GRID_SIZE):
+            for c in range(GRID_SIZE):
+                for direction_index in range(len(DIRECTIONS)):
+                    run = SandhiRun(*ray_index.ray_from(r, c, direction_index))
+                    self.runs[(r, c, direction_index)] = run
+                    for cells in range(1, len(run.path) + 1):
+                        length = run.prefix_length(cells)
+                        if length == cells or (cells == run.available and length > cells):
+                            self.exact.setdefault(run.prefix(cells), []).append((r, c, direction_index, cells))
@@ -3,6 +3,14 @@ Simplified Sandhi conversion functions for integration
 Extracted from Sandhi_Convt.py to avoid dependency issues
 """
 
+HALANTH = chr(0x094d)  # Devanagari halanth sign
+
+# Independent vowel -> the matra it becomes after a consonant or halanth
+VOWEL_MATRAS = {'अ':'', 'आ':'ा', 'इ':'ि', 'ई':'ी', 'उ':'ु', 'ऊ':'ू', 'ऋ':'ृ', 'ॠ':'ॄ', 'ए':'े', 'ऐ':'ै', 'ओ':'ो', '�':'ौ', '\u0960': '\u0962', '\u0961': '\u0963'}
+
+# Matra -> the independent vowel visandhi writes for it after a halanth
+MATRA_VOWELS = {'ा':'आ', 'ि':'इ', 'ी':'ई', 'ु':'उ', 'ू':'ऊ', 'ृ':'ऋ', 'ॄ':'ॠ', 'े':'ए', 'ै':'ऐ', 'ो':'ओ', 'ौ':'औ', '\u0962':'\u0960', '\u0963':'\u0961'}
+
 def Sandhi(inword: str) -> str:
     """
     Convert from separate consonants/vowels to combined normal form
@@ -10,8 +18,8 @@ def Sandhi(inword: str) -> str:
     """
     if not inword:
         return ""
-    halanth = chr(0x094d)  # Devanagari halanth sign
-    vowels_indep = {'अ':'', 'आ':'ा', 'इ':'ि', 'ई':'ी', 'उ':'ु', 'ऊ':'ू', 'ऋ':'ृ', 'ॠ':'ॄ', 'ए':'े', 'ऐ':'ै', 'ओ':'ो', '�':'ौ', '\u0960': '\u0962', '\u0961': '\u0963'}
+    halanth = HALANTH
+    vowels_indep = VOWEL_MATRAS
     outword = []
     i = 0
     while i < len(inword):
@@ -36,6 +44,45 @@ def Sandhi(inword: str) -> str:
         i += 1
     return "".join(outword)
 
+def sandhi_alignment(inword: str):
+    """
+    Sandhi(inword) computed once, together with what is needed to map its
+    characters back to inword and to read off the Sandhi of any prefix of
+    inword without converting it again.
+
+    Returns (outword, sources, cuts):
+        outword: Sandhi(inword)
+        sources: sources[m] is the index in inword of the character that
+            output character m comes from
+        cuts: cuts[k] is (length, tail) with
+            Sandhi(inword[:k]) == outword[:length] + tail, for 0 <= k <= len(inword)
+    """
+    outword = []
+    sources = []
+    cuts = [(0, '')]
+    i = 0
+    n = len(inword)
+    while i < n:
+        ch = inword[i]
+        # The same rules as Sandhi: a consonant or halanth joins with a following independent vowel
+        if i < n - 1 and inword[i + 1] in VOWEL_MATRAS and (ch == HALANTH or 0x0915 <= ord(ch) <= 0x0939):
+            # A prefix ending between the two keeps ch as it is
+            cuts.append((len(outword), ch))
+            matra = VOWEL_MATRAS[inword[i + 1]]
+            if ch != HALANTH:
+                outword.append(ch)
+                sources.append(i)
+            if matra:
+                outword.append(matra)
+                sources.append(i + 1)
+            i += 2
+        else:
+            outword.append(ch)
+            sources.append(i)
+            i += 1
+        cuts.append((len(outword), ''))
+    return "".join(outword), sources, cuts
+
 def visandhi(inword: str) -> str:
     """
     Convert from combined normal form to separate consonants/vowels
@@ -43,8 +90,8 @@ def visandhi(inword: str) -> str:
     """
     if not inword:
         return ""
-    halanth = chr(0x094d)  # Devanagari halanth sign
-    matra_to_indep = {'ा':'आ', 'ि':'इ', 'ी':'ई', 'ु':'उ', 'ू':'ऊ', 'ृ':'ऋ', 'ॄ':'ॠ', 'े':'ए', 'ै':'ऐ', 'ो':'ओ', 'ौ':'औ', '\u0962':'\u0960', '\u0963':'\u0961'}
+    halanth = HALANTH
+    matra_to_indep = MATRA_VOWELS
     outword = []
     i = 0
     while i < len(inword):
@@ -67,6 +114,105 @@ def visandhi(inword: str) -> str:
         i += 1
     return "".join(outword)
 
+class SandhiTransducer:
+    """
+    Sandhi (or, with reverse=True, visandhi) of a text fed in pieces.
+
+    Both conversions look at most one character ahead, so only the last
+    character fed can still change: a consonant or halanth that may join
+    with a following vowel (a consonant that may take a matra or halanth,
+    in reverse). feed() returns the output that is settled by a chunk, and
+    snapshot() the conversion of everything fed so far as if the text ended
+    there, so that
+
+        t = SandhiTransducer()
+        for chunk in chunks:
+            t.feed(chunk)
+            assert t.snapshot() == Sandhi(''.join(chunks_so_far))
+
+    Feeding costs O(1) per character. A snapshot is a new string, so it
+    costs its length; len(t), the length of that snapshot, together with
+    settled_length and tail, is O(1), so a caller extending text a cell at
+    a time can rule candidates out by length before building any of them.
+    """
+
+    def __init__(self, reverse: bool = False):
+        self.reverse = reverse
+        self._output = []     # settled output, in pieces
+        self._length = 0      # total length of the settled pieces
+        self._pending = ''    # last character fed, if it may still combine
+
+    def feed(self, chunk: str) -> str:
+        """Adds chunk to the input; returns the output it settles."""
+        start = len(self._output)
+        step = self._step_reverse if self.reverse else self._step
+        for ch in chunk:
+            step(ch)
+        settled = ''.join(self._output[start:])
+        self._length += len(settled)
+        return settled
+
+    def _step(self, ch):
+        pending = self._pending
+        if pending:
+            self._pending = ''
+            if ch in VOWEL_MATRAS:
+                # Consonant + vowel -> consonant + matra; halanth + vowel -> matra
+                if pending != HALANTH:
+                    self._output.append(pending)
+                self._output.append(VOWEL_MATRAS[ch])
+                return
+            self._output.append(pending)
+        if ch == HALANTH or 0x0915 <= ord(ch) <= 0x0939:
+            self._pending = ch
+        else:
+            self._output.append(ch)
+
+    def _step_reverse(self, ch):
+        pending = self._pending
+        if pending:
+            self._pending = ''
+            self._output.append(pending)
+            # A consonant without a matra or halanth carries an inherent अ
+            if ch not in MATRA_VOWELS and ch != HALANTH:
+                self._output.append(HALANTH + 'अ')
+        if 0x0915 <= ord(ch) <= 0x0939:
+            self._pending = ch
+        elif ch in MATRA_VOWELS:
+            self._output.append(HALANTH + MATRA_VOWELS[ch])
+        else:
+            self._output.append(ch)
+
+    @property
+    def settled_length(self) -> int:
+        """Length of the output that later input can no longer change."""
+        return self._length
+
+    @property
+    def tail(self) -> str:
+        """Output of the pending character if the input ended now."""
+        if self._pending and self.reverse:
+            return self._pending + HALANTH + 'अ'
+        return self._pending
+
+    def __len__(self):
+        return self._length + len(self.tail)
+
+    def snapshot(self) -> str:
+        """Sandhi (or visandhi) of everything fed so far."""
+        # Kept as one piece, so a later snapshot joins it with only the newer pieces
+        settled = ''.join(self._output)
+        self._output = [settled]
+        return settled + self.tail
+
+    def flush(self) -> str:
+        """Ends the input: returns the output still held back and resets the transducer."""
+        tail = self.tail
+        self._output = []
+        self._length = 0
+        self._pending = ''
+        return tail
+
 # Test functions
 if __name__ == '__main__':
     # Test cases
@@ -1,22 +1,96 @@
-from src.sandhi_simple import Sandhi
-from src.transliterate import transliterate_text
+import base64
+import hashlib
+import heapq
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from src.sandhi_simple import Sandhi, SandhiTransducer, sandhi_alignment
+from src.transliterate import AKSHARA_MAP, transliterate_text, tokenize_to_codes
 from src.bandha import Bandha
+from src.formula import compile_formula, values_to_rows, FormulaError
+from src.move_search import (KNIGHT_MOVES, SearchBudgetError, check_max_distance, iter_move_paths,
+                             search_knight_paths, search_move_paths)
+from src.path import Path
+from src.permutation import shipped_prefix
+from src.ray_index import DIRECTIONS, INVALID_CELL, match_code_windows
 
 def levenshtein(s1, s2):
     if len(s1) < len(s2):
         return levenshtein(s2, s1)
     if len(s2) == 0:
         return len(s1)
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    return previous_row[-1]
+    return levenshtein_prefixes(s2, s1)[-1]
+
+def _pattern_masks(pattern):
+    """Bit mask per character: bit i is set where pattern[i] == character."""
+    masks = {}
+    for i, ch in enumerate(pattern):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+def levenshtein_prefixes(pattern, text, max_distance=None):
+    """
+    Edit distance between `pattern` and every prefix of `text` in one pass.
+
+    Uses Myers' bit-parallel algorithm (Hyyro's global-distance variant) with
+    Python ints as bit vectors, so each text character costs a handful of
+    integer operations regardless of the pattern length.
+
+    Returns a list `d` where d[j] == levenshtein(pattern, text[:j]). If
+    `max_distance` is given, the list stops early once no longer prefix can
+    come within `max_distance`, so len(d) may be shorter than len(text) + 1.
+    """
+    m = len(pattern)
+    distances = [m]
+    if m == 0:
+        distances.extend(range(1, len(text) + 1))
+        if max_distance is not None:
+            del distances[max_distance + 1:]
+        return distances
+
+    masks = _pattern_masks(pattern)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    vp, vn = full, 0
+    score = m
+
+    for j, ch in enumerate(text, 1):
+        eq = masks.get(ch, 0)
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        ph = vn | (~(xh | vp) & full)
+        mh = vp & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # Row 0 grows by one per text character (global alignment)
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        vp = mh | (~(xv | ph) & full)
+        vn = ph & xv
+        distances.append(score)
+
+        if max_distance is not None and score > max_distance:
+            # Every alignment of a longer prefix passes through this column,
+            # so the column minimum bounds all later distances from below.
+            if j - m > max_distance:
+                break
+            cell = lowest = j
+            bit = 1
+            for _ in range(m):
+                if vp & bit:
+                    cell += 1
+                elif vn & bit:
+                    cell -= 1
+                    if cell < lowest:
+                        lowest = cell
+                bit <<= 1
+            if lowest > max_distance:
+                break
+    return distances
 
 def hamming(s1, s2):
     if len(s1) != len(s2):
@@ -36,11 +110,113 @@ def search_grid(chakra, target, measure='exact', max_distance=0, script='kannada
     
     Returns a list of match dictionaries sorted by distance.
     """
-    results = []
+    results = list(_iter_grid_matches(chakra, target, measure, max_distance, script, use_sandhi))
+    
+    # Sort results by distance and path length
+    results.sort(key=lambda x: (x['distance'], len(x['path'])))
+    
+    # Deduplicate paths
+    unique_results = []
+    seen = set()
+    for res in results:
+        if res['path'] not in seen:
+            seen.add(res['path'])
+            unique_results.append(res)
+            
+    return unique_results
+
+def search_grid_page(chakra, target, measure='exact', max_distance=0, script='kannada', use_sandhi=False,
+                     limit=50, offset=0):
+    """
+    Returns one page of search_grid's results, matches offset..offset+limit-1,
+    without collecting and sorting every match.
+
+    A bounded heap keeps the best offset+limit matches by (distance, path
+    length), ties in scan order as in search_grid. Once the heap holds only
+    single-cell exact (distance 0) matches the scan stops, as nothing found
+    later can rank before them.
+
+    Returns:
+        (matches, total): total is the number of distinct matches when the
+        scan ran to the end, or None if it stopped early
+    """
+    keep = offset + limit
+    if limit <= 0:
+        return [], None
+
+    # Max-heap on rank via negated keys; the sequence number makes keys unique
+    heap = []
+    seen = set()
+    complete = True
+    matches = _iter_grid_matches(chakra, target, measure, max_distance, script, use_sandhi)
+    try:
+        for sequence, res in enumerate(matches):
+            if res['path'] in seen:
+                continue
+            seen.add(res['path'])
+            key = (-res['distance'], -len(res['path']), -sequence)
+            if len(heap) < keep:
+                heapq.heappush(heap, (key, res))
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, (key, res))
+            # Matches are ranked by (distance, cell count), neither below (0, 1)
+            if len(heap) == keep and heap[0][0][:2] == (0, -1):
+                complete = False
+                break
+    finally:
+        matches.close()
+
+    ranked = [res for _, res in sorted(heap, key=lambda item: item[0], reverse=True)]
+    return ranked[offset:], (len(seen) if complete else None)
+
+def _query_fingerprint(query):
+    encoded = json.dumps(query, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+def make_continuation_token(query, offset):
+    """Encodes the offset of the next page, tied to the query it belongs to."""
+    payload = json.dumps({'q': _query_fingerprint(query), 'o': offset}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def parse_continuation_token(token, query):
+    """Returns the offset stored in a token from make_continuation_token. Raises ValueError if it is invalid or belongs to another query."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        offset = int(payload['o'])
+        fingerprint = payload['q']
+    except Exception:
+        raise ValueError("Invalid continuation token") from None
+    if fingerprint != _query_fingerprint(query) or offset < 0:
+        raise ValueError("Continuation token does not match this query")
+    return offset
+
+def iter_search_grid(chakra, target, measure='exact', max_distance=0, script='kannada', use_sandhi=False, progress=False):
+    """
+    Generator version of search_grid: yields each match as soon as it is found,
+    in scan order (start row, start column, direction) rather than sorted.
+    Duplicate paths are skipped. Closing the generator stops the search.
+
+    With progress=True, None is also yielded after each start cell of the
+    slower scans, so a caller streaming the results regains control (e.g.
+    to send a heartbeat) even while no matches are found.
+    """
+    seen = set()
+    for res in _iter_grid_matches(chakra, target, measure, max_distance, script, use_sandhi, progress):
+        if res is None:
+            yield None
+        elif res['path'] not in seen:
+            seen.add(res['path'])
+            yield res
+
+def _iter_grid_matches(chakra, target, measure, max_distance, script, use_sandhi, progress=False):
+    """
+    Yields search_grid's matches in scan order, possibly with duplicate paths,
+    and None after each start cell of the slower scans if `progress` is set.
+    """
     rows, cols = 27, 27
     
     if not target:
-        return results
+        return
     
     # Step 1: Transliterate target to Devanagari for processing
     if script == 'kannada':
@@ -52,17 +228,22 @@ def search_grid(chakra, target, measure='exact', max_distance=0, script='kannada
     target_processed = Sandhi(target_devanagari) if use_sandhi else target_devanagari
     
     target_len = len(target_processed)
+
+    # Exact search without Sandhi is a plain substring lookup in the ray index
+    if measure == 'exact' and not use_sandhi and getattr(chakra, 'ray_index', None) is not None:
+        yield from _iter_exact_rays(chakra, target_processed, script)
+        return
+    if measure == 'hamming' and not use_sandhi and getattr(chakra, 'ray_index', None) is not None:
+        yield from _iter_hamming_rays(chakra, target_processed, max_distance, script)
+        return
+    if measure == 'levenshtein' and not use_sandhi and getattr(chakra, 'ray_index', None) is not None:
+        yield from _iter_levenshtein_rays(chakra, target_processed, max_distance, script, progress)
+        return
+    if use_sandhi and getattr(chakra, 'sandhi_index', None) is not None:
+        yield from _iter_sandhi_rays(chakra, target_processed, measure, max_distance, script, progress)
+        return
     
-    directions = [
-        (0, 1),   # Right
-        (1, 0),   # Down
-        (0, -1),  # Left
-        (-1, 0),  # Up
-        (1, 1),   # Down-Right
-        (1, -1),  # Down-Left
-        (-1, 1),  # Up-Right
-        (-1, -1)  # Up-Left
-    ]
+    directions = DIRECTIONS
     
     for r in range(rows):
         for c in range(cols):
@@ -86,19 +267,25 @@ def search_grid(chakra, target, measure='exact', max_distance=0, script='kannada
                     curr_r += dr
                     curr_c += dc
                 
-                # Try different path lengths for fuzzy matching
-                min_len = target_len if measure == 'exact' else max(1, target_len - max_distance)
+                # Try different path lengths for fuzzy matching; an akshara may
+                # have several characters, so even one cell may be long enough
+                min_len = target_len if measure == 'exact' else 1
                 max_len = target_len if measure == 'exact' else min(len(path), target_len + max_distance)
                 
+                # Each longer path extends the previous one by a cell, so its
+                # text and Sandhi are extended instead of rebuilt
+                test_text_dev = ""
+                test_text_display = ""
+                sandhi = SandhiTransducer() if use_sandhi else None
+                extended = 0
+                
                 for path_len in range(min_len, max_len + 1):
                     test_path = path[:path_len]
                     
                     # Extract text in both scripts
-                    test_text_dev = ""
-                    test_text_display = ""
                     valid_path = True
                     
-                    for pr, pc in test_path:
+                    for pr, pc in test_path[extended:]:
                         akshara_res = chakra.get_akshara_at(pr, pc, script)
                         if not akshara_res or akshara_res[0] == "?":
                             valid_path = False
@@ -108,12 +295,24 @@ def search_grid(chakra, target, measure='exact', max_distance=0, script='kannada
                         test_text_dev += akshara_res[1]
                         # Keep original script for display
                         test_text_display += akshara_res[0] if script == 'kannada' else akshara_res[1]
+                        if use_sandhi:
+                            sandhi.feed(akshara_res[1])
+                        extended += 1
                     
-                    if not valid_path or not test_text_dev:
+                    # Every longer path contains the same invalid cell
+                    if not valid_path:
+                        break
+                    if not test_text_dev:
+                        continue
+                    
+                    # Texts whose length alone rules them out are skipped before
+                    # their Sandhi is built (edit distance is at least the length difference)
+                    processed_len = len(sandhi) if use_sandhi else len(test_text_dev)
+                    if abs(processed_len - target_len) > (max_distance if measure == 'levenshtein' else 0):
                         continue
                     
                     # Apply Sandhi conversion in Devanagari
-                    test_processed = Sandhi(test_text_dev) if use_sandhi else test_text_dev
+                    test_processed = sandhi.snapshot() if use_sandhi else test_text_dev
                     
                     # Calculate distance based on measure
                     if measure == 'exact':
@@ -141,35 +340,400 @@ def search_grid(chakra, target, measure='exact', max_distance=0, script='kannada
                         # Only add Sandhi converted text if it's different from extracted
                         sandhi_converted = processed_display if use_sandhi and processed_display != test_text_display else None
                         
-                        results.append({
-                            'path': test_path,
+                        yield {
+                            'path': Path.from_points(test_path),
                             'extracted_text': test_text_display,
                             'sandhi_converted_text': sandhi_converted,
                             'distance': distance,
                             'measure': measure
-                        })
+                        }
                         
                         # For exact matches, we can break early
                         if measure == 'exact' and distance == 0:
                             break
-                
-                # Break early for exact matches
-                if measure == 'exact' and results and results[-1]['distance'] == 0:
-                    break
-    
-    # Sort results by distance and path length
-    results.sort(key=lambda x: (x['distance'], len(x['path'])))
-    
-    # Deduplicate paths
-    unique_results = []
-    seen = set()
-    for res in results:
-        path_tuple = tuple(tuple(p) for p in res['path'])
-        if path_tuple not in seen:
-            seen.add(path_tuple)
-            unique_results.append(res)
-            
-    return unique_results
+            if progress:
+                yield None
+
+def _iter_exact_rays(chakra, target_devanagari, script):
+    """
+    Exact straight-line search using the Chakra's precomputed ray index.
+    Matches must start and end on akshara boundaries.
+    """
+    extracted_text = transliterate_text(target_devanagari, 'kannada') if script == 'kannada' else target_devanagari
+    for _, _, path, _ in chakra.ray_index.find_exact(target_devanagari):
+        yield {
+            'path': path,
+            'extracted_text': extracted_text,
+            'sandhi_converted_text': None,
+            'distance': 0,
+            'measure': 'exact'
+        }
+
+def _iter_hamming_rays(chakra, target_devanagari, max_distance, script):
+    """
+    Hamming straight-line search on the ray index: a path matches when its
+    Devanagari text has the target's length and at most `max_distance` of
+    its characters differ.
+    """
+    for _, direction_index, path, distance in chakra.ray_index.find_hamming(target_devanagari, max_distance):
+        ray, first = chakra.ray_index.ray_from(path[0][0], path[0][1], direction_index)
+        test_text_dev = ray.text[ray.offsets[first]:ray.offsets[first + len(path)]]
+        yield {
+            'path': path,
+            'extracted_text': transliterate_text(test_text_dev, 'kannada') if script == 'kannada' else test_text_dev,
+            'sandhi_converted_text': None,
+            'distance': distance,
+            'measure': 'hamming'
+        }
+
+def _iter_levenshtein_rays(chakra, target_devanagari, max_distance, script, progress=False):
+    """
+    Levenshtein straight-line search using the ray index. One bit-parallel pass
+    per start cell and direction yields the distance of every prefix, so each
+    cell count along the ray is checked without recomputing the DP.
+    """
+    max_chars = len(target_devanagari) + max_distance
+    for r in range(27):
+        for c in range(27):
+            for direction_index in range(len(DIRECTIONS)):
+                ray, first = chakra.ray_index.ray_from(r, c, direction_index)
+                start = ray.offsets[first]
+                text = ray.text[start:start + max_chars]
+                invalid = text.find(INVALID_CELL)
+                if invalid != -1:
+                    text = text[:invalid]
+                distances = levenshtein_prefixes(target_devanagari, text, max_distance)
+                for end in range(first + 1, len(ray.cells) + 1):
+                    length = ray.offsets[end] - start
+                    if length >= len(distances):
+                        break
+                    distance = distances[length]
+                    if distance > max_distance:
+                        continue
+                    test_text_dev = text[:length]
+                    yield {
+                        'path': ray.cells[first:end],
+                        'extracted_text': transliterate_text(test_text_dev, 'kannada') if script == 'kannada' else test_text_dev,
+                        'sandhi_converted_text': None,
+                        'distance': distance,
+                        'measure': 'levenshtein'
+                    }
+            if progress:
+                yield None
+
+def _iter_sandhi_rays(chakra, target_processed, measure, max_distance, script, progress=False):
+    """
+    Sandhi straight-line search on the Chakra's Sandhi-normalized lines: the
+    same paths, path lengths and order as the scan in _iter_grid_matches,
+    with the Sandhi of every candidate read from the index instead of
+    converted again.
+    """
+    index = chakra.sandhi_index
+    display_table = chakra.akshara_tables.get('kannada' if script == 'kannada' else 'devanagari', AKSHARA_MAP)
+    grid = chakra.grid
+
+    def match(run, cells, processed, distance):
+        path = run.path[:cells]
+        test_text_display = ''.join(display_table[grid[r][c]] for r, c in path)
+        processed_display = transliterate_text(processed, 'kannada') if script == 'kannada' else processed
+        return {
+            'path': path,
+            'extracted_text': test_text_display,
+            'sandhi_converted_text': processed_display if processed_display != test_text_display else None,
+            'distance': distance,
+            'measure': measure
+        }
+
+    if measure == 'exact':
+        for r, c, direction_index, cells in index.exact.get(target_processed, ()):
+            yield match(index.runs[(r, c, direction_index)], cells, target_processed, 0)
+        return
+    if measure not in ('hamming', 'levenshtein'):
+        return
+
+    target_len = len(target_processed)
+    length_slack = max_distance if measure == 'levenshtein' else 0
+    for r in range(27):
+        for c in range(27):
+            for direction_index in range(len(DIRECTIONS)):
+                run = index.runs[(r, c, direction_index)]
+                max_len = min(target_len + max_distance, 27, run.available, len(run.path))
+                for cells in range(1, max_len + 1):
+                    # As in the converting scan, prefixes whose length alone
+                    # rules them out are skipped before their text is built
+                    if abs(run.prefix_length(cells) - target_len) > length_slack:
+                        continue
+                    processed = run.prefix(cells)
+                    if measure == 'hamming':
+                        distance = hamming(processed, target_processed)
+                    else:
+                        distance = levenshtein(processed, target_processed)
+                    if distance <= max_distance:
+                        yield match(run, cells, processed, distance)
+            if progress:
+                yield None
+
+# Bandha outputs recur across variants and searches, so their Sandhi is kept
+_cached_sandhi_alignment = lru_cache(maxsize=16384)(sandhi_alignment)
+
+def _generate_pattern_path(bandha, pattern_type, pattern_params):
+    """Generates the path for one pattern variant, or None for an unknown pattern type."""
+    # Zigzags and Shreni Bandha are prefixes of the precomputed maximal paths
+    shipped = shipped_prefix(pattern_type, pattern_params)
+    if shipped is not None:
+        return shipped.points()
+    if pattern_type == 'horizontal_zigzag':
+        return bandha.horizontal_zigzag(
+            pattern_params['start_row'],
+            pattern_params['start_col'],
+            pattern_params['length']
+        )
+    elif pattern_type == 'vertical_zigzag':
+        return bandha.vertical_zigzag(
+            pattern_params['start_row'],
+            pattern_params['start_col'],
+            pattern_params['length']
+        )
+    elif pattern_type == 'chess_knight':
+        return bandha.chess_knight_moves(
+            pattern_params['start_row'],
+            pattern_params['start_col'],
+            pattern_params['num_jumps'],
+            pattern_params.get('constraints')
+        )
+    elif pattern_type == 'shreni_bandha':
+        return bandha.shreni_bandha(
+            pattern_params['start_row'],
+            pattern_params['start_col'],
+            pattern_params['num_steps'],
+            pattern_params.get('direction', 'up')
+        )
+    return None
+
+def pattern_params_key(pattern_params):
+    """The canonical JSON of a variant's parameters, under which its path is cached."""
+    return json.dumps(pattern_params, sort_keys=True)
+
+@lru_cache(maxsize=8192)
+def _cached_pattern_path(pattern_type, params_key):
+    """Pattern paths depend only on their parameters, so they are shared across searches."""
+    return _generate_pattern_path(Bandha(), pattern_type, json.loads(params_key))
+
+def pattern_path(pattern_type, pattern_params, bandha=None):
+    """
+    Returns the Path for a pattern variant, or None for an unknown pattern
+    type. Paths are cached unless randomly generated (chess_knight without a
+    random_seed, drawn with `bandha` if given); they are immutable, so
+    cached ones are shared safely.
+    """
+    constraints = pattern_params.get('constraints') or {}
+    if pattern_type == 'chess_knight' and 'random_seed' not in constraints:
+        return _generate_pattern_path(bandha or Bandha(), pattern_type, pattern_params)
+    return _cached_pattern_path(pattern_type, pattern_params_key(pattern_params))
+
+class PatternSearchPlan:
+    """
+    A target prepared once for searching any number of bandha pattern variants.
+
+    The target is transliterated and Sandhi-converted in the constructor,
+    pattern paths are cached by their parameters, and text along a path is
+    read from the Chakra's per-number akshara tables instead of calling
+    Chakra.get_akshara_at for every cell.
+    """
+
+    def __init__(self, chakra, target, measure='exact', max_distance=0, script='kannada', use_sandhi=False):
+        self.chakra = chakra
+        self.target = target
+        self.measure = measure
+        self.max_distance = max_distance
+        self.script = script
+        self.use_sandhi = use_sandhi
+        self.bandha = Bandha()
+
+        if script == 'kannada':
+            target_devanagari = transliterate_text(target, 'devanagari')
+        else:
+            target_devanagari = target
+        self.target_processed = Sandhi(target_devanagari) if use_sandhi else target_devanagari
+
+        # Devanagari and display text for each grid number, from the Chakra's tables
+        self.devanagari_table = AKSHARA_MAP
+        self.display_table = chakra.akshara_tables.get('kannada' if script == 'kannada' else 'devanagari', AKSHARA_MAP)
+
+    def pattern_path(self, pattern_type, pattern_params):
+        """Returns the Path for a pattern variant; see the module-level pattern_path."""
+        return pattern_path(pattern_type, pattern_params, self.bandha)
+
+    def path_text(self, path):
+        """
+        Returns (devanagari, display) text along the path, or (None, None)
+        if the path leaves the grid or crosses a cell without an akshara.
+        """
+        grid = self.chakra.grid
+        if grid is None:
+            return None, None
+        try:
+            path = Path.from_points(path)
+        except ValueError:
+            return None, None
+        # All the path's grid numbers in one gather
+        numbers = np.asarray(grid).ravel()[path.flat()].tolist()
+        if not all(1 <= number <= 64 for number in numbers):
+            return None, None
+        dev_parts = [self.devanagari_table[number] for number in numbers]
+        display_parts = [self.display_table[number] for number in numbers]
+        return ''.join(dev_parts), ''.join(display_parts)
+
+    def search(self, pattern_type, pattern_params):
+        """
+        Matches the target along one pattern variant.
+        Behaves exactly like search_with_bandha_patterns.
+        """
+        results = []
+
+        if not self.target:
+            return results
+
+        measure = self.measure
+        max_distance = self.max_distance
+        use_sandhi = self.use_sandhi
+        target_processed = self.target_processed
+
+        try:
+            path = self.pattern_path(pattern_type, pattern_params)
+            if path is None:
+                return results
+
+            extracted_text_dev, extracted_text_display = self.path_text(path)
+            if not extracted_text_dev:
+                return results
+
+            target_len = len(target_processed)
+
+            # Try different path lengths for fuzzy matching (like standard search)
+            min_len = target_len if measure == 'exact' else max(1, target_len - max_distance)
+            max_len = target_len if measure == 'exact' else max(len(path), target_len + max_distance)
+            prefix_distances = None
+            if use_sandhi:
+                # Sandhi of the whole output once; that of each prefix is read off it
+                sandhi_text, _, sandhi_cuts = _cached_sandhi_alignment(extracted_text_dev)
+            if measure == 'levenshtein' and not use_sandhi:
+                # Distances of all prefixes in one pass instead of one DP per path_len
+                prefix_distances = levenshtein_prefixes(target_processed, extracted_text_dev[:max_len], max_distance)
+            for path_len in range(min_len, max_len + 1):
+                # Take only the first path_len characters
+                test_text_dev = extracted_text_dev[:path_len]
+                test_text_display = extracted_text_display[:path_len]
+
+                # Apply Sandhi to extracted text if enabled
+                if use_sandhi:
+                    length, tail = sandhi_cuts[len(test_text_dev)]
+                    test_processed = sandhi_text[:length] + tail
+                else:
+                    test_processed = test_text_dev
+
+                # Calculate distance based on measure
+                if measure == 'exact':
+                    if test_processed == target_processed:
+                        distance = 0
+                    else:
+                        continue
+                elif measure == 'hamming':
+                    # For hamming distance, allow different lengths by comparing substrings
+                    if len(test_processed) >= len(target_processed):
+                        # Compare first target_len characters
+                        distance = hamming(test_processed[:len(target_processed)], target_processed)
+                    else:
+                        # Compare entire test_processed with first test_len characters of target
+                        distance = hamming(test_processed, target_processed[:len(test_processed)])
+                elif measure == 'levenshtein':
+                    if prefix_distances is not None:
+                        prefix_len = len(test_processed)
+                        if prefix_len >= len(prefix_distances):
+                            continue
+                        distance = prefix_distances[prefix_len]
+                    else:
+                        distance = levenshtein(test_processed, target_processed)
+                else:
+                    continue
+
+                if distance <= max_distance:
+                    # Transliterate processed Devanagari back to target script for display
+                    if self.script == 'kannada':
+                        processed_display = transliterate_text(test_processed, 'kannada')
+                    else:
+                        processed_display = test_processed
+                    # Only add Sandhi converted text if it's different from extracted
+                    sandhi_converted = processed_display if use_sandhi and processed_display != test_text_display else None
+                    results = [{
+                        'path': path[:path_len],  # Use the truncated path
+                        'extracted_text': test_text_display,
+                        'sandhi_converted_text': sandhi_converted,
+                        'distance': distance,
+                        'measure': measure,
+                        'pattern_type': pattern_type,
+                        'pattern_params': pattern_params
+                    }]
+
+                    # For exact matches, we can break early
+                    if measure == 'exact' and distance == 0:
+                        break
+
+        except Exception as e:
+            print(f"Error in pattern search: {e}")
+            return results
+
+        return results
+
+    def variants(self, pattern_type):
+        """
+        Yields the pattern_params of every variant search_all_pattern_variants tries
+        for `pattern_type`: all starting positions and, where relevant, lengths or directions.
+        """
+        target_len = len(self.target)
+
+        if pattern_type in ['horizontal_zigzag', 'vertical_zigzag']:
+            # Try all starting positions
+            for start_row in range(27):
+                for start_col in range(27):
+                    yield {
+                        'start_row': start_row,
+                        'start_col': start_col,
+                        'length': target_len
+                    }
+
+        elif pattern_type == 'chess_knight':
+            # For knight moves, try different numbers of jumps
+            for num_jumps in range(target_len - 1, target_len + 2):  # Try nearby lengths
+                for start_row in range(27):
+                    for start_col in range(27):
+                        yield {
+                            'start_row': start_row,
+                            'start_col': start_col,
+                            'num_jumps': num_jumps,
+                            'constraints': None
+                        }
+
+        elif pattern_type == 'shreni_bandha':
+            # For Shreni Bandha, try both directions and all starting positions
+            # Generate a longer path to allow different length matching
+            max_path_length = min(target_len + self.max_distance + 3, 27)  # Add some extra length
+            for direction in ['up', 'down']:
+                for start_row in range(27):
+                    for start_col in range(27):
+                        yield {
+                            'start_row': start_row,
+                            'start_col': start_col,
+                            'num_steps': max_path_length,
+                            'direction': direction
+                        }
+
+    def search_variants(self, pattern_type, pattern_params_list):
+        """Searches every variant in `pattern_params_list` and returns the combined matches."""
+        all_results = []
+        for pattern_params in pattern_params_list:
+            all_results.extend(self.search(pattern_type, pattern_params))
+        return all_results
 
 def search_with_bandha_patterns(chakra, target, pattern_type, pattern_params, measure='exact', max_distance=0, script='kannada', use_sandhi=False):
     """
@@ -190,143 +754,10 @@ def search_with_bandha_patterns(chakra, target, pattern_type, pattern_params, me
     Returns:
         List of match dictionaries
     """
-    results = []
-    
-    if not target:
-        return results
+    plan = PatternSearchPlan(chakra, target, measure, max_distance, script, use_sandhi)
+    return plan.search(pattern_type, pattern_params)
 
-    # Create Bandha instance and generate path
-    bandha = Bandha()
-    
-    try:
-        if pattern_type == 'horizontal_zigzag':
-            path = bandha.horizontal_zigzag(
-                pattern_params['start_row'],
-                pattern_params['start_col'],
-                pattern_params['length']
-            )
-        elif pattern_type == 'vertical_zigzag':
-            path = bandha.vertical_zigzag(
-                pattern_params['start_row'],
-                pattern_params['start_col'],
-                pattern_params['length']
-            )
-        elif pattern_type == 'chess_knight':
-            path = bandha.chess_knight_moves(
-                pattern_params['start_row'],
-                pattern_params['start_col'],
-                pattern_params['num_jumps'],
-                pattern_params.get('constraints')
-            )
-        elif pattern_type == 'shreni_bandha':
-            path = bandha.shreni_bandha(
-                pattern_params['start_row'],
-                pattern_params['start_col'],
-                pattern_params['num_steps'],
-                pattern_params.get('direction', 'up')
-            )
-            # print(f'params {pattern_params} path {path}')
-        else:
-            return results
-        
-        # Extract text along the path
-        extracted_text_dev = ""
-        extracted_text_display = ""
-        valid_path = True
-        
-        for pr, pc in path:
-            akshara_res = chakra.get_akshara_at(pr, pc, script)
-            if not akshara_res or akshara_res[0] == "?":
-                valid_path = False
-                break
-            
-            # Get Devanagari for processing
-            extracted_text_dev += akshara_res[1]
-            # Keep original script for display
-            extracted_text_display += akshara_res[0] if script == 'kannada' else akshara_res[1]
-        # print(f'res 1 {results}')
-        if not valid_path or not extracted_text_dev:
-            # print(f'res not valid path {results}')
-            return results
-        
-        # Process target text
-        if script == 'kannada':
-            target_devanagari = transliterate_text(target, 'devanagari')
-        else:
-            target_devanagari = target
-        
-        target_processed = Sandhi(target_devanagari) if use_sandhi else target_devanagari
-        target_len = len(target_processed)
-        
-        # Try different path lengths for fuzzy matching (like standard search)
-        min_len = target_len if measure == 'exact' else max(1, target_len - max_distance)
-        max_len = target_len if measure == 'exact' else max(len(path), target_len + max_distance)
-        # print(f'path len {len(path)} other {target_len + max_distance} max {max_len} min {min_len}')
-        # print(f'res 3 {results}')
-        for path_len in range(min_len, max_len + 1):
-            # Take only the first path_len characters
-            test_text_dev = extracted_text_dev[:path_len]
-            test_text_display = extracted_text_display[:path_len]
-
-            # Apply Sandhi to extracted text if enabled
-            test_processed = Sandhi(test_text_dev) if use_sandhi else test_text_dev
-            # print(f'target_processed {target_processed} {target_len} test_processed {test_processed} {len(test_processed)} test_text dev {test_text_dev} {len(test_text_dev)} display {test_text_display} {len(test_text_display)}')
-
-            # Calculate distance based on measure
-            if measure == 'exact':
-                if test_processed == target_processed:
-                    distance = 0
-                else:
-                    continue
-            elif measure == 'hamming':
-                # For hamming distance, allow different lengths by comparing substrings
-                if len(test_processed) >= len(target_processed):
-                    # Compare first target_len characters
-                    test_substring = test_processed[:len(target_processed)]
-                    distance = hamming(test_substring, target_processed)
-                elif len(test_processed) <= len(target_processed):
-                    # Compare entire test_processed with first test_len characters of target
-                    target_substring = target_processed[:len(test_processed)]
-                    distance = hamming(test_processed, target_substring)
-                else:
-                    continue
-            elif measure == 'levenshtein':
-                distance = levenshtein(test_processed, target_processed)
-            else:
-                continue
-            # print(f'res 4 {results}')
-            if distance <= max_distance:
-                # Transliterate processed Devanagari back to target script for display
-                if script == 'kannada':
-                    processed_display = transliterate_text(test_processed, 'kannada')
-                else:
-                    processed_display = test_processed
-                # print(f'processed_display 5 {processed_display}')
-                # Only add Sandhi converted text if it's different from extracted
-                sandhi_converted = processed_display if use_sandhi and processed_display != test_text_display else None
-                # print(f'sandhi_converted 5 {sandhi_converted}')
-                results = []
-                results.append({
-                    'path': path[:path_len],  # Use the truncated path
-                    'extracted_text': test_text_display,
-                    'sandhi_converted_text': sandhi_converted,
-                    'distance': distance,
-                    'measure': measure,
-                    'pattern_type': pattern_type,
-                    'pattern_params': pattern_params
-                })
-                
-                # For exact matches, we can break early
-                if measure == 'exact' and distance == 0:
-                    break
-    
-    except Exception as e:
-        print(f"Error in pattern search: {e}")
-        return results
-    
-    return results
-
-def search_all_pattern_variants(chakra, target, pattern_type, measure='exact', max_distance=0, script='kannada', use_sandhi=False):
+def search_all_pattern_variants(chakra, target, pattern_type, measure='exact', max_distance=0, script='kannada', use_sandhi=False, executor=None):
     """
     Search using all possible starting positions and parameters for a given pattern type.
     
@@ -338,67 +769,27 @@ def search_all_pattern_variants(chakra, target, pattern_type, measure='exact', m
         max_distance: Maximum allowed distance for fuzzy matching
         script: Script to use ('kannada' or 'devanagari')
         use_sandhi: Whether to apply Sandhi conversion
+        executor: Optional src.parallel.PatternSearchExecutor to shard the
+            variants across worker processes; the results are the same
     
     Returns:
         List of match dictionaries
+
+    Without Sandhi, 'chess_knight' searches every knight path exhaustively
+    (see src.move_search) instead of one random path per start position.
     """
-    all_results = []
-    target_len = len(target)
-    
-    if pattern_type in ['horizontal_zigzag', 'vertical_zigzag']:
-        # Try all starting positions
-        for start_row in range(27):
-            for start_col in range(27):
-                pattern_params = {
-                    'start_row': start_row,
-                    'start_col': start_col,
-                    'length': target_len
-                }
-                
-                results = search_with_bandha_patterns(
-                    chakra, target, pattern_type, pattern_params,
-                    measure, max_distance, script, use_sandhi
-                )
-                all_results.extend(results)
-    
-    elif pattern_type == 'chess_knight':
-        # For knight moves, try different numbers of jumps
-        for num_jumps in range(target_len - 1, target_len + 2):  # Try nearby lengths
-            for start_row in range(27):
-                for start_col in range(27):
-                    pattern_params = {
-                        'start_row': start_row,
-                        'start_col': start_col,
-                        'num_jumps': num_jumps,
-                        'constraints': None
-                    }
-                    
-                    results = search_with_bandha_patterns(
-                        chakra, target, pattern_type, pattern_params,
-                        measure, max_distance, script, use_sandhi
-                    )
-                    all_results.extend(results)
-    
-    elif pattern_type == 'shreni_bandha':
-        # For Shreni Bandha, try both directions and all starting positions
-        # Generate longer paths to allow different length matching
-        for direction in ['up', 'down']:
-            for start_row in range(27):
-                for start_col in range(27):
-                    # Generate a longer path to allow different length matching
-                    max_path_length = min(len(target) + max_distance + 3, 27)  # Add some extra length
-                    pattern_params = {
-                        'start_row': start_row,
-                        'start_col': start_col,
-                        'num_steps': max_path_length,
-                        'direction': direction
-                    }
-                    
-                    results = search_with_bandha_patterns(
-                        chakra, target, pattern_type, pattern_params,
-                        measure, max_distance, script, use_sandhi
-                    )
-                    all_results.extend(results)
+    if pattern_type == 'chess_knight' and not use_sandhi:
+        if executor is not None:
+            return executor.search_knight_paths(chakra, target, measure, max_distance, script)
+        return search_knight_paths(chakra, target, measure, max_distance, script)
+
+    # The target is prepared once and reused for every variant
+    plan = PatternSearchPlan(chakra, target, measure, max_distance, script, use_sandhi)
+    if executor is None:
+        all_results = plan.search_variants(pattern_type, plan.variants(pattern_type))
+    else:
+        all_results = executor.search_variants(chakra, target, pattern_type, plan.variants(pattern_type),
+                                               measure, max_distance, script, use_sandhi)
     
     # Sort results by distance, path length, and then by position (top-left preference)
     all_results.sort(key=lambda x: (x['distance'], len(x['path']),
@@ -406,3 +797,203 @@ def search_all_pattern_variants(chakra, target, pattern_type, measure='exact', m
                                       x['pattern_params']['start_col']))
     
     return all_results
+
+def iter_all_pattern_variants(chakra, target, pattern_type, measure='exact', max_distance=0, script='kannada', use_sandhi=False, progress=False):
+    """
+    Generator version of search_all_pattern_variants: yields matches variant by
+    variant as they are found, unsorted. With progress=True, None is also
+    yielded after every variant (see iter_search_grid), or after every start
+    cell of the exhaustive knight search.
+    """
+    if pattern_type == 'chess_knight' and not use_sandhi:
+        yield from iter_move_paths(chakra, target, KNIGHT_MOVES, measure, max_distance, script, progress=progress)
+        return
+    plan = PatternSearchPlan(chakra, target, measure, max_distance, script, use_sandhi)
+    for pattern_params in plan.variants(pattern_type):
+        yield from plan.search(pattern_type, pattern_params)
+        if progress:
+            yield None
+
+def expand_param_grid(param_grid):
+    """
+    Expands a compact parameter spec into a list of pattern_params dicts.
+
+    Each key maps either to a single value, which every variant shares, or to
+    a list of values, which are combined as a cartesian product in key order.
+    E.g. {'start_row': [0, 1], 'start_col': [0, 1], 'length': 5} gives 4 variants.
+    """
+    variants = [{}]
+    for key, value in param_grid.items():
+        values = value if isinstance(value, list) else [value]
+        variants = [dict(variant, **{key: v}) for variant in variants for v in values]
+    return variants
+
+def search_bandha_pattern_batch(chakra, target, pattern_type, pattern_params_list, measure='exact', max_distance=0, script='kannada', use_sandhi=False, executor=None):
+    """
+    Runs search_with_bandha_patterns for every entry of `pattern_params_list`
+    in one call and returns the combined matches.
+
+    Args:
+        pattern_params_list: List of pattern_params dicts, as accepted by
+            search_with_bandha_patterns (see expand_param_grid for building one)
+        executor: Optional src.parallel.PatternSearchExecutor, as for
+            search_all_pattern_variants
+        Other arguments are as for search_with_bandha_patterns.
+
+    Returns:
+        List of match dictionaries sorted by distance, path length and start position
+    """
+    if not target:
+        return []
+
+    if executor is None:
+        plan = PatternSearchPlan(chakra, target, measure, max_distance, script, use_sandhi)
+        all_results = plan.search_variants(pattern_type, pattern_params_list)
+    else:
+        all_results = executor.search_variants(chakra, target, pattern_type, pattern_params_list,
+                                               measure, max_distance, script, use_sandhi)
+
+    all_results.sort(key=lambda x: (x['distance'], len(x['path']),
+                                      x['pattern_params'].get('start_row', 0),
+                                      x['pattern_params'].get('start_col', 0)))
+    return all_results
+
+# Formula families swept by search_formula_family: (formula, parameter ranges)
+FORMULA_FAMILIES = {
+    'linear': ('a*x + b', {'a': range(-5, 6), 'b': range(-130, 157)}),
+    'modular': ('(a*x + b) % 27', {'a': range(27), 'b': range(27)}),
+    'quadratic': ('(a*x^2 + b*x + c) % 27', {'a': range(1, 27), 'b': range(27), 'c': range(27)}),
+}
+
+def search_formula_family(chakra, target, formula=None, param_ranges=None, family=None, measure='exact', max_distance=0, script='kannada', use_sandhi=False):
+    """
+    Sweeps a parameterized y = f(x) formula over parameter ranges and finds
+    the paths whose cells spell the target.
+
+    Every member of the family is evaluated in one vectorised pass, members
+    that produce the same path are searched once, and the target is matched
+    against every run of consecutive cells along each path.
+
+    Args:
+        chakra: The Chakra object to search in
+        target: Target text to search for
+        formula: Formula in x and free parameters, e.g. 'a*x + b'
+        param_ranges: Dict mapping each parameter to a value or a list of values
+        family: Name of a preset in FORMULA_FAMILIES, used instead of formula;
+            param_ranges, if given, overrides its ranges
+        measure: Distance measure ('exact', 'hamming', 'levenshtein')
+        max_distance: Maximum allowed distance for fuzzy matching
+        script: Script to use ('kannada' or 'devanagari')
+        use_sandhi: Whether to apply Sandhi conversion
+
+    Returns:
+        List of match dictionaries sorted by distance and path length. Each
+        carries the parameters of the first member producing the path and
+        the number of equivalent members.
+    """
+    if family is not None:
+        if family not in FORMULA_FAMILIES:
+            raise FormulaError(f"Unknown formula family: {family}")
+        formula, preset_ranges = FORMULA_FAMILIES[family]
+        param_ranges = dict(preset_ranges, **(param_ranges or {}))
+    if not target or not formula or chakra.grid is None:
+        return []
+
+    compiled = compile_formula(formula)
+    ranges = {name: value if isinstance(value, (list, range)) else [value]
+              for name, value in (param_ranges or {}).items()}
+    combinations, values = compiled.evaluate_grid(ranges)
+    rows = values_to_rows(values)
+
+    # Search each distinct path once
+    unique_rows, first_member, member_counts = np.unique(rows, axis=0, return_index=True, return_counts=True)
+    paths = []
+    for path_rows in unique_rows:
+        cols = np.nonzero(path_rows >= 0)[0]
+        paths.append(Path.from_flat((path_rows[cols] * 27 + cols).tolist()))
+
+    plan = PatternSearchPlan(chakra, target, measure, max_distance, script, use_sandhi)
+    target_processed = plan.target_processed
+    target_codes = tokenize_to_codes(target_processed) if measure == 'exact' and not use_sandhi else None
+
+    grid = np.asarray(chakra.grid)
+    grid_codes = np.where((grid >= 1) & (grid <= 64), grid, 0).astype(np.int8)
+
+    matches = []  # (path index, first cell, cell count, distance)
+    if target_codes:
+        # Cell-aligned comparison of grid numbers, as in the ray index; only
+        # exact matches, as hamming counts differing characters, not aksharas
+        code_matrix = np.zeros((len(paths), 27), dtype=np.int8)
+        for i, path in enumerate(paths):
+            code_matrix[i, :len(path)] = grid_codes.ravel()[path.flat()]
+        for i, first, distance in match_code_windows(code_matrix, target_codes, 0):
+            matches.append((i, first, len(target_codes), distance))
+    elif measure == 'levenshtein' and not use_sandhi:
+        max_chars = len(target_processed) + max_distance
+        for i, path in enumerate(paths):
+            cell_texts = [AKSHARA_MAP[grid_codes[r, c]] if grid_codes[r, c] else INVALID_CELL for r, c in path]
+            for first in range(len(path)):
+                text = ''
+                ends = []  # character offset at which each cell ends
+                for cell_text in cell_texts[first:]:
+                    if cell_text == INVALID_CELL or len(text) >= max_chars:
+                        break
+                    text += cell_text
+                    ends.append(len(text))
+                distances = levenshtein_prefixes(target_processed, text, max_distance)
+                for cell_count, length in enumerate(ends, start=1):
+                    if length >= len(distances):
+                        break
+                    if distances[length] <= max_distance:
+                        matches.append((i, first, cell_count, distances[length]))
+    elif measure in ('exact', 'hamming', 'levenshtein'):
+        # Hamming, Sandhi, or a target that cannot be spelled with grid aksharas
+        max_cells = min(len(target_processed) + max_distance, 27)
+        for i, path in enumerate(paths):
+            for first in range(len(path)):
+                cell_texts = []
+                for r, c in path[first:first + max_cells]:
+                    if not grid_codes[r, c]:
+                        break
+                    cell_texts.append(AKSHARA_MAP[grid_codes[r, c]])
+                if use_sandhi:
+                    # Sandhi of the longest run once; that of each shorter run is read off it
+                    sandhi_text, _, sandhi_cuts = _cached_sandhi_alignment(''.join(cell_texts))
+                length = 0
+                for cell_count, cell_text in enumerate(cell_texts, start=1):
+                    length += len(cell_text)
+                    if use_sandhi:
+                        cut, tail = sandhi_cuts[length]
+                        test_processed = sandhi_text[:cut] + tail
+                    else:
+                        test_processed = ''.join(cell_texts[:cell_count])
+                    if measure == 'exact':
+                        distance = 0 if test_processed == target_processed else None
+                    elif measure == 'hamming':
+                        distance = hamming(test_processed, target_processed) if len(test_processed) == len(target_processed) else None
+                    else:
+                        distance = levenshtein(test_processed, target_processed)
+                    if distance is not None and distance <= max_distance:
+                        matches.append((i, first, cell_count, distance))
+
+    results = []
+    seen = set()
+    for i, first, cell_count, distance in sorted(matches, key=lambda m: (m[3], m[2], first_member[m[0]], m[1])):
+        path = paths[i][first:first + cell_count]
+        if path in seen:
+            continue
+        seen.add(path)
+        test_text_dev, test_text_display = plan.path_text(path)
+        test_processed = Sandhi(test_text_dev) if use_sandhi else test_text_dev
+        processed_display = transliterate_text(test_processed, 'kannada') if script == 'kannada' else test_processed
+        results.append({
+            'path': path,
+            'extracted_text': test_text_display,
+            'sandhi_converted_text': processed_display if use_sandhi and processed_display != test_text_display else None,
+            'distance': int(distance),
+            'measure': measure,
+            'pattern_type': 'formula',
+            'pattern_params': dict(combinations[first_member[i]], formula=compiled.text),
+            'equivalent_variants': int(member_counts[i]),
+        })
+    return results
@@ -4,6 +4,7 @@
 Transliteration utility for Indian languages.
 Ported from original Python 2.7 code (Transliterate.py and ChakraBandha_Basis.py).
 """
+from functools import lru_cache
 
 # Mapping of grid numbers (1-64) to Devanagari Aksharas
 # Based on ChakraBandha_Basis.py
@@ -74,6 +75,10 @@ AKSHARA_MAP[62] = "ः"
 AKSHARA_MAP[63] = "…"
 AKSHARA_MAP[64] = "::"
 
+# Reverse lookup of AKSHARA_MAP: Devanagari akshara -> grid number
+AKSHARA_CODES = {akshara: number for number, akshara in enumerate(AKSHARA_MAP) if akshara}
+MAX_AKSHARA_LEN = max(len(akshara) for akshara in AKSHARA_CODES)
+
 INDIAN_LANGUAGES = ['devanagari', 'bengali', 'gurmukhi', 'gujarati', 'oriya', 'tamizh', 'telugu', 'kannada', 'malayalam']
 INDIAN_UNICODE_START = {
     'devanagari': 0x0900,
@@ -127,11 +132,33 @@ def transliterate_char(ch, target_lang='kannada'):
     
     return chr(target_base + offset)
 
-def transliterate_text(text, target_lang='kannada'):
+@lru_cache(maxsize=None)
+def get_translation_table(target_lang, source_lang=None):
+    """
+    Returns a str.translate table mapping the source script block onto the
+    target script block, offset for offset.
+    With no source_lang, every Indian script block maps to the target, which
+    matches the per-character detection in transliterate_char.
+    """
+    target_base = INDIAN_UNICODE_START[target_lang]
+    sources = [source_lang] if source_lang is not None else INDIAN_LANGUAGES
+    table = {}
+    for lang in sources:
+        src_base = INDIAN_UNICODE_START[lang]
+        if src_base != target_base:
+            table.update({src_base + offset: target_base + offset for offset in range(128)})
+    return table
+
+def transliterate_text(text, target_lang='kannada', source_lang=None):
     """
     Transliterates a string to the target language.
+    Characters outside the source script block (or outside all Indian script
+    blocks when source_lang is None) are left unchanged.
     """
-    return ''.join(transliterate_char(c, target_lang) for c in text)
+    if target_lang not in INDIAN_UNICODE_START or (source_lang is not None and source_lang not in INDIAN_UNICODE_START):
+        # Unknown script names keep the per-character behaviour
+        return ''.join(transliterate_char(c, target_lang) for c in text)
+    return text.translate(get_translation_table(target_lang, source_lang))
 
 def get_kannada_for_number(num):
     """
@@ -141,3 +168,24 @@ def get_kannada_for_number(num):
         devanagari = AKSHARA_MAP[num]
         return transliterate_text(devanagari, 'kannada')
     return ""
+
+def tokenize_to_codes(text):
+    """
+    Splits Devanagari or Kannada text into its sequence of grid numbers (1-64).
+    Uses longest match over AKSHARA_MAP, so multi-character entries such as
+    "आा" (3) or "ॠृा" (12) are recognised as single aksharas.
+    Returns None if the text cannot be spelled with grid aksharas.
+    """
+    devanagari = transliterate_text(text, 'devanagari')
+    codes = []
+    i = 0
+    while i < len(devanagari):
+        for size in range(min(MAX_AKSHARA_LEN, len(devanagari) - i), 0, -1):
+            number = AKSHARA_CODES.get(devanagari[i:i + size])
+            if number is not None:
+                codes.append(number)
+                i += size
+                break
+        else:
+            return None
+    return codes
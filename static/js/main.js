@@ -1058,40 +1058,124 @@ document.addEventListener('DOMContentLoaded', () => {
 
             outputDiv.textContent = "Searching...";
 
-            fetch('/api/search', {
-                method: 'POST',
-                headers: getAuthHeaders({ 'Content-Type': 'application/json' }),
-                body: JSON.stringify({ target, measure, max_distance, script, use_sandhi })
+            // A new search cancels the previous one; the server stops it when the stream closes
+            if (activeSearch) {
+                activeSearch.abort();
+            }
+            const controller = new AbortController();
+            activeSearch = controller;
+
+            const matches = [];
+            let best = null;
+            const showMatches = (done) => {
+                if (!best) {
+                    outputDiv.textContent = done ? "No matches found." : "Searching...";
+                    return;
+                }
+                let resultText = done
+                    ? `Found (${matches.length} results). Best match dist: ${best.distance}.`
+                    : `Searching... ${matches.length} found so far. Best match dist: ${best.distance}.`;
+                resultText += `\nRaw extracted: ${best.extracted_text}`;
+                if (best.sandhi_converted_text) {
+                    resultText += `\nSandhi converted: ${best.sandhi_converted_text}`;
+                }
+                outputDiv.textContent = resultText;
+            };
+            const isBetter = (a, b) => !b || a.distance < b.distance ||
+                (a.distance === b.distance && a.path.length < b.path.length);
+
+            pathPoints = [];
+            cellCountSpan.textContent = 0;
+            drawGrid();
+
+            streamSearch({ target, measure, max_distance, script, use_sandhi }, controller.signal, match => {
+                matches.push(match);
+                if (isBetter(match, best)) {
+                    best = match;
+                    pathPoints = best.path.map(p => ({ r: p[0], c: p[1] }));
+                    cellCountSpan.textContent = pathPoints.length;
+                    drawGrid();
+                }
+                showMatches(false);
             })
-                .then(res => res.json())
-                .then(data => {
-                    if (data.matches && data.matches.length > 0) {
-                        const match = data.matches[0];
-                        pathPoints = match.path.map(p => ({ r: p[0], c: p[1] }));
-                        cellCountSpan.textContent = pathPoints.length;
-                        
-                        let resultText = `Found (${data.matches.length} results). Best match dist: ${match.distance}.`;
-                        resultText += `\nRaw extracted: ${match.extracted_text}`;
-                        if (match.sandhi_converted_text) {
-                            resultText += `\nSandhi converted: ${match.sandhi_converted_text}`;
-                        }
-                        
-                        outputDiv.textContent = resultText;
-                        drawGrid();
-                    } else {
-                        outputDiv.textContent = "No matches found.";
-                        pathPoints = [];
-                        cellCountSpan.textContent = 0;
-                        drawGrid();
-                    }
-                })
+                .then(() => showMatches(true))
                 .catch(err => {
+                    if (err.name === 'AbortError') return;
                     outputDiv.textContent = "Search error.";
                     console.error("Search error:", err);
+                })
+                .finally(() => {
+                    if (activeSearch === controller) activeSearch = null;
                 });
         });
     }
 
+    // Streams matches from /api/search/stream (NDJSON), calling onMatch for each one
+    let activeSearch = null;
+
+    async function streamSearch(body, signal, onMatch) {
+        const res = await fetch('/api/search/stream', {
+            method: 'POST',
+            headers: getAuthHeaders({ 'Content-Type': 'application/json', 'Accept': 'application/x-ndjson' }),
+            body: JSON.stringify(body),
+            signal
+        });
+        if (!res.ok) {
+            throw new Error(`Search failed with status ${res.status}`);
+        }
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line) continue;
+                const event = JSON.parse(line);
+                if (event.type === 'match') onMatch(event.match);
+                // The server gave up; the matches so far are not all of them
+                else if (event.type === 'error') throw new Error(event.error);
+            }
+        }
+    }
+
+    // Submits a background search job, polls it (calling onProgress with the
+    // job status) until it finishes, and resolves with its matches
+    const JOB_POLL_MS = 1000;
+
+    async function runSearchJob(body, onProgress) {
+        const submitted = await fetch('/api/jobs', {
+            method: 'POST',
+            headers: getAuthHeaders({ 'Content-Type': 'application/json' }),
+            body: JSON.stringify(body)
+        });
+        if (!submitted.ok) {
+            throw new Error(`Job submission failed with status ${submitted.status}`);
+        }
+        let { job } = await submitted.json();
+        while (job.status === 'queued' || job.status === 'running') {
+            onProgress(job);
+            await new Promise(resolve => setTimeout(resolve, JOB_POLL_MS));
+            const res = await fetch(`/api/jobs/${job.id}`, { headers: getAuthHeaders() });
+            if (!res.ok) {
+                throw new Error(`Job status failed with status ${res.status}`);
+            }
+            ({ job } = await res.json());
+        }
+        if (job.status !== 'done') {
+            throw new Error(job.error || `Job ${job.status}`);
+        }
+        const res = await fetch(`/api/jobs/${job.id}/results?format=compact`, { headers: getAuthHeaders() });
+        if (!res.ok) {
+            const data = await res.json().catch(() => null);
+            throw new Error((data && data.error) || `Job results failed with status ${res.status}`);
+        }
+        return decodeSearchResponse(await res.json());
+    }
+
     // Bandha Pattern Functions
     function getCurrentScript() {
         return (displayMode === 'ಅಕ್ಷರಗಳು') ? 'kannada' : 'devanagari';
@@ -1133,181 +1217,61 @@ document.addEventListener('DOMContentLoaded', () => {
             outputDiv.textContent = "Searching with pattern...";
 
             if (tryAllPatterns) {
-                // Try all pattern types
-                const allPatternTypes = ['horizontal_zigzag', 'vertical_zigzag', 'chess_knight', 'shreni_bandha'];
-                let allResults = [];
-                let completed = 0;
+                // Every variant of every pattern type runs as a background job on the
+                // server; poll it for progress and fetch the (already sorted) matches
+                runSearchJob({ target, measure, max_distance, script, use_sandhi }, job => {
+                    outputDiv.textContent = `Searching all patterns... ${Math.round(job.progress * 100)}%`;
+                })
+                    .then(data => handlePatternSearchResults(data, target))
+                    .catch(err => {
+                        console.error("Pattern search error:", err);
+                        outputDiv.textContent = "Pattern search failed: " + err.message;
+                    });
+            } else if (searchAllStartPositions) {
+                // Try all starting positions for selected pattern type
+                // console.log('Trying all starting positions for pattern:', patternType);
                 
-                allPatternTypes.forEach(patternType => {
-                    fetch('/api/search/all_pattern_variants', {
-                        method: 'POST',
-                        headers: getAuthHeaders({ 'Content-Type': 'application/json' }),
-                        body: JSON.stringify({ target, pattern_type: patternType, measure, max_distance, script, use_sandhi })
-                    })
+                // Describe all starting positions as a compact parameter grid;
+                // the server expands and evaluates every variant in one request
+                const allPositions = Array.from({ length: 27 }, (_, i) => i);
+                let paramGrid = null;
+
+                if (patternType === 'shreni_bandha') {
+                    paramGrid = {
+                        direction: ['up', 'down'],
+                        start_row: allPositions,
+                        start_col: allPositions,
+                        num_steps: target.length + 3 // Allow some extra length
+                    };
+                } else if (patternType === 'horizontal_zigzag' || patternType === 'vertical_zigzag') {
+                    paramGrid = {
+                        start_row: allPositions,
+                        start_col: allPositions,
+                        length: target.length
+                    };
+                } else if (patternType === 'chess_knight') {
+                    paramGrid = {
+                        start_row: allPositions,
+                        start_col: allPositions,
+                        num_jumps: target.length - 1,
+                        constraints: { random_seed: 42 }
+                    };
+                }
+
+                fetch('/api/search/bandha_pattern/batch', {
+                    method: 'POST',
+                    headers: getAuthHeaders({ 'Content-Type': 'application/json' }),
+                    body: JSON.stringify({ target, pattern_type: patternType, param_grid: paramGrid, measure, max_distance, script, use_sandhi, format: 'compact' })
+                })
                     .then(res => res.json())
+                    .then(decodeSearchResponse)
                     .then(data => {
-                        // Validate and filter results
-                        const validResults = (Array.isArray(data) ? data : []).filter(result => 
-                            result && typeof result === 'object' && 
-                            typeof result.distance !== 'undefined'
-                        );
-                        allResults = allResults.concat(validResults);
-                        completed++;
-                        if (completed === allPatternTypes.length) {
-                            // Sort and display all results
-                            allResults.sort((a, b) => {
-                                // Sort by distance first
-                                if (a.distance !== b.distance) return a.distance - b.distance;
-                                
-                                // Sort by path length (handle undefined paths)
-                                const aPathLength = a.path ? a.path.length : 0;
-                                const bPathLength = b.path ? b.path.length : 0;
-                                if (aPathLength !== bPathLength) return aPathLength - bPathLength;
-                                
-                                // Sort by position (handle undefined pattern_params)
-                                const aStartRow = a.pattern_params && a.pattern_params.start_row !== undefined ? a.pattern_params.start_row : 999;
-                                const bStartRow = b.pattern_params && b.pattern_params.start_row !== undefined ? b.pattern_params.start_row : 999;
-                                if (aStartRow !== bStartRow) return aStartRow - bStartRow;
-                                
-                                const aStartCol = a.pattern_params && a.pattern_params.start_col !== undefined ? a.pattern_params.start_col : 999;
-                                const bStartCol = b.pattern_params && b.pattern_params.start_col !== undefined ? b.pattern_params.start_col : 999;
-                                return aStartCol - bStartCol;
-                            });
-                            handlePatternSearchResults(allResults, target);
-                        }
+                        handlePatternSearchResults(data, target);
                     })
                     .catch(err => {
                         console.error("Pattern search error:", err);
                         outputDiv.textContent = "Pattern search failed. See console for details.";
                     });
-                });
-            } else if (searchAllStartPositions) {
-                // Try all starting positions for selected pattern type
-                // console.log('Trying all starting positions for pattern:', patternType);
-                
-                const allPatternTypes = [patternType]; // Only the selected pattern
-                let allResults = [];
-                let completed = 0;
-                
-                allPatternTypes.forEach(pType => {
-                    // Generate all possible starting positions and parameters
-                    const startPositions = [];
-                    
-                    if (pType === 'shreni_bandha') {
-                        // Generate all Shreni Bandha starting positions
-                        for (let direction of ['up', 'down']) {
-                            for (let startRow = 0; startRow < 27; startRow++) {
-                                for (let startCol = 0; startCol < 27; startCol++) {
-                                    startPositions.push({
-                                        pattern_type: pType,
-                                        pattern_params: {
-                                            start_row: startRow,
-                                            start_col: startCol,
-                                            num_steps: target.length + 3, // Allow some extra length
-                                            direction: direction
-                                        }
-                                    });
-                                }
-                            }
-                        }
-                    } else if (pType === 'horizontal_zigzag' || pType === 'vertical_zigzag') {
-                        // Generate all starting positions for zigzag patterns
-                        for (let startRow = 0; startRow < 27; startRow++) {
-                            for (let startCol = 0; startCol < 27; startCol++) {
-                                startPositions.push({
-                                    pattern_type: pType,
-                                    pattern_params: {
-                                        start_row: startRow,
-                                        start_col: startCol,
-                                        length: target.length
-                                    }
-                                });
-                            }
-                        }
-                    } else if (pType === 'chess_knight') {
-                        // Generate all starting positions for chess knight
-                        for (let startRow = 0; startRow < 27; startRow++) {
-                            for (let startCol = 0; startCol < 27; startCol++) {
-                                startPositions.push({
-                                    pattern_type: pType,
-                                    pattern_params: {
-                                        start_row: startRow,
-                                        start_col: startCol,
-                                        num_jumps: target.length - 1,
-                                        constraints: { random_seed: 42 }
-                                    }
-                                });
-                            }
-                        }
-                    }
-                    
-                    // console.log(`Generated ${startPositions.length} starting positions for ${pType}`);
-                    
-                    // Process positions in batches to avoid overwhelming the server
-                    const batchSize = 10; // Reduced from 50
-                    let processed = 0;
-                    
-                    function processBatch() {
-                        const batch = startPositions.slice(processed, processed + batchSize);
-                        if (batch.length === 0) {
-                            // All done for this pattern type
-                            completed++;
-                            if (completed === allPatternTypes.length) {
-                                // Sort and display all results
-                                allResults.sort((a, b) => {
-                                    if (a.distance !== b.distance) return a.distance - b.distance;
-                                    const aPathLength = a.path ? a.path.length : 0;
-                                    const bPathLength = b.path ? b.path.length : 0;
-                                    if (aPathLength !== bPathLength) return aPathLength - bPathLength;
-                                    const aStartRow = a.pattern_params && a.pattern_params.start_row !== undefined ? a.pattern_params.start_row : 999;
-                                    const bStartRow = b.pattern_params && b.pattern_params.start_row !== undefined ? b.pattern_params.start_row : 999;
-                                    if (aStartRow !== bStartRow) return aStartRow - bStartRow;
-                                    const aStartCol = a.pattern_params && a.pattern_params.start_col !== undefined ? a.pattern_params.start_col : 999;
-                                    const bStartCol = b.pattern_params && b.pattern_params.start_col !== undefined ? b.pattern_params.start_col : 999;
-                                    return aStartCol - bStartCol;
-                                });
-                                // console.log(`Final results: ${allResults.length} matches`);
-                                handlePatternSearchResults({ matches: allResults }, target);
-                            }
-                            return;
-                        }
-                        
-                        // Process this batch
-                        let batchCompleted = 0;
-                        batch.forEach(pos => {
-                            const requestBody = { target, pattern_type: pos.pattern_type, pattern_params: pos.pattern_params, measure, max_distance, script, use_sandhi };
-                            // console.log(`Request for position (${pos.pattern_params.start_row}, ${pos.pattern_params.start_col}):`, requestBody);
-                            fetch('/api/search/bandha_pattern', {
-                                method: 'POST',
-                                headers: getAuthHeaders({ 'Content-Type': 'application/json' }),
-                                body: JSON.stringify({ target, pattern_type: pos.pattern_type, pattern_params: pos.pattern_params, measure, max_distance, script, use_sandhi })
-                            })
-                            .then(res => res.json())
-                            .then(data => {
-                                // console.log(`API response for position (${pos.pattern_params.start_row}, ${pos.pattern_params.start_col}):`, data);
-                                if (data.matches && data.matches.length > 0) {
-                                    // console.log(`Found ${data.matches.length} matches!`);
-                                    allResults = allResults.concat(data.matches);
-                                }
-                                batchCompleted++;
-                                if (batchCompleted === batch.length) {
-                                    processed += batchSize;
-                                    setTimeout(processBatch, 100); // Increased delay from 10ms to 100ms
-                                }
-                            })
-                            .catch(err => {
-                                console.error("Pattern search error:", err);
-                                batchCompleted++;
-                                if (batchCompleted === batch.length) {
-                                    processed += batchSize;
-                                    setTimeout(processBatch, 100); // Increased delay from 10ms to 100ms
-                                }
-                            });
-                        });
-                    }
-                    
-                    processBatch();
-                });
             } else {
                 // Search with specific UI parameters
                 // console.log('Searching with specific UI parameters for pattern:', patternType);
@@ -1417,6 +1381,36 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Expands a compact search response (format "compact-v1", see src/encoding.py)
+    // into the regular { matches: [...] } shape. Other responses pass through.
+    const DIRECTIONS = [[0, 1], [1, 0], [0, -1], [-1, 0], [1, 1], [1, -1], [-1, 1], [-1, -1]];
+
+    function decodeCompactPath(encoded) {
+        if (!Array.isArray(encoded)) {
+            return encoded.c.map(cell => [Math.floor(cell / GRID_SIZE), cell % GRID_SIZE]);
+        }
+        const [startCell, direction, length] = encoded;
+        const [dr, dc] = DIRECTIONS[direction];
+        const r0 = Math.floor(startCell / GRID_SIZE);
+        const c0 = startCell % GRID_SIZE;
+        return Array.from({ length }, (_, i) => [r0 + i * dr, c0 + i * dc]);
+    }
+
+    function decodeSearchResponse(data) {
+        if (!data || data.format !== 'compact-v1') {
+            return data;
+        }
+        const { format, header, fields, matches, ...rest } = data;
+        rest.matches = matches.map(row => {
+            const match = { ...header };
+            fields.forEach((field, i) => {
+                match[field] = field === 'path' ? decodeCompactPath(row[i]) : row[i];
+            });
+            return match;
+        });
+        return rest;
+    }
+
     function handlePatternSearchResults(data, target) {
         if (data.matches && data.matches.length > 0) {
             const match = data.matches[0];
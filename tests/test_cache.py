@@ -0,0 +1,153 @@
+import unittest
+import json
+import sys
+import os
+import time
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache import LRUCache, TieredCache, MISSING, RedisCircuitBreaker, CircuitOpenError
+
+
+class FakeRedis:
+    """Minimal stand-in for the redis client methods the cache uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'b' is now least recently used
+        cache.set('c', 3)
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats()['hits'], 3)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_entries_expire(self):
+        cache = LRUCache(maxsize=4, ttl=0.01)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        self.assertIs(cache.get('a'), MISSING)
+
+
+class TestTieredCache(unittest.TestCase):
+    def test_remote_tier_fills_local_tier(self):
+        remote = FakeRedis()
+        remote.data['k'] = json.dumps([[1, 2]])
+        cache = TieredCache(LRUCache(), remote, remote_min_compute_seconds=0)
+
+        self.assertEqual(cache.get_or_compute('k', lambda: self.fail('computed')), [[1, 2]])
+        self.assertEqual(cache.get_or_compute('k', lambda: self.fail('computed')), [[1, 2]])
+        self.assertEqual(remote.gets, 1)
+        stats = cache.stats()
+        self.assertEqual(stats['local']['hits'], 1)
+        self.assertEqual(stats['remote']['hits'], 1)
+
+    def test_cheap_values_skip_remote(self):
+        remote = FakeRedis()
+        cache = TieredCache(LRUCache(), remote, remote_min_compute_seconds=10)
+
+        # The first miss goes to Redis, and teaches the cache how cheap the value is
+        cache.get_or_compute('a', lambda: 1, kind='cheap')
+        self.assertEqual(remote.gets, 1)
+        self.assertIn('a', remote.data)
+
+        cache.get_or_compute('b', lambda: 2, kind='cheap')
+        self.assertEqual(remote.gets, 1)
+        self.assertNotIn('b', remote.data)
+        self.assertEqual(cache.stats()['remote']['skipped'], 1)
+
+
+class FlakyRedis(FakeRedis):
+    """FakeRedis whose calls fail while `down` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    def get(self, key):
+        if self.down:
+            raise ConnectionError('redis down')
+        return super().get(key)
+
+    def ping(self):
+        if self.down:
+            raise ConnectionError('redis down')
+        return True
+
+
+class TestRedisCircuitBreaker(unittest.TestCase):
+    def test_opens_after_failures_and_closes_on_recovery(self):
+        client = FlakyRedis()
+        breaker = RedisCircuitBreaker(client, failure_threshold=2, probe_interval=0.01)
+        client.down = True
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.get('k')
+        self.assertEqual(breaker.state, 'open')
+
+        # While open, calls fail fast without reaching the client
+        gets = client.gets
+        with self.assertRaises(CircuitOpenError):
+            breaker.get('k')
+        self.assertEqual(client.gets, gets)
+
+        client.down = False
+        deadline = time.time() + 2
+        while breaker.state != 'closed' and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(breaker.state, 'closed')
+        self.assertIsNone(breaker.get('k'))
+
+    def test_tiered_cache_bypasses_open_breaker(self):
+        client = FlakyRedis()
+        client.down = True
+        breaker = RedisCircuitBreaker(client, failure_threshold=1, probe_interval=60)
+        cache = TieredCache(LRUCache(), breaker, remote_min_compute_seconds=0)
+        self.assertEqual(cache.get_or_compute('a', lambda: 1), 1)
+        self.assertEqual(breaker.state, 'open')
+        self.assertEqual(cache.get_or_compute('b', lambda: 2), 2)
+        self.assertEqual(cache.stats()['remote']['errors'], 1)
+        self.assertEqual(cache.stats()['remote']['skipped'], 1)
+
+
+class TestCachedBandhaEndpoints(unittest.TestCase):
+    def test_cache_hit_traverses_cached_path(self):
+        import app as app_module
+        client = app_module.app.test_client()
+        payload = {'start_row': 5, 'start_col': 5, 'length': 6, 'script': 'kannada'}
+
+        first = json.loads(client.post('/api/bandha/horizontal_zigzag', data=json.dumps(payload),
+                                       content_type='application/json').data)
+        second = json.loads(client.post('/api/bandha/horizontal_zigzag', data=json.dumps(payload),
+                                        content_type='application/json').data)
+        self.assertEqual(first, second)
+        self.assertTrue(second['text_without_sandhi'])
+
+        stats = json.loads(client.get('/cache/stats').data)
+        self.assertGreaterEqual(stats['tiers']['local']['hits'], 1)
+
+    def test_health_reports_breaker_state(self):
+        import app as app_module
+        client = app_module.app.test_client()
+        data = json.loads(client.get('/health').data)
+        self.assertIn(data['circuit_breaker']['state'], ('open', 'closed'))
+
+
+if __name__ == '__main__':
+    unittest.main()
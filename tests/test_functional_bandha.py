@@ -53,6 +53,53 @@ class TestFunctionalBandha(unittest.TestCase):
             self.assertTrue(0 <= r < 27)
             self.assertTrue(0 <= c < 27)
 
+    def test_skips_undefined_points(self):
+        """x values where the formula has no real value are skipped"""
+        points = self.bandha.generate_from_function("log(x)*5")
+        self.assertEqual(points[0], (0, 1))  # log(0) skipped
+        self.assertEqual(self.bandha.generate_from_function("x if x < 3 else 26 - x")[:4],
+                         [(0, 0), (1, 1), (2, 2), (23, 3)])
+        # Bitwise operators, as Python's eval evaluated them
+        self.assertEqual(self.bandha.generate_from_function("(x << 1) % 27 | 1")[:3], [(1, 0), (3, 1), (5, 2)])
+        self.assertEqual(self.bandha.generate_from_function("~x % 27")[0], (26, 0))
+        # Exact integer arithmetic beyond float64 precision
+        self.assertEqual(self.bandha.generate_from_function("x^x % 27")[26], (1, 26))
+
+    def test_rejects_unsafe_formulas(self):
+        """Only arithmetic and math functions are allowed"""
+        self.assertEqual(self.bandha.generate_from_function("__import__('os')"), [])
+        self.assertEqual(self.bandha.generate_from_function("x.real"), [])
+        self.assertEqual(self.bandha.generate_from_function("(x"), [])
+
+    def test_rejects_wrong_argument_counts(self):
+        """Math functions must be called with as many arguments as they take"""
+        from src.formula import compile_formula, FormulaError
+        for formula in ("sqrt(x, x)", "pow(x, 2, 5)", "sin()", "log(x, 2, 3)"):
+            with self.assertRaises(FormulaError):
+                compile_formula(formula)
+            self.assertEqual(self.bandha.generate_from_function(formula), [])
+        # Bandha compiles through src.formula, whose FormulaError the app catches
+        self.assertNotIn('formula', sys.modules)
+        # A rejected call must not have written into the shared x values
+        self.assertEqual(self.bandha.generate_from_function("x")[5], (5, 5))
+        response = self.app.post('/api/traverse', data=json.dumps({'formula': 'pow(x, 2, 5)'}),
+                                 content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['points'], [])
+
+    def test_parameterized_family(self):
+        """A family like a*x+b is evaluated over a parameter grid in one pass"""
+        from src.formula import compile_formula, values_to_rows, rows_to_path
+        self.assertEqual(self.bandha.generate_from_function("a*x + b", {'a': 2, 'b': 1})[:2], [(1, 0), (3, 1)])
+        self.assertEqual(self.bandha.generate_from_function("a*x + b"), [])  # missing parameters
+
+        formula = compile_formula("(a*x + b) % 27")
+        combinations, values = formula.evaluate_grid({'a': range(27), 'b': range(27)})
+        self.assertEqual(values.shape, (729, 27))
+        rows = values_to_rows(values)
+        for i in (0, 100, 728):
+            self.assertEqual(rows_to_path(rows[i]), Bandha().generate_from_function(formula.text, combinations[i]))
+
     def test_api_endpoint(self):
         """Test the /api/traverse endpoint with formula"""
         response = self.app.post('/api/traverse', 
@@ -26,6 +26,19 @@ class TestSiribhoovalaya(unittest.TestCase):
             # Test specific value at (0,0) which was 59 per inspection
             self.assertEqual(int(chakra.get_number_at(0,0)), 59)
             
+    def test_akshara_tables(self):
+        if os.path.exists(self.excel_path):
+            chakra = Chakra(self.excel_path, sheet_name='Chakra1-1-1')
+            from src.transliterate import INDIAN_LANGUAGES, transliterate_text
+            self.assertEqual(set(chakra.akshara_tables), set(INDIAN_LANGUAGES))
+            for script in INDIAN_LANGUAGES:
+                self.assertEqual(len(chakra.akshara_tables[script]), 65)
+                self.assertEqual(len(chakra.akshara_matrix[script]), 27)
+                self.assertEqual(chakra.akshara_matrix[script][0][0],
+                                 transliterate_text(AKSHARA_MAP[59], script))
+                self.assertEqual(chakra.get_akshara_at(0, 0, script),
+                                 (transliterate_text(AKSHARA_MAP[59], script), AKSHARA_MAP[59]))
+
     def test_transliteration(self):
         # Map 1 -> 'अ' -> Kannada 'ಅ'
         # Unicode for Kannada Letter A is \u0c85
@@ -38,6 +51,26 @@ class TestSiribhoovalaya(unittest.TestCase):
         # \u0c85 is independent A.
         self.assertEqual(kannada_char, '\u0c85')
 
+    def test_translate_tables(self):
+        from src.transliterate import transliterate_text, transliterate_char, INDIAN_LANGUAGES
+        text = 'ಸ್ಓೋ ॠृा:: स्ओो …'
+        for lang in INDIAN_LANGUAGES:
+            expected = ''.join(transliterate_char(c, lang) for c in text)
+            self.assertEqual(transliterate_text(text, lang), expected)
+        # An explicit source script only converts that block
+        self.assertEqual(transliterate_text('ಸ್स्', 'devanagari', source_lang='kannada'), 'स्स्')
+        self.assertEqual(transliterate_text('ಸ್स्', 'kannada', source_lang='telugu'), 'ಸ್स्')
+
+    def test_tokenize_to_codes(self):
+        from src.transliterate import tokenize_to_codes
+        # Longest match keeps multi-character aksharas whole
+        self.assertEqual(tokenize_to_codes('आाआ'), [3, 2])
+        self.assertEqual(tokenize_to_codes('ॠृा::'), [12, 64])
+        # Kannada input is tokenized through Devanagari
+        self.assertEqual(tokenize_to_codes('ಸ್ಓೋ'), [59, 23])
+        # Text that no sequence of grid aksharas can spell
+        self.assertIsNone(tokenize_to_codes('सो'))
+
     def test_search_grid(self):
         if os.path.exists(self.excel_path):
             chakra = Chakra(self.excel_path, sheet_name='Chakra1-1-1')
@@ -69,5 +102,87 @@ class TestSiribhoovalaya(unittest.TestCase):
             self.assertTrue(len(res_l) > 0)
             self.assertLessEqual(res_l[0]['distance'], 1)
 
+    def test_ray_index_exact_search(self):
+        if os.path.exists(self.excel_path):
+            chakra = Chakra(self.excel_path, sheet_name='Chakra1-1-1')
+            from src.search import search_grid
+            self.assertIsNotNone(chakra.ray_index)
+
+            # Three cells down the first column, spelled in Devanagari
+            target = ''.join(chakra.get_akshara_at(r, 0, 'devanagari')[1] for r in range(3))
+            res = search_grid(chakra, target, measure='exact', script='devanagari')
+            paths = [m['path'] for m in res]
+            self.assertIn([[0, 0], [1, 0], [2, 0]], paths)
+            for m in res:
+                text = ''.join(chakra.get_akshara_at(r, c, 'devanagari')[1] for r, c in m['path'])
+                self.assertEqual(text, target)
+                self.assertEqual(m['extracted_text'], target)
+
+            # A match may not end inside a multi-character akshara such as 'ओो'
+            partial = chakra.get_akshara_at(0, 0)[1] + chakra.get_akshara_at(0, 1)[1][0]
+            res = search_grid(chakra, partial, measure='exact', script='devanagari')
+            self.assertNotIn([[0, 0], [0, 1]], [m['path'] for m in res])
+
+    def test_vectorized_hamming_search(self):
+        if os.path.exists(self.excel_path):
+            chakra = Chakra(self.excel_path, sheet_name='Chakra1-1-1')
+            from src.search import search_grid
+
+            # First three cells of row 0 with the middle akshara's first character replaced
+            middle = chakra.get_akshara_at(0, 1, 'devanagari')[1]
+            target = (chakra.get_akshara_at(0, 0, 'devanagari')[1] + 'ह' + middle[1:]
+                      + chakra.get_akshara_at(0, 2, 'devanagari')[1])
+            res = search_grid(chakra, target, measure='hamming', max_distance=1, script='devanagari')
+            self.assertIn([[0, 0], [0, 1], [0, 2]], [m['path'] for m in res])
+            for m in res:
+                # Distances count differing characters of equal-length texts
+                self.assertEqual(len(m['extracted_text']), len(target))
+                self.assertEqual(m['distance'], sum(a != b for a, b in zip(m['extracted_text'], target)))
+                self.assertLessEqual(m['distance'], 1)
+
+            # The ray index finds what the scan of every line finds
+            unindexed = Chakra.from_grid(chakra.grid)
+            unindexed.ray_index = None
+            for target, max_distance in ((target, 1), ('ओोकह्', 2), ('रान', 2)):
+                self.assertEqual(search_grid(chakra, target, 'hamming', max_distance, 'devanagari'),
+                                 search_grid(unindexed, target, 'hamming', max_distance, 'devanagari'))
+
+    def test_pattern_search_plan(self):
+        if os.path.exists(self.excel_path):
+            chakra = Chakra(self.excel_path, sheet_name='Chakra1-1-1')
+            from src.search import PatternSearchPlan, search_all_pattern_variants
+
+            # Horizontal zigzag from (1, 0): right to (1, 1), then up to (0, 1)
+            target = ''.join(chakra.get_akshara_at(r, c)[0] for r, c in [(1, 0), (1, 1), (0, 1)])
+            plan = PatternSearchPlan(chakra, target)
+            params = {'start_row': 1, 'start_col': 0, 'length': 3}
+            res = plan.search('horizontal_zigzag', params)
+            self.assertEqual(len(res), 1)
+            self.assertEqual(res[0]['path'], [(1, 0), (1, 1), (0, 1)])
+            self.assertEqual(res[0]['extracted_text'], target)
+
+            # Cached paths are immutable, so callers cannot corrupt the cache
+            with self.assertRaises(AttributeError):
+                plan.pattern_path('horizontal_zigzag', params).append((9, 9))
+            self.assertEqual(len(plan.pattern_path('horizontal_zigzag', params)), 3)
+
+            all_res = search_all_pattern_variants(chakra, target, 'horizontal_zigzag')
+            self.assertIn((1, 0), [m['path'][0] for m in all_res if m['distance'] == 0])
+
+    def test_levenshtein_prefixes(self):
+        from src.search import levenshtein, levenshtein_prefixes
+        pattern = 'स्ओम्'
+        text = 'स्ओोम्अ'
+        distances = levenshtein_prefixes(pattern, text)
+        self.assertEqual(len(distances), len(text) + 1)
+        for j in range(len(text) + 1):
+            self.assertEqual(distances[j], levenshtein(pattern, text[:j]))
+        self.assertEqual(levenshtein('kitten', 'sitting'), 3)
+
+        # With a cutoff the list stops once no longer prefix can match
+        far = levenshtein_prefixes('abc', 'xyzxyzxyz', max_distance=1)
+        self.assertLess(len(far), 10)
+        self.assertTrue(all(d > 1 for d in far[1:]))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import json
+import subprocess
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from src.jobs import JobStore, INTERRUPTED_ERROR
+from src.search import search_all_pattern_variants
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.tmpdir.name, 'jobs.db'))
+        self.store.init_db()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_identical_in_flight_jobs_are_deduplicated(self):
+        job_id, created = self.store.create_or_get('all_pattern_variants', {'target': 'a'}, 'key', os.getpid())
+        self.assertTrue(created)
+        self.assertEqual(self.store.create_or_get('all_pattern_variants', {'target': 'a'}, 'key', os.getpid()),
+                         (job_id, False))
+
+        self.store.finish(job_id, [{'distance': 0}])
+        self.assertEqual(self.store.result(job_id), [{'distance': 0}])
+        new_id, created = self.store.create_or_get('all_pattern_variants', {'target': 'a'}, 'key', os.getpid())
+        self.assertTrue(created)
+        self.assertNotEqual(new_id, job_id)
+
+    def test_jobs_of_dead_processes_are_failed(self):
+        finished = subprocess.Popen([sys.executable, '-c', 'pass'])
+        finished.wait()
+        job_id, _ = self.store.create_or_get('all_pattern_variants', {'target': 'a'}, 'key', finished.pid)
+        job = self.store.get(job_id)
+        self.assertEqual((job['status'], job['error']), ('failed', INTERRUPTED_ERROR))
+        self.assertIsNone(self.store.result(job_id))
+
+
+class TestJobEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = app_module.app.test_client()
+        self.chakra = app_module.chakra
+
+        auth_db_path = app_module.AUTH_DB_PATH
+        if os.path.exists(auth_db_path):
+            os.remove(auth_db_path)
+        app_module.init_auth_db()
+
+        resp = self.app.post(
+            "/api/auth/register",
+            data=json.dumps({"email": "jobs@example.com", "password": "StrongPass1!"}),
+            content_type="application/json",
+        )
+        assert resp.status_code == 201, resp.data
+        self.auth_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {json.loads(resp.data)['access_token']}",
+        }
+
+    def test_job_results_match_inline_search(self):
+        """A submitted job finishes in the process pool with the same matches as the inline endpoint."""
+        target = ''.join(self.chakra.get_akshara_at(0, c)[0] for c in range(2))
+        payload = {'target': target, 'pattern_types': ['horizontal_zigzag', 'vertical_zigzag']}
+        response = self.app.post('/api/jobs', data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.data)['job']['id']
+
+        response = self.app.get(f'/api/jobs/{job_id}/stream', headers=self.auth_headers)
+        events = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual(events[-1]['type'], 'done', events[-1])
+        self.assertEqual(events[-1]['job']['progress'], 1)
+
+        data = json.loads(self.app.get(f'/api/jobs/{job_id}/results', headers=self.auth_headers).data)
+        expected = []
+        for pattern_type in payload['pattern_types']:
+            expected.extend(search_all_pattern_variants(self.chakra, target, pattern_type))
+        expected.sort(key=lambda x: (x['distance'], len(x['path']),
+                                     x['pattern_params']['start_row'], x['pattern_params']['start_col']))
+        self.assertEqual([m['path'] for m in data['matches']], [m['path'] for m in expected])
+        self.assertEqual(data['job_id'], job_id)
+
+    def test_stream_of_long_job_asks_client_to_reconnect(self):
+        store = app_module.job_queue.store
+        job_id, _ = store.create_or_get('all_pattern_variants', {'target': 'a'}, f'stream-{time.time()}', os.getpid())
+        limit = app_module.JOB_STREAM_MAX_SECONDS
+        app_module.JOB_STREAM_MAX_SECONDS = 0
+        try:
+            response = self.app.get(f'/api/jobs/{job_id}/stream', headers=self.auth_headers)
+        finally:
+            app_module.JOB_STREAM_MAX_SECONDS = limit
+        events = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual([event['type'] for event in events], ['reconnect'])
+        self.assertEqual(events[0]['job']['status'], 'queued')
+        store.fail(job_id, 'test')
+
+    def test_rejects_invalid_jobs(self):
+        response = self.app.post('/api/jobs', data=json.dumps({'target': 'ಅ', 'pattern_types': ['spiral']}),
+                                 headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.app.get('/api/jobs/missing', headers=self.auth_headers).status_code, 404)
+        self.assertEqual(self.app.get('/api/jobs/missing').status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import json
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chakra import Chakra
+from src.lexicon import LexiconError, lexicon_shards, main, match_lexicon, read_lexicon
+from src.multi_search import search_targets
+
+EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Adhyaya_One_Chakras.xlsx')
+
+
+class Interrupted(Exception):
+    pass
+
+
+class TestLexiconMatcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
+        along = lambda points: ''.join(cls.chakra.get_akshara_at(r, c)[0] for r, c in points)
+        cls.words = [along([(0, 0), (0, 1), (0, 2)]), along([(10, 10), (10, 11), (9, 11)]), along([(3, 3), (4, 4)])]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.lexicon = os.path.join(self.tmpdir, 'words.txt')
+        with open(self.lexicon, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(f"{word}\tgloss" for word in self.words + self.words[:1]) + '\n\n')
+        self.db_path = os.path.join(self.tmpdir, 'hits.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _hits(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return set(conn.execute("SELECT word, pattern, params, cells FROM hits"))
+
+    def test_hits_cover_multi_target_search(self):
+        self.assertEqual(read_lexicon(self.lexicon), self.words)
+        summary = match_lexicon(self.lexicon, self.chakra, self.db_path, workers=0)
+        self.assertEqual(summary['shards'], len(lexicon_shards()))
+        self.assertEqual(summary['words'], 3)
+
+        hits = self._hits()
+        self.assertEqual(summary['hits'], len(hits))
+        matches, _ = search_targets(self.chakra, self.words)
+        self.assertEqual({(word, cells) for word, _, _, cells in hits},
+                         {(m['target'], json.dumps(m['path'].to_list())) for m in matches})
+        self.assertIn((self.words[1], 'horizontal_zigzag', [[10, 10], [10, 11], [9, 11]]),
+                      [(word, pattern, json.loads(cells)) for word, pattern, _, cells in hits])
+
+    def test_interrupted_run_resumes(self):
+        match_lexicon(self.lexicon, self.chakra, self.db_path, workers=0)
+        expected = self._hits()
+        os.remove(self.db_path)
+
+        def interrupt(done, total):
+            if done == 5:
+                raise Interrupted()
+
+        with self.assertRaises(Interrupted):
+            match_lexicon(self.lexicon, self.chakra, self.db_path, workers=0, progress=interrupt)
+        summary = match_lexicon(self.lexicon, self.chakra, self.db_path, workers=0)
+        self.assertEqual(summary['resumed_shards'], 5)
+        self.assertEqual(self._hits(), expected)
+
+    def test_other_run_needs_fresh(self):
+        match_lexicon(self.lexicon, self.chakra, self.db_path, sources=['rays'], workers=0)
+        with self.assertRaises(LexiconError):
+            match_lexicon(self.lexicon, self.chakra, self.db_path, unit='devanagari', workers=0)
+        summary = match_lexicon(self.lexicon, self.chakra, self.db_path, unit='devanagari', workers=0, fresh=True)
+        self.assertEqual(summary['resumed_shards'], 0)
+
+    def test_command_line(self):
+        main([self.lexicon, '--out', self.db_path, '--sources', 'rays', '--workers', '0', '--excel', EXCEL_PATH])
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chakra import Chakra
+from src.move_search import (KNIGHT_MOVES, STEP_SETS, SearchBudgetError, max_move_distance, move_neighbors,
+                              resolve_moves, search_knight_paths, search_move_paths)
+from src.search import levenshtein, hamming, search_all_pattern_variants
+from src.transliterate import AKSHARA_MAP, transliterate_text
+
+EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Adhyaya_One_Chakras.xlsx')
+
+
+class TestKnightPathSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
+        cls.texts = [AKSHARA_MAP[n] if 1 <= n <= 64 else None for n in cls.chakra.grid.ravel().tolist()]
+        cls.neighbors = move_neighbors(KNIGHT_MOVES)
+
+    def _target_along(self, points):
+        return ''.join(self.chakra.get_akshara_at(r, c)[0] for r, c in points)
+
+    def _brute_force(self, target, measure, max_distance, max_cells, neighbors=None):
+        """Every simple path of up to max_cells cells, checked one by one."""
+        neighbors = neighbors or self.neighbors
+        target_dev = transliterate_text(target, 'devanagari')
+        found = {}
+
+        def visit(cells):
+            text = ''.join(self.texts[cell] for cell in cells)
+            if measure == 'levenshtein':
+                distance = levenshtein(text, target_dev)
+            else:
+                distance = hamming(text, target_dev)
+            if distance <= max_distance:
+                found[tuple(cells)] = distance
+            if len(cells) < max_cells:
+                for cell in neighbors[cells[-1]]:
+                    if cell not in cells and self.texts[cell] is not None:
+                        visit(cells + [cell])
+
+        for start in range(729):
+            if self.texts[start] is not None:
+                visit([start])
+        return found
+
+    def test_finds_every_matching_path(self):
+        target = self._target_along([(0, 0), (2, 1)])
+        # Every cell has at least one character, so no match has more cells than this
+        max_chars = len(transliterate_text(target, 'devanagari'))
+        for measure, max_distance in (('exact', 0), ('hamming', 1), ('levenshtein', 1)):
+            results = search_knight_paths(self.chakra, target, measure, max_distance)
+            found = {tuple(m['path'].flat()): m['distance'] for m in results}
+            max_cells = max_chars + (max_distance if measure == 'levenshtein' else 0)
+            self.assertEqual(found, self._brute_force(target, measure, max_distance, max_cells), measure)
+
+    def test_exact_paths_spell_target(self):
+        path = [(0, 0), (2, 1), (4, 2), (6, 3), (8, 4)]
+        target = self._target_along(path)
+        results = search_knight_paths(self.chakra, target)
+        self.assertIn(path, [m['path'] for m in results])
+        self.assertTrue(all(m['extracted_text'] == target and m['distance'] == 0 for m in results))
+        self.assertEqual(results, search_knight_paths(self.chakra, target))
+
+        # search_all_pattern_variants uses the exhaustive search instead of random sampling
+        variants = search_all_pattern_variants(self.chakra, target, 'chess_knight')
+        self.assertEqual([m['path'] for m in variants], [m['path'] for m in results])
+        self.assertEqual(variants[0]['pattern_type'], 'chess_knight')
+
+    def test_move_graphs_match_brute_force(self):
+        """King moves, and custom steps folded over the edges, find every matching path."""
+        for moves, fold, points in (('king', False, [(3, 3), (4, 4)]),
+                                    ([(0, 3), (3, 0)], True, [(0, 0), (0, 3)])):
+            neighbors = move_neighbors(resolve_moves(moves), fold)
+            target = self._target_along(points)
+            max_chars = len(transliterate_text(target, 'devanagari'))
+            for measure, max_distance in (('exact', 0), ('hamming', 1), ('levenshtein', 1)):
+                results = search_move_paths(self.chakra, target, moves, fold, measure, max_distance)
+                found = {tuple(m['path'].flat()): m['distance'] for m in results}
+                max_cells = max_chars + (max_distance if measure == 'levenshtein' else 0)
+                expected = self._brute_force(target, measure, max_distance, max_cells, neighbors)
+                self.assertEqual(found, expected, (moves, measure))
+                self.assertEqual(search_move_paths(self.chakra, target, moves, fold, measure, max_distance, limit=3),
+                                 results[:3])
+
+    def test_fold_wraps_at_edges(self):
+        neighbors = move_neighbors(STEP_SETS['shreni'], fold=True)
+        # Up-right from the top edge re-enters at the bottom, as in Bandha.shreni_bandha
+        self.assertEqual(neighbors[0 * 27 + 13], (26 * 27 + 14, 1 * 27 + 12))
+        self.assertEqual(move_neighbors(STEP_SETS['shreni'])[0 * 27 + 13], (1 * 27 + 12,))
+
+    def test_bounded_work(self):
+        target = self._target_along([(3, 3), (4, 4)])
+        cap = max_move_distance(target)
+        with self.assertRaises(ValueError):
+            search_move_paths(self.chakra, target, 'king', False, 'levenshtein', cap + 1)
+        # Exact search ignores max_distance
+        self.assertTrue(search_move_paths(self.chakra, target, 'king', False, 'exact', cap + 1))
+        with self.assertRaises(SearchBudgetError) as raised:
+            search_move_paths(self.chakra, target, 'king', False, 'levenshtein', cap, max_nodes=100, limit=20)
+        # The matches found before giving up come with the error, ranked and limited like results
+        full = search_move_paths(self.chakra, target, 'king', False, 'levenshtein', cap)
+        partial = raised.exception.matches
+        self.assertEqual(len(partial), 20)
+        self.assertTrue(all(match in full for match in partial))
+        self.assertEqual(partial, sorted(partial, key=lambda m: (m['distance'], len(m['path']))))
+
+    def test_resolve_moves_rejects_bad_steps(self):
+        self.assertEqual(resolve_moves([[1, 2], [2, 1]]), ((1, 2), (2, 1)))
+        for moves in ('bishop', [], [[0, 0]], [[1]], [[27, 0]]):
+            with self.assertRaises(ValueError):
+                resolve_moves(moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
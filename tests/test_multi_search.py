@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chakra import Chakra
+from src.multi_search import MultiTargetSearch, TargetAutomaton, search_targets
+from src.search import search_grid
+from src.transliterate import AKSHARA_MAP, transliterate_text
+
+EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Adhyaya_One_Chakras.xlsx')
+
+
+class TestTargetAutomaton(unittest.TestCase):
+    def test_scan_reports_overlapping_occurrences(self):
+        automaton = TargetAutomaton(['he', 'she', 'his', 'hers', ''])
+        self.assertEqual(sorted(automaton.scan('ushers')), [(4, 0), (4, 1), (6, 3)])
+        self.assertEqual(list(automaton.prefixes('hershe')), [(2, 0), (4, 3)])
+        self.assertEqual(list(automaton.scan([1, 2])), [])
+
+
+class TestMultiTargetSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
+        along = lambda points: ''.join(cls.chakra.get_akshara_at(r, c)[0] for r, c in points)
+        cls.targets = [
+            along([(0, 0), (0, 1), (0, 2)]),
+            along([(4, 4), (5, 5)]),
+            along([(10, 10), (10, 11), (9, 11)]),  # horizontal zigzag from (10, 10)
+            'ಕ್ಷz',  # not spelled with grid aksharas
+        ]
+
+    def test_ray_matches_equal_search_grid(self):
+        matches, invalid = search_targets(self.chakra, self.targets, sources=['rays'])
+        self.assertEqual(invalid, ['ಕ್ಷz'])
+        for target in self.targets[:3]:
+            expected = sorted(m['path'].flat() for m in search_grid(self.chakra, target))
+            self.assertEqual(sorted(m['path'].flat() for m in matches if m['target'] == target), expected)
+
+    def test_bandha_matches_spell_target(self):
+        matches, _ = search_targets(self.chakra, self.targets)
+        bandha = [m for m in matches if 'pattern_type' in m]
+        self.assertIn(([(10, 10), (10, 11), (9, 11)], 'horizontal_zigzag'),
+                      [(m['path'], m['pattern_type']) for m in bandha])
+        grid = self.chakra.grid
+        for m in matches:
+            text = ''.join(AKSHARA_MAP[int(grid[r][c])] for r, c in m['path'])
+            self.assertEqual(text, transliterate_text(m['target'], 'devanagari'))
+        # Every path is reported once per target
+        self.assertEqual(len({(m['target'], m['path']) for m in matches}), len(matches))
+
+    def test_devanagari_unit_agrees_with_codes(self):
+        codes = MultiTargetSearch(self.targets[:3]).search(self.chakra)
+        devanagari = MultiTargetSearch(self.targets[:3], unit='devanagari').search(self.chakra)
+        self.assertEqual(devanagari, codes)
+        with self.assertRaises(ValueError):
+            MultiTargetSearch(self.targets, unit='bytes')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chakra import Chakra
+from src.parallel import PatternSearchExecutor, split_shards
+from src.search import search_all_pattern_variants, search_bandha_pattern_batch, expand_param_grid
+
+EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Adhyaya_One_Chakras.xlsx')
+
+
+class TestPatternSearchExecutor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
+        cls.executor = PatternSearchExecutor(max_workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_split_shards_is_contiguous_and_balanced(self):
+        shards = split_shards(list(range(10)), 4)
+        self.assertEqual(shards, [[0, 1, 2], [3, 4, 5], [6, 7], [8, 9]])
+        self.assertEqual(split_shards([1, 2], 8), [[1], [2]])
+
+    def test_sharded_search_matches_serial(self):
+        """Sharded results, merged in shard order, equal the single-process results exactly."""
+        target = ''.join(self.chakra.get_akshara_at(0, c)[0] for c in range(3))
+        for pattern_type in ('vertical_zigzag', 'shreni_bandha'):
+            serial = search_all_pattern_variants(self.chakra, target, pattern_type, 'levenshtein', 1)
+            sharded = search_all_pattern_variants(self.chakra, target, pattern_type, 'levenshtein', 1,
+                                                  executor=self.executor)
+            self.assertEqual(sharded, serial)
+
+        params = expand_param_grid({'start_row': list(range(27)), 'start_col': list(range(27)), 'length': 3})
+        self.assertEqual(
+            search_bandha_pattern_batch(self.chakra, target, 'horizontal_zigzag', params, executor=self.executor),
+            search_bandha_pattern_batch(self.chakra, target, 'horizontal_zigzag', params))
+
+    def test_knight_search_runs_in_pool(self):
+        target = ''.join(self.chakra.get_akshara_at(r, c)[0] for r, c in [(0, 0), (2, 1), (4, 2)])
+        serial = search_all_pattern_variants(self.chakra, target, 'chess_knight', 'hamming', 1)
+        self.assertTrue(serial)
+        self.assertEqual(search_all_pattern_variants(self.chakra, target, 'chess_knight', 'hamming', 1,
+                                                     executor=self.executor), serial)
+
+    def test_progress_reaches_one(self):
+        seen = []
+        params = expand_param_grid({'start_row': list(range(27)), 'start_col': list(range(27)), 'length': 2})
+        self.executor.search_variants(self.chakra, 'ಅ', 'horizontal_zigzag', params, progress=seen.append)
+        self.assertEqual(seen[-1], 1.0)
+        self.assertEqual(seen, sorted(seen))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import json
+import sys
+import os
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.path import Path
+
+
+class TestPath(unittest.TestCase):
+    def test_behaves_like_point_list(self):
+        points = [(0, 0), (0, 1), (1, 1), (26, 26)]
+        path = Path.from_points(points)
+        self.assertEqual(len(path), 4)
+        self.assertEqual(list(path), points)
+        self.assertEqual(path, points)
+        self.assertEqual(path, [[0, 0], [0, 1], [1, 1], [26, 26]])
+        self.assertEqual(path[-1], (26, 26))
+        self.assertEqual(path.flat(), [0, 1, 28, 728])
+        with self.assertRaises(ValueError):
+            Path.from_points([(27, 0)])
+
+    def test_slices_share_buffer_and_hash_by_cells(self):
+        path = Path.from_points([(0, c) for c in range(10)])
+        window = path[2:5]
+        self.assertIs(window._cells, path._cells)
+        self.assertEqual(window, [(0, 2), (0, 3), (0, 4)])
+        self.assertEqual(hash(window), hash(Path.from_points([(0, 2), (0, 3), (0, 4)])))
+        self.assertEqual(len({window, Path.from_points([(0, 2), (0, 3), (0, 4)])}), 1)
+
+    def test_stepped_and_reversed_slices(self):
+        points = [(0, c) for c in range(10)]
+        window = Path.from_points(points)[2:8]
+        self.assertEqual(window[::-1], points[2:8][::-1])
+        self.assertEqual(window[::2], points[2:8:2])
+        self.assertEqual(window[4:1:-2], points[2:8][4:1:-2])
+        self.assertEqual(window[1:4:-1], [])
+
+    def test_hash_agrees_with_equality(self):
+        path = Path.from_points([(0, 0), (1, 1), (2, 2)])
+        as_tuple = ((0, 0), (1, 1), (2, 2))
+        self.assertEqual(path, as_tuple)
+        self.assertEqual(hash(path), hash(as_tuple))
+        self.assertIn(as_tuple, {path})
+        self.assertIn(path, {as_tuple})
+        self.assertEqual({path: 'diagonal'}[as_tuple], 'diagonal')
+        self.assertNotIn(path[::-1], {path})
+
+    def test_wire_encoding(self):
+        diagonal = Path.from_ray(26, 0, 6, 5)  # Up-Right
+        self.assertEqual(diagonal.to_wire(), [26 * 27, 6, 5])
+        knight = Path.from_points([(0, 0), (2, 1), (4, 2), (3, 4)])
+        self.assertEqual(knight.to_wire(), {'c': [0, 55, 110, 85]})
+        for path in (diagonal, knight):
+            wire = json.loads(json.dumps(path.to_wire()))
+            self.assertEqual(Path.from_wire(wire), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bandha import Bandha
+from src.chakra import Chakra
+from src.permutation import PermutationBandha, shipped_permutations, shipped_prefix
+from src.search import PatternSearchPlan
+
+EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Adhyaya_One_Chakras.xlsx')
+
+
+class TestPermutationBandha(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
+
+    def test_decode_matches_traverse(self):
+        bandha = Bandha()
+        points = bandha.shreni_bandha(13, 13, 729, 'up')
+        perm = PermutationBandha.from_points(points)
+        self.assertEqual(perm.perm.dtype, np.int16)
+        self.assertEqual(perm.points(), points)
+        for script in ('kannada', 'devanagari'):
+            self.assertEqual(perm.decode(self.chakra, script), bandha.traverse(self.chakra, script)[0])
+
+    def test_compose_and_inverse(self):
+        rows = PermutationBandha.identity()
+        columns = PermutationBandha.column_order()
+        self.assertTrue(columns.is_complete)
+        # Transposing twice is the identity, and the transpose is its own inverse
+        self.assertEqual(columns.compose(columns), rows)
+        self.assertEqual(columns.inverse(), columns)
+        self.assertEqual(columns.compose(columns.inverse()), rows)
+        self.assertEqual(columns.decode(self.chakra),
+                         ''.join(self.chakra.get_akshara_at(r, c)[0] for c in range(27) for r in range(27)))
+        with self.assertRaises(ValueError):
+            PermutationBandha.from_points([(0, 0), (0, 1)]).inverse()
+        with self.assertRaises(ValueError):
+            PermutationBandha.from_points([(0, 0), (0, 0)])
+
+    def test_shipped_permutations_cached_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, 'permutations.npz')
+            built = shipped_permutations(cache_path)
+            self.assertTrue(os.path.exists(cache_path))
+            # A second process would load the file rather than rebuild
+            from src import permutation
+            del permutation._shipped[cache_path]
+            loaded = shipped_permutations(cache_path)
+            self.assertEqual(set(built), set(loaded))
+
+        shreni = loaded['shreni_bandha:up:13:13']
+        self.assertEqual(shreni.points(), Bandha().shreni_bandha(13, 13, 729, 'up'))
+        # Shorter variants are prefixes of the maximal path
+        self.assertEqual(loaded['horizontal_zigzag:5:5'].prefix(6).points(), Bandha().horizontal_zigzag(5, 5, 6))
+
+
+    def test_pattern_paths_are_shipped_prefixes(self):
+        bandha = Bandha()
+        for r, c in ((0, 0), (13, 13), (26, 5)):
+            for length in (0, 1, 6, 54, 100, 1000):
+                self.assertEqual(shipped_prefix('horizontal_zigzag', {'start_row': r, 'start_col': c, 'length': length}).points(),
+                                 bandha.horizontal_zigzag(r, c, length))
+                self.assertEqual(shipped_prefix('vertical_zigzag', {'start_row': r, 'start_col': c, 'length': length}).points(),
+                                 bandha.vertical_zigzag(r, c, length))
+                # Past the point where Shreni Bandha gets stuck, too
+                for direction in ('up', 'down'):
+                    params = {'start_row': r, 'start_col': c, 'num_steps': length, 'direction': direction}
+                    self.assertEqual(shipped_prefix('shreni_bandha', params).points(),
+                                     bandha.shreni_bandha(r, c, length, direction))
+        self.assertIsNone(shipped_prefix('chess_knight', {'start_row': 0, 'start_col': 0, 'num_jumps': 3}))
+        self.assertIsNone(shipped_prefix('horizontal_zigzag', {'start_row': 30, 'start_col': 0, 'length': 3}))
+
+        # The pattern search decodes the shipped path in one gather
+        plan = PatternSearchPlan(self.chakra, 'ಅ')
+        path = plan.pattern_path('shreni_bandha', {'start_row': 13, 'start_col': 13, 'num_steps': 10, 'direction': 'up'})
+        self.assertEqual(path, bandha.shreni_bandha(13, 13, 10, 'up'))
+        self.assertEqual(plan.path_text(path)[1], PermutationBandha.from_points(path).decode(self.chakra))
+
+
+if __name__ == '__main__':
+    unittest.main()
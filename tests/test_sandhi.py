@@ -0,0 +1,114 @@
+import unittest
+import random
+import sys
+import os
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.chakra import Chakra
+from src.sandhi_simple import MATRA_VOWELS, Sandhi, SandhiTransducer, sandhi_alignment, visandhi
+from src.search import search_grid
+from src.transliterate import AKSHARA_MAP
+
+EXCEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Adhyaya_One_Chakras.xlsx')
+
+
+class _UnindexedChakra(Chakra):
+    """A Chakra without the Sandhi index, so searches take the converting scan."""
+    sandhi_index = None
+
+
+class TestSandhiAlignment(unittest.TestCase):
+    def test_prefixes_and_sources(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            text = ''.join(AKSHARA_MAP[rng.randrange(1, 65)] for _ in range(rng.randrange(8)))
+            outword, sources, cuts = sandhi_alignment(text)
+            self.assertEqual(outword, Sandhi(text))
+            self.assertEqual(len(sources), len(outword))
+            self.assertEqual(sources, sorted(sources))
+            for k in range(len(text) + 1):
+                length, tail = cuts[k]
+                self.assertEqual(outword[:length] + tail, Sandhi(text[:k]))
+
+    def test_joined_vowel_maps_to_its_cell(self):
+        outword, sources, cuts = sandhi_alignment('स्ओम्')
+        self.assertEqual(outword, 'सोम्')
+        self.assertEqual(sources, [0, 2, 3, 4])
+        # Cut between halanth and vowel: the halanth stays
+        self.assertEqual(cuts[2], (1, '्'))
+
+
+class TestSandhiTransducer(unittest.TestCase):
+    def _chunks(self, rng, text):
+        chunks, start = [], 0
+        while start < len(text):
+            end = start + rng.randrange(1, 4)
+            chunks.append(text[start:end])
+            start = end
+        return chunks
+
+    def test_streams_match_whole_conversion(self):
+        rng = random.Random(0)
+        # Matras as well, which only appear in visandhi's input
+        symbols = [AKSHARA_MAP[n] for n in range(1, 65)] + list(MATRA_VOWELS)
+        for _ in range(500):
+            text = ''.join(rng.choice(symbols) for _ in range(rng.randrange(10)))
+            for reverse, convert in ((False, Sandhi), (True, visandhi)):
+                transducer = SandhiTransducer(reverse)
+                fed, settled = '', ''
+                for chunk in self._chunks(rng, text):
+                    fed += chunk
+                    settled += transducer.feed(chunk)
+                    # The length is known without building the text
+                    self.assertEqual(len(transducer), len(convert(fed)))
+                    self.assertEqual(transducer.settled_length, len(settled))
+                    self.assertEqual(transducer.snapshot(), convert(fed), (fed, reverse))
+                    self.assertTrue(convert(fed).startswith(settled))
+                self.assertEqual(settled + transducer.flush(), convert(text))
+                self.assertEqual(transducer.snapshot(), '')
+
+    def test_lookahead_waits_for_next_character(self):
+        transducer = SandhiTransducer()
+        self.assertEqual(transducer.feed('स्'), 'स')
+        self.assertEqual(transducer.snapshot(), 'स्')
+        self.assertEqual(transducer.feed('ओ'), 'ो')
+        self.assertEqual(transducer.snapshot(), 'सो')
+
+        transducer = SandhiTransducer(reverse=True)
+        self.assertEqual(transducer.feed('क'), '')
+        self.assertEqual(transducer.snapshot(), 'क्अ')
+        self.assertEqual(transducer.feed('ा'), 'क्आ')
+
+
+class TestSandhiRayIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.chakra = Chakra(EXCEL_PATH, sheet_name='Chakra1-1-1')
+        cls.unindexed = _UnindexedChakra.from_grid(cls.chakra.grid)
+
+    def test_runs_read_as_sandhi_of_their_cells(self):
+        for key in ((0, 0, 0), (13, 13, 5), (26, 26, 7)):
+            run = self.chakra.sandhi_index.runs[key]
+            texts = [self.chakra.get_akshara_at(r, c, 'devanagari')[1] for r, c in run.path]
+            for cells in range(len(run.path) + 1):
+                self.assertEqual(run.prefix(cells), Sandhi(''.join(texts[:cells])))
+                self.assertEqual(run.prefix_length(cells), len(run.prefix(cells)))
+            # Each normalized character points at the cell it was read from
+            self.assertEqual(run.cell_of, sorted(run.cell_of))
+            for m, cell in enumerate(run.cell_of):
+                self.assertLess(run.cuts[cell][0], m + 1)
+
+    def test_search_matches_converting_scan(self):
+        along = [(5, 3), (5, 4), (5, 5)]
+        target = Sandhi(''.join(self.chakra.get_akshara_at(r, c, 'devanagari')[1] for r, c in along))
+        for measure, max_distance in (('exact', 0), ('hamming', 1), ('levenshtein', 1)):
+            for candidate in (target, target[:2]):
+                expected = search_grid(self.unindexed, candidate, measure, max_distance, 'kannada', True)
+                found = search_grid(self.chakra, candidate, measure, max_distance, 'kannada', True)
+                self.assertEqual(found, expected, (candidate, measure))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+import unittest
+import functools
+import json
+import sys
+import os
+
+# Add parent directory to path to import src and app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from src.search import search_with_bandha_patterns
+
+
+class TestSearchEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.app = app_module.app.test_client()
+        self.chakra = app_module.chakra
+
+        # Ensure a clean auth DB and register a user through the API
+        auth_db_path = app_module.AUTH_DB_PATH
+        if os.path.exists(auth_db_path):
+            os.remove(auth_db_path)
+        app_module.init_auth_db()
+
+        resp = self.app.post(
+            "/api/auth/register",
+            data=json.dumps({"email": "search@example.com", "password": "StrongPass1!"}),
+            content_type="application/json",
+        )
+        assert resp.status_code == 201, resp.data
+        self.auth_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {json.loads(resp.data)['access_token']}",
+        }
+
+    def _target_along(self, points):
+        return ''.join(self.chakra.get_akshara_at(r, c)[0] for r, c in points)
+
+    def test_batch_param_grid_matches_single_requests(self):
+        """A param_grid batch returns the same matches as one request per variant."""
+        target = self._target_along([(0, 0), (0, 1)])
+        payload = {
+            'target': target,
+            'pattern_type': 'horizontal_zigzag',
+            'param_grid': {'start_row': list(range(3)), 'start_col': list(range(27)), 'length': 2},
+        }
+        response = self.app.post('/api/search/bandha_pattern/batch',
+                                 data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['variants_searched'], 81)
+
+        expected = []
+        for r in range(3):
+            for c in range(27):
+                params = {'start_row': r, 'start_col': c, 'length': 2}
+                expected.extend(search_with_bandha_patterns(self.chakra, target, 'horizontal_zigzag', params))
+        self.assertEqual(sorted(m['path'] for m in data['matches']),
+                         sorted([list(p) for p in m['path']] for m in expected))
+        self.assertIn([[0, 0], [0, 1]], [m['path'] for m in data['matches']])
+
+    def test_batch_rejects_oversized_grid(self):
+        payload = {
+            'target': 'ಅ',
+            'pattern_type': 'chess_knight',
+            'param_grid': {'start_row': list(range(27)), 'start_col': list(range(27)),
+                           'num_jumps': list(range(10))},
+        }
+        response = self.app.post('/api/search/bandha_pattern/batch',
+                                 data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_formula_family_finds_modular_path(self):
+        """A modular family sweep finds the member whose path spells the target."""
+        from src.bandha import Bandha
+        points = Bandha().generate_from_function("(5*x + 3) % 27")
+        target = self._target_along(points[4:8])
+        payload = {'target': target, 'family': 'modular'}
+        response = self.app.post('/api/search/formula_family',
+                                 data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['variants_searched'], 729)
+        self.assertIn([list(p) for p in points[4:8]], [m['path'] for m in data['matches']])
+        match = data['matches'][0]
+        self.assertEqual(match['pattern_type'], 'formula')
+        self.assertEqual(self._target_along(match['path']), target)
+
+    def test_formula_family_rejects_bad_formula(self):
+        payload = {'target': 'ಅ', 'formula': 'a*x + __import__("os")', 'param_ranges': {'a': [1]}}
+        response = self.app.post('/api/search/formula_family',
+                                 data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_compact_response_round_trips(self):
+        """The opt-in compact format decodes to the same matches, and is smaller."""
+        import gzip
+        import msgpack
+        from src.encoding import decode_matches
+        payload = {'target': self._target_along([(0, 0), (0, 1), (0, 2)]), 'measure': 'levenshtein', 'max_distance': 2}
+        regular = json.loads(self.app.post('/api/search', data=json.dumps(payload), headers=self.auth_headers).data)
+
+        response = self.app.post('/api/search', data=json.dumps(dict(payload, format='compact')),
+                                 headers=self.auth_headers)
+        self.assertLess(len(response.data), len(json.dumps(regular)))
+        body = json.loads(response.data)
+        self.assertEqual(body['header']['measure'], 'levenshtein')
+        self.assertEqual(decode_matches(body), regular['matches'])
+
+        headers = dict(self.auth_headers, **{'Accept': 'application/x-msgpack', 'Accept-Encoding': 'gzip'})
+        response = self.app.post('/api/search', data=json.dumps(payload), headers=headers)
+        self.assertEqual(response.mimetype, 'application/x-msgpack')
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        body = msgpack.unpackb(gzip.decompress(response.data))
+        self.assertEqual(decode_matches(body), regular['matches'])
+
+    def test_stream_yields_same_matches(self):
+        """NDJSON streaming returns the same matches as /api/search, then a done event."""
+        payload = {'target': self._target_along([(0, 0), (0, 1), (0, 2)]), 'measure': 'levenshtein', 'max_distance': 1}
+        regular = json.loads(self.app.post('/api/search', data=json.dumps(payload), headers=self.auth_headers).data)
+
+        response = self.app.post('/api/search/stream', data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        events = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        streamed = [e['match'] for e in events if e['type'] == 'match']
+        self.assertEqual(events[-1], {'type': 'done', 'count': len(streamed)})
+        self.assertEqual(sorted(m['path'] for m in streamed), sorted(m['path'] for m in regular['matches']))
+
+        headers = dict(self.auth_headers, Accept='text/event-stream')
+        response = self.app.post('/api/search/stream', data=json.dumps(payload), headers=headers)
+        self.assertTrue(response.data.decode('utf-8').startswith('event: match\ndata: {'))
+
+    def test_stream_stops_search_when_closed(self):
+        """Closing the response (as on a client disconnect) closes the search generator."""
+        closed = []
+        original = app_module.iter_search_grid
+
+        def tracking_search(*args, **kwargs):
+            try:
+                yield from original(*args, **kwargs)
+            finally:
+                closed.append(True)
+
+        app_module.iter_search_grid = tracking_search
+        try:
+            payload = {'target': self._target_along([(0, 0), (0, 1)]), 'measure': 'levenshtein',
+                       'max_distance': 2, 'use_sandhi': True}
+            response = self.app.post('/api/search/stream', data=json.dumps(payload),
+                                     headers=self.auth_headers, buffered=False)
+            first = json.loads(next(iter(response.response)))
+            self.assertEqual(first['type'], 'match')
+            self.assertEqual(closed, [])
+            response.close()
+            self.assertEqual(closed, [True])
+        finally:
+            app_module.iter_search_grid = original
+
+    def test_search_pages_match_full_results(self):
+        """Pages from 'limit' and 'next' tokens are slices of the full sorted results."""
+        payload = {'target': self._target_along([(0, 0), (0, 1), (0, 2)]), 'measure': 'levenshtein', 'max_distance': 2}
+        regular = json.loads(self.app.post('/api/search', data=json.dumps(payload), headers=self.auth_headers).data)
+
+        pages = []
+        request_body = dict(payload, limit=7)
+        while True:
+            response = self.app.post('/api/search', data=json.dumps(request_body), headers=self.auth_headers)
+            self.assertEqual(response.status_code, 200)
+            body = json.loads(response.data)
+            pages.extend(body['matches'])
+            if body['next'] is None:
+                break
+            request_body = dict(payload, limit=7, continuation=body['next'])
+        self.assertEqual(pages, regular['matches'])
+        self.assertEqual(body['total'], len(regular['matches']))
+
+        # A token only continues the query it was issued for
+        first = json.loads(self.app.post('/api/search', data=json.dumps(dict(payload, limit=7)),
+                                         headers=self.auth_headers).data)
+        response = self.app.post('/api/search', data=json.dumps(dict(payload, max_distance=1, limit=7,
+                                                                     continuation=first['next'])),
+                                 headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_page_stops_after_exact_matches(self):
+        """Once limit exact matches are found, the scan stops and total is unknown."""
+        from src.search import search_grid, search_grid_page
+        target = self._target_along([(0, 0)])
+        full = search_grid(self.chakra, target, 'levenshtein', 1)
+        exact = [m for m in full if m['distance'] == 0]
+        self.assertGreater(len(exact), 2)
+        page, total = search_grid_page(self.chakra, target, 'levenshtein', 1, limit=2)
+        self.assertIsNone(total)
+        self.assertEqual(page, exact[:2])
+        page, total = search_grid_page(self.chakra, target, 'levenshtein', 1, limit=5, offset=len(full) - 2)
+        self.assertEqual(page, full[-2:])
+        self.assertEqual(total, len(full))
+
+    def test_search_pages_with_sandhi(self):
+        """Sandhi gives exact matches of several lengths; each page still matches search_grid."""
+        from src.search import search_grid, search_grid_page
+        full = search_grid(self.chakra, 'ळ', 'levenshtein', 1, use_sandhi=True)
+        self.assertGreater(len({len(m['path']) for m in full if m['distance'] == 0}), 1)
+        for offset in range(0, 12, 3):
+            page, _ = search_grid_page(self.chakra, 'ळ', 'levenshtein', 1, use_sandhi=True, limit=3, offset=offset)
+            self.assertEqual(page, full[offset:offset + 3])
+
+    def test_move_paths_endpoint(self):
+        target = self._target_along([(5, 5), (6, 6), (6, 7)])
+        payload = {'target': target, 'moves': 'king', 'limit': 5}
+        response = self.app.post('/api/search/move_paths', data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertIn([[5, 5], [6, 6], [6, 7]], [m['path'] for m in data['matches']])
+        self.assertTrue(all(m['pattern_type'] == 'move_path' for m in data['matches']))
+        self.assertFalse(data['truncated'])
+
+        # A search that runs out of budget returns its matches so far, flagged as incomplete
+        search = app_module.search_move_paths
+        app_module.search_move_paths = functools.partial(search, max_nodes=100)
+        try:
+            response = self.app.post('/api/search/move_paths', headers=self.auth_headers, data=json.dumps(
+                {'target': target, 'moves': 'king', 'measure': 'levenshtein', 'max_distance': 1}))
+        finally:
+            app_module.search_move_paths = search
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertTrue(data['truncated'])
+        self.assertIn('abandoned', data['warning'])
+
+        payload['moves'] = [[0, 0]]
+        response = self.app.post('/api/search/move_paths', data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_move_searches_cap_max_distance(self):
+        """Exhaustive move searches reject a max_distance above half the target's length"""
+        target = self._target_along([(5, 5), (6, 6)])
+        fuzzy = {'target': target, 'measure': 'levenshtein', 'max_distance': 3}
+        for url, payload in (('/api/search/move_paths', {'moves': 'king'}),
+                             ('/api/search/all_pattern_variants', {'pattern_type': 'chess_knight'}),
+                             ('/api/search/stream', {'mode': 'pattern_variants', 'pattern_type': 'chess_knight'}),
+                             ('/api/jobs', {'pattern_types': ['chess_knight']})):
+            response = self.app.post(url, data=json.dumps(dict(fuzzy, **payload)), headers=self.auth_headers)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('max_distance', json.loads(response.data)['error'])
+
+    def test_targets_endpoint_searches_word_list(self):
+        target = self._target_along([(0, 0), (0, 1), (0, 2)])
+        payload = {'targets': [target, 'ಕ್ಷz', target], 'sources': ['rays']}
+        response = self.app.post('/api/search/targets', data=json.dumps(payload), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['targets_searched'], 2)
+        self.assertEqual(data['invalid'], ['ಕ್ಷz'])
+        self.assertIn([[0, 0], [0, 1], [0, 2]], [m['path'] for m in data['matches'] if m['target'] == target])
+
+        # Without 'targets', TargetStrings.txt is searched
+        response = self.app.post('/api/search/targets', data=json.dumps({}), headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['targets_searched'], len(app_module.load_target_strings()))
+
+    def test_batch_requires_auth(self):
+        response = self.app.post('/api/search/bandha_pattern/batch',
+                                 data=json.dumps({'target': 'ಅ', 'pattern_params_list': []}),
+                                 content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()